@@ -1,8 +1,17 @@
+import asyncio
+import cProfile
+import getopt
+import json
 import os
+import platform
+import pstats
 import random
+import re
 import string
 import sys
 import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
 from functools import wraps
 from pathlib import Path
 from typing import Type
@@ -11,8 +20,12 @@ root_path = Path(__file__).resolve().parent
 path_prefix = f'{root_path}{os.sep}'
 sys.path.append(f'{path_prefix}src')
 
-from compress.common import io, Encoder, Decoder, CompressionAlgorithm
-from compress import huffman, lz, lzh, hlz
+from bitarray import bitarray
+from bitarray.util import ba2int, int2ba
+
+from compress.common import io, convert, Encoder, Decoder, CompressionAlgorithm
+from compress.common.bits import BitReader, BitWriter
+from compress import aio, container, huffman, lz, lzh, hlz
 
 __N = [
     1_000,
@@ -30,6 +43,41 @@ __ALGORITHMS = [
     # hlz.HLZ,
 ]
 
+__CODE_LENGTH_LIMITS = [
+    None,
+    15,
+    12,
+    10,
+    8,
+]
+
+__LZ_CONFIGURATIONS = [
+    (12, 4),
+    (16, 8),
+    (20, 9),
+]
+
+__LZ_LEVELS = [
+    lz.Level.FAST,
+    lz.Level.DEFAULT,
+    lz.Level.MAX,
+]
+
+__BENCHMARK_ALGORITHMS = [
+    lz.LZ,
+    huffman.Huffman,
+    lzh.LZH,
+    hlz.HLZ,
+]
+
+__BENCHMARK_SIZE = 256_000
+__BENCHMARK_REPEATS = 3
+__BENCHMARK_SEED = 2022
+__BENCHMARK_OUTPUT = 'benchmark.json'
+__REGRESSION_TOLERANCE = 0.1
+__PROFILE_OUTPUT = 'profiles'
+__PROFILE_TOP = 20
+
 __FILES = [
     'sample/simple.txt',
     'sample/lorem.txt',
@@ -40,7 +88,7 @@ __FILES = [
 
 
 def to_mb(byte_size: int):
-    return round(byte_size / 1024, 3)
+    return round(byte_size / 1024 / 1024, 3)
 
 
 def calc_ratio(percentage: float):
@@ -50,9 +98,9 @@ def calc_ratio(percentage: float):
 def timed(func):
     @wraps(func)
     def timed_wrapper(*args, **kwargs):
-        start_time = time.process_time()
+        start_time = time.perf_counter()
         result = func(*args, **kwargs)
-        end_time = time.process_time()
+        end_time = time.perf_counter()
         total_time = end_time - start_time
         print(f'{total_time:.4f} seconds')
         return result
@@ -73,18 +121,711 @@ def measure_decoding_performance(input_bytes: bytes, decompressor: Decoder):
 def print_results(input_bytes: bytes, output_bytes: bytes):
     size_original = to_mb(len(input_bytes))
     size_compressed = to_mb(len(output_bytes))
-    compression_ratio = size_compressed / size_original
+    compression_ratio = len(output_bytes) / len(input_bytes) * 100 if input_bytes else 0
     print()
-    print(f'Original data: {size_original} KB')
+    print(f'Original data: {size_original} MB')
     print()
-    print(f'Compressed data: {size_compressed} KB')
+    print(f'Compressed data: {size_compressed} MB')
     print()
     print(f'{calc_ratio(compression_ratio)}% of the original')
     print()
 
 
-def random_bytes(n):
-    return ''.join(random.choice(string.printable) for _ in range(n)).encode()
+def random_bytes(n, generator: random.Random = random):
+    return bytes(generator.choices(string.printable.encode(), k=n))
+
+
+def skewed_bytes(n, generator: random.Random = random):
+    weights = [2 ** -i for i in range(64)]
+    return bytes(generator.choices(range(64), weights=weights, k=n))
+
+
+def text_bytes(n, generator: random.Random = random):
+    words = [
+        ''.join(generator.choices(string.ascii_lowercase, k=generator.randint(1, 10)))
+        for _ in range(2000)
+    ]
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    text = ' '.join(generator.choices(words, weights=weights, k=n // 4))
+    while len(text) < n:
+        text += text
+    return text[:n].encode()
+
+
+def measure_code_length_limits():
+    print("Huffman code length limits")
+    inputs = [
+        (file_name, io.read_file(os.path.join(root_path, file_name)))
+        for file_name in __FILES
+        if os.path.isfile(os.path.join(root_path, file_name))
+    ]
+    inputs.append(('1000000 skewed bytes', skewed_bytes(1_000_000)))
+    for name, input_bytes in inputs:
+        print(f'#### {name}')
+        for max_code_length in __CODE_LENGTH_LIMITS:
+            print(f'###### Maximum code length {max_code_length}')
+            encoder = huffman.HuffmanEncoder(canonical=True, max_code_length=max_code_length)
+            result = encoder.encode(input_bytes)
+            decode_start = time.perf_counter()
+            huffman.HuffmanDecoder().decode(result)
+            decode_time = time.perf_counter() - decode_start
+            print(f'{decode_time:.4f} seconds to decode')
+            print(f'{calc_ratio(len(result) / len(input_bytes))} of the original')
+    print()
+
+
+def log_bytes(n, generator: random.Random = random):
+    lines = []
+    size = 0
+    while size < n:
+        line = (
+            f'2022-09-04 12:{generator.randint(0, 59):02d}:{generator.randint(0, 59):02d} INFO '
+            f'GET /api/v1/items/{generator.randint(0, 999)} status=200 '
+            f'duration={generator.randint(1, 500)}ms user-agent=Mozilla/5.0 (X11; Linux x86_64)\n'
+        )
+        lines.append(line)
+        size += len(line)
+    return ''.join(lines).encode()[:n]
+
+
+def measure_lz_configurations():
+    print("Lempel-Ziv window and match length configurations")
+    inputs = [
+        (file_name, io.read_file(os.path.join(root_path, file_name)))
+        for file_name in __FILES
+        if os.path.isfile(os.path.join(root_path, file_name))
+    ]
+    inputs.append(('1000000 bytes of log lines', log_bytes(1_000_000)))
+    print(
+        '| Sample | Offset bits | Length bits | Level '
+        '| Encoding (MB/s) | Decoding (MB/s) | Compression Ratio |'
+    )
+    print('|---|---|---|---|---|---|---|')
+    for name, input_bytes in inputs:
+        for offset_bits, length_bits in __LZ_CONFIGURATIONS:
+            for level in __LZ_LEVELS:
+                encoder = lz.LZEncoder(
+                    level=level,
+                    offset_bits=offset_bits,
+                    length_bits=length_bits
+                )
+                encode_start = time.perf_counter()
+                result = encoder.encode(input_bytes)
+                encode_time = time.perf_counter() - encode_start
+                decode_start = time.perf_counter()
+                lz.LZDecoder().decode(result)
+                decode_time = time.perf_counter() - decode_start
+                size_mb = len(input_bytes) / 1024 / 1024
+                print(
+                    f'| {name} | {offset_bits} | {length_bits} | {level} '
+                    f'| {size_mb / encode_time:.3f} | {size_mb / decode_time:.3f} '
+                    f'| {calc_ratio(len(result) / len(input_bytes))} |'
+                )
+    print()
+
+
+def measure_bit_io(field_count: int = 1_000_000):
+    print("Bit I/O cost per field")
+    fields = [(random.getrandbits(12), 12) for _ in range(field_count)]
+    characters = [random.getrandbits(8) for _ in range(field_count)]
+    operations = field_count * 3
+
+    def bitarray_write():
+        buffer = bitarray()
+        for (value, width), character in zip(fields, characters):
+            buffer.append(1)
+            buffer.extend(int2ba(value, length=width))
+            buffer.frombytes(convert.char_int_to_bytes(character))
+        buffer.fill()
+        return bytes(buffer)
+
+    def bit_writer_write():
+        buffer = BitWriter()
+        for (value, width), character in zip(fields, characters):
+            buffer.write_bits(1, 1)
+            buffer.write_bits(value, width)
+            buffer.write_bits(character, 8)
+        return buffer.getvalue()
+
+    def bitarray_read(data: bytes):
+        buffer = bitarray()
+        buffer.frombytes(data)
+        index = 0
+        for _, width in fields:
+            buffer[index]
+            index += 1
+            ba2int(buffer[index: index + width])
+            index += width
+            convert.bytes_to_char_int(buffer[index: index + 8].tobytes())
+            index += 8
+
+    def bit_reader_read(data: bytes):
+        buffer = BitReader(data)
+        for _, width in fields:
+            buffer.read_bits(1)
+            buffer.read_bits(width)
+            buffer.read_bits(8)
+
+    print('| Operation | bitarray (ns/field) | BitWriter/BitReader (ns/field) |')
+    print('|---|---|---|')
+    timings = []
+    for function in (bitarray_write, bit_writer_write):
+        start = time.perf_counter()
+        written = function()
+        timings.append(time.perf_counter() - start)
+    print(f'| Write | {timings[0] / operations * 1e9:.1f} | {timings[1] / operations * 1e9:.1f} |')
+    timings = []
+    for function in (bitarray_read, bit_reader_read):
+        start = time.perf_counter()
+        function(written)
+        timings.append(time.perf_counter() - start)
+    print(f'| Read | {timings[0] / operations * 1e9:.1f} | {timings[1] / operations * 1e9:.1f} |')
+    print()
+
+
+def measure_parallel_scaling(n: int = 8_000_000):
+    print("Parallel block compression")
+    input_bytes = log_bytes(n)
+    size_mb = len(input_bytes) / 1024 / 1024
+    worker_counts = sorted({1, 2, 4, 8, 16, 32, os.cpu_count() or 1})
+    print(f'{os.cpu_count()} cores available')
+    print('| Algorithm | Workers | Encoding (MB/s) | Decoding (MB/s) |')
+    print('|---|---|---|---|')
+    for algorithm in __ALGORITHMS:
+        for workers in worker_counts:
+            encode_start = time.perf_counter()
+            result = container.compress(input_bytes, algorithm, workers=workers)
+            encode_time = time.perf_counter() - encode_start
+            decode_start = time.perf_counter()
+            container.decompress(result, workers=workers)
+            decode_time = time.perf_counter() - decode_start
+            print(
+                f'| {algorithm.__name__} | {workers} '
+                f'| {size_mb / encode_time:.3f} | {size_mb / decode_time:.3f} |'
+            )
+    print()
+
+
+def measure_random_access(n: int = 32_000_000, slice_size: int = 4096):
+    print("Random access to a compressed container")
+    file_path = os.path.join(root_path, 'random_access.dcmp')
+    with open(file_path, 'wb') as file:
+        with container.ContainerWriter(file, huffman.Huffman) as writer:
+            for _ in range(0, n, container.DEFAULT_BLOCK_SIZE):
+                writer.write(log_bytes(container.DEFAULT_BLOCK_SIZE))
+    try:
+        read_start = time.perf_counter()
+        container.read_range(file_path, n // 2, slice_size)
+        read_time = time.perf_counter() - read_start
+        decode_start = time.perf_counter()
+        with open(file_path, 'rb') as file:
+            for _ in container.ContainerReader(file).blocks():
+                pass
+        decode_time = time.perf_counter() - decode_start
+    finally:
+        os.remove(file_path)
+    print(f'{read_time * 1000:.1f} ms to read {slice_size} bytes from the middle of {n} bytes')
+    print(f'{decode_time * 1000:.1f} ms to decode everything')
+    print()
+
+
+def json_messages(count: int, generator: random.Random = random) -> list[bytes]:
+    return [
+        json.dumps({
+            'id': generator.randrange(1_000_000),
+            'timestamp': (
+                f'2022-09-04T12:{generator.randint(0, 59):02d}'
+                f':{generator.randint(0, 59):02d}Z'
+            ),
+            'user': {
+                'name': generator.choice(['alice', 'bob', 'carol', 'dave']),
+                'role': 'customer',
+            },
+            'event': generator.choice(['login', 'logout', 'purchase', 'refund']),
+            'items': [
+                {'sku': f'SKU-{generator.randint(0, 999):03d}', 'quantity': generator.randint(1, 5)}
+                for _ in range(generator.randint(0, 3))
+            ],
+            'amount': round(generator.random() * 100, 2),
+        }).encode()
+        for _ in range(count)
+    ]
+
+
+def measure_dictionary(message_count: int = 5_000):
+    print("Lempel-Ziv preset dictionaries on small messages")
+    generator = random.Random(__BENCHMARK_SEED)
+    samples = json_messages(message_count, generator)
+    messages = json_messages(message_count, generator)
+    train_start = time.perf_counter()
+    dictionary = lz.train_dictionary(samples)
+    train_time = time.perf_counter() - train_start
+    print(
+        f'{train_time:.4f} seconds to train a dictionary of {len(dictionary)} bytes '
+        f'from {len(samples)} messages'
+    )
+    print('| Dictionary | Encoding (µs/message) | Decoding (µs/message) | Compression Ratio |')
+    print('|---|---|---|---|')
+    for name, preset in (('none', None), (f'{len(dictionary)} bytes', dictionary)):
+        encoder = lz.LZEncoder(dictionary=preset)
+        decoder = lz.LZDecoder(dictionary=preset)
+        encode_start = time.perf_counter()
+        results = [encoder.encode(message) for message in messages]
+        encode_time = time.perf_counter() - encode_start
+        decode_start = time.perf_counter()
+        for result in results:
+            decoder.decode(result)
+        decode_time = time.perf_counter() - decode_start
+        ratio = sum(map(len, results)) / sum(map(len, messages))
+        print(
+            f'| {name} | {encode_time / len(messages) * 1_000_000:.1f} '
+            f'| {decode_time / len(messages) * 1_000_000:.1f} | {calc_ratio(ratio)} |'
+        )
+    print()
+
+
+def measure_static_tables(message_count: int = 5_000):
+    print("Static Huffman tables on small messages")
+    generator = random.Random(__BENCHMARK_SEED)
+    table = huffman.HuffmanTable.from_samples(json_messages(message_count, generator))
+    messages = json_messages(message_count, generator)
+    print('| Codes | Encoding (µs/message) | Decoding (µs/message) | Compression Ratio |')
+    print('|---|---|---|---|')
+    for name, static_table in (('canonical', None), ('static', table)):
+        encoder = huffman.HuffmanEncoder(canonical=True, table=static_table)
+        decoder = huffman.HuffmanDecoder(table=static_table)
+        encode_start = time.perf_counter()
+        results = [encoder.encode(message) for message in messages]
+        encode_time = time.perf_counter() - encode_start
+        decode_start = time.perf_counter()
+        for result in results:
+            decoder.decode(result)
+        decode_time = time.perf_counter() - decode_start
+        ratio = sum(map(len, results)) / sum(map(len, messages))
+        print(
+            f'| {name} | {encode_time / len(messages) * 1_000_000:.1f} '
+            f'| {decode_time / len(messages) * 1_000_000:.1f} | {calc_ratio(ratio)} |'
+        )
+    print()
+
+
+def measure_batches(message_count: int = 20_000):
+    print("Batches of small messages")
+    generator = random.Random(__BENCHMARK_SEED)
+    samples = json_messages(1_000, generator)
+    messages = json_messages(message_count, generator)
+    size_mb = sum(map(len, messages)) / 1024 / 1024
+    print('| Algorithm | Method | Encoding (MB/s) | Decoding (MB/s) | Compression Ratio |')
+    print('|---|---|---|---|---|')
+    for algorithm in (lz.LZ, huffman.Huffman):
+        options = algorithm.train(samples)
+        workers = os.cpu_count()
+        methods = [
+            ('encode() loop',
+             lambda: [algorithm.get_encoder()().encode(message) for message in messages],
+             lambda results: [algorithm.get_decoder()().decode(result) for result in results]),
+            ('encode_many()',
+             lambda: list(algorithm.encode_many(messages)),
+             lambda results: list(algorithm.decode_many(results))),
+            ('encode_many() with a shared model',
+             lambda: list(algorithm.encode_many(messages, **options)),
+             lambda results: list(algorithm.decode_many(results, **options))),
+            (f'encode_many() with a shared model, {workers} workers',
+             lambda: list(algorithm.encode_many(messages, workers=workers, **options)),
+             lambda results: list(algorithm.decode_many(results, workers=workers, **options))),
+        ]
+        for name, encode_all, decode_all in methods:
+            encode_start = time.perf_counter()
+            results = encode_all()
+            encode_time = time.perf_counter() - encode_start
+            decode_start = time.perf_counter()
+            decode_all(results)
+            decode_time = time.perf_counter() - decode_start
+            ratio = sum(map(len, results)) / sum(map(len, messages))
+            print(
+                f'| {algorithm.__name__} | {name} '
+                f'| {size_mb / encode_time:.3f} | {size_mb / decode_time:.3f} '
+                f'| {calc_ratio(ratio)} |'
+            )
+    print()
+
+
+def measure_batch_reuse(message_count: int = 100_000, repeats: int = 5):
+    print("Buffers and tables reused by encode_many() and decode_many() on short messages")
+    generator = random.Random(__BENCHMARK_SEED)
+    distinct = [
+        f'user={generator.randrange(1_000_000)} '
+        f'event={generator.choice(["login", "logout", "purchase"])}'.encode()
+        for _ in range(message_count)
+    ]
+    workloads = {
+        'distinct': distinct,
+        'repeated': [generator.choice(distinct[:100]) for _ in range(message_count)],
+    }
+    print('| Algorithm | Messages | Method | Encoding (MB/s) | Decoding (MB/s) |')
+    print('|---|---|---|---|---|')
+    for algorithm in (lz.LZ, huffman.Huffman):
+        encoder = algorithm.get_encoder()()
+        decoder = algorithm.get_decoder()()
+        for workload, messages in workloads.items():
+            size_mb = sum(map(len, messages)) / 1024 / 1024
+            encoded = [encoder.encode(message) for message in messages]
+            methods = {
+                'encode() loop': (
+                    lambda: [encoder.encode(message) for message in messages],
+                    lambda: [decoder.decode(result) for result in encoded]
+                ),
+                'encode_many()': (
+                    lambda: list(encoder.encode_many(messages)),
+                    lambda: list(decoder.decode_many(encoded))
+                ),
+            }
+            best_times = {name: [float('inf'), float('inf')] for name in methods}
+            # The methods take turns, so that a slowdown of the machine does not favour one of them.
+            for _ in range(repeats):
+                for name, functions in methods.items():
+                    for index, function in enumerate(functions):
+                        start = time.process_time()
+                        function()
+                        best_times[name][index] = min(
+                            best_times[name][index], time.process_time() - start
+                        )
+            for name, (encode_time, decode_time) in best_times.items():
+                print(
+                    f'| {algorithm.__name__} | {workload} | {name} '
+                    f'| {size_mb / encode_time:.3f} | {size_mb / decode_time:.3f} |'
+                )
+    print()
+
+
+def measure_vectorized_huffman(sizes: tuple[int, ...] = (1_000_000, 10_000_000, 100_000_000)):
+    print("Vectorized Huffman encoding")
+    if not huffman.vectorized.AVAILABLE:
+        print('NumPy is not installed')
+        return
+    print('| Input (MB) | Python (s) | NumPy (s) | Speedup |')
+    print('|---|---|---|---|')
+    for n in sizes:
+        input_bytes = text_bytes(n, random.Random(__BENCHMARK_SEED))
+        timings = []
+        results = []
+        for vectorized in (False, True):
+            encode_start = time.perf_counter()
+            results.append(huffman.HuffmanEncoder(vectorized=vectorized).encode(input_bytes))
+            timings.append(time.perf_counter() - encode_start)
+        assert results[0] == results[1]
+        speedup = timings[0] / timings[1]
+        print(f'| {to_mb(n)} | {timings[0]:.3f} | {timings[1]:.3f} | {speedup:.1f} |')
+    print()
+
+
+def measure_parallel_huffman(n: int = 100_000_000):
+    print("Parallel Huffman encoding with a shared code")
+    input_bytes = text_bytes(n, random.Random(__BENCHMARK_SEED))
+    size_mb = len(input_bytes) / 1024 / 1024
+    worker_counts = sorted({1, 2, 4, 8, os.cpu_count() or 1})
+    print(f'{os.cpu_count()} cores available')
+    unsynchronized_size = len(huffman.HuffmanEncoder().encode(input_bytes))
+    print(f'Compression ratio without sync points: {calc_ratio(unsynchronized_size / n)}')
+    print('| Workers | Encoding (MB/s) | Decoding (MB/s) | Compression Ratio |')
+    print('|---|---|---|---|')
+    for workers in worker_counts:
+        encode_start = time.perf_counter()
+        encoder = huffman.HuffmanEncoder(sync=huffman.SyncOptions(workers=workers))
+        result = encoder.encode(input_bytes)
+        encode_time = time.perf_counter() - encode_start
+        decode_start = time.perf_counter()
+        assert huffman.HuffmanDecoder(workers=workers).decode(result) == input_bytes
+        decode_time = time.perf_counter() - decode_start
+        print(
+            f'| {workers} | {size_mb / encode_time:.3f} | {size_mb / decode_time:.3f} '
+            f'| {calc_ratio(len(result) / n)} |'
+        )
+    print()
+
+
+def measure_event_loop_latency(n: int = 500_000, interval: float = 0.01):
+    print("Event loop latency while encoding")
+    input_bytes = text_bytes(n)
+    encoder = hlz.HLZEncoder()
+
+    async def encode_blocking():
+        encoder.encode(input_bytes)
+
+    async def encode_in_thread():
+        await aio.encode(encoder, input_bytes)
+
+    async def encode_in_process(executor):
+        await aio.encode(encoder, input_bytes, executor=executor)
+
+    async def lag_during(encode):
+        lags = []
+
+        async def tick():
+            while True:
+                tick_start = time.perf_counter()
+                await asyncio.sleep(interval)
+                lags.append(time.perf_counter() - tick_start - interval)
+
+        ticker = asyncio.create_task(tick())
+        await asyncio.sleep(5 * interval)
+        lags.clear()
+        encode_start = time.perf_counter()
+        await encode()
+        encode_time = time.perf_counter() - encode_start
+        await asyncio.sleep(2 * interval)
+        ticker.cancel()
+        return encode_time, lags
+
+    print(f'HLZ encoding of {n} bytes, the loop wakes up every {interval * 1000:.0f} ms')
+    print('| Encoding | Encoding time (s) | Maximum lag (ms) | Mean lag (ms) |')
+    print('|---|---|---|---|')
+    with ProcessPoolExecutor(1) as executor:
+        executor.submit(int).result()
+        for name, encode in (
+                ('blocking', encode_blocking),
+                ('thread pool', encode_in_thread),
+                ('process pool', lambda: encode_in_process(executor)),
+        ):
+            encode_time, lags = asyncio.run(lag_during(encode))
+            lags = lags or [0.0]
+            print(
+                f'| {name} | {encode_time:.3f} '
+                f'| {max(lags) * 1000:.1f} | {sum(lags) / len(lags) * 1000:.1f} |'
+            )
+    print()
+
+
+def benchmark_corpora(n: int) -> list[tuple[str, bytes]]:
+    generator = random.Random(__BENCHMARK_SEED)
+    corpora = [
+        ('text', text_bytes(n, generator)),
+        ('logs', log_bytes(n, generator)),
+        ('skewed', skewed_bytes(n, generator)),
+        ('random', generator.randbytes(n)),
+    ]
+    for file_name in __FILES:
+        file_path = os.path.join(root_path, file_name)
+        if os.path.isfile(file_path):
+            corpora.append((file_name, io.read_file(file_path)[:n]))
+    return corpora
+
+
+def benchmark(
+        algorithm: Type[CompressionAlgorithm],
+        corpus: str,
+        input_bytes: bytes,
+        repeats: int
+) -> dict:
+    encoder = algorithm.get_encoder()()
+    decoder = algorithm.get_decoder()()
+    encode_times = []
+    decode_times = []
+    for _ in range(repeats):
+        encode_start = time.perf_counter()
+        result = encoder.encode(input_bytes)
+        encode_times.append(time.perf_counter() - encode_start)
+        decode_start = time.perf_counter()
+        decoded = decoder.decode(result)
+        decode_times.append(time.perf_counter() - decode_start)
+        if decoded != input_bytes:
+            raise RuntimeError(f'{algorithm.__name__} did not decode {corpus} back to the original')
+    tracemalloc.start()
+    encoder.encode(input_bytes)
+    encode_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.reset_peak()
+    decoder.decode(result)
+    decode_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    size_mb = len(input_bytes) / 1024 / 1024
+    return {
+        'algorithm': algorithm.__name__,
+        'corpus': corpus,
+        'size': len(input_bytes),
+        'encode_seconds': min(encode_times),
+        'decode_seconds': min(decode_times),
+        'encode_mb_per_second': size_mb / min(encode_times),
+        'decode_mb_per_second': size_mb / min(decode_times),
+        'encode_peak_bytes': encode_peak,
+        'decode_peak_bytes': decode_peak,
+        'ratio': len(result) / len(input_bytes),
+    }
+
+
+def run_benchmarks(arg_list: list[str]):
+    options, _ = getopt.getopt(arg_list, '', ['size=', 'repeats=', 'output='])
+    options = dict(options)
+    n = int(options.get('--size', __BENCHMARK_SIZE))
+    repeats = int(options.get('--repeats', __BENCHMARK_REPEATS))
+    output_path = options.get('--output', __BENCHMARK_OUTPUT)
+    print(f'Benchmark of {n} bytes per corpus, best of {repeats} runs')
+    print(
+        '| Algorithm | Corpus | Encoding (MB/s) | Decoding (MB/s) '
+        '| Encoding peak (MB) | Decoding peak (MB) | Ratio |'
+    )
+    print('|---|---|---|---|---|---|---|')
+    results = []
+    for name, input_bytes in benchmark_corpora(n):
+        for algorithm in __BENCHMARK_ALGORITHMS:
+            result = benchmark(algorithm, name, input_bytes, repeats)
+            results.append(result)
+            print(
+                f'| {result["algorithm"]} | {name} '
+                f'| {result["encode_mb_per_second"]:.3f} | {result["decode_mb_per_second"]:.3f} '
+                f'| {to_mb(result["encode_peak_bytes"])} | {to_mb(result["decode_peak_bytes"])} '
+                f'| {calc_ratio(result["ratio"])} |'
+            )
+    with open(output_path, 'w') as file:
+        json.dump({
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'size': n,
+            'repeats': repeats,
+            'results': results,
+        }, file, indent=2)
+    print()
+    print(f'Results written to {output_path}')
+
+
+def compare_benchmarks(arg_list: list[str]) -> bool:
+    options, paths = getopt.getopt(arg_list, '', ['tolerance='])
+    tolerance = float(dict(options).get('--tolerance', __REGRESSION_TOLERANCE))
+    baseline_path, results_path = paths
+    with open(baseline_path) as file:
+        baseline = {
+            (result['algorithm'], result['corpus']): result
+            for result in json.load(file)['results']
+        }
+    with open(results_path) as file:
+        results = json.load(file)['results']
+    print(f'Comparison against {baseline_path}, tolerance {tolerance:.0%}')
+    print(
+        '| Algorithm | Corpus | Encoding | Decoding '
+        '| Encoding peak | Decoding peak | Ratio | Regression |'
+    )
+    print('|---|---|---|---|---|---|---|---|')
+    regressions = 0
+    for result in results:
+        previous = baseline.get((result['algorithm'], result['corpus']))
+        if previous is None:
+            continue
+        changes = {
+            'encoding': result['encode_mb_per_second'] / previous['encode_mb_per_second'] - 1,
+            'decoding': result['decode_mb_per_second'] / previous['decode_mb_per_second'] - 1,
+            'encoding peak':
+                result['encode_peak_bytes'] / max(previous['encode_peak_bytes'], 1) - 1,
+            'decoding peak':
+                result['decode_peak_bytes'] / max(previous['decode_peak_bytes'], 1) - 1,
+            'ratio': result['ratio'] / previous['ratio'] - 1,
+        }
+        regressed = [
+            metric for metric, change in changes.items()
+            if (change < -tolerance if metric in ('encoding', 'decoding') else change > tolerance)
+        ]
+        regressions += bool(regressed)
+        print(
+            f'| {result["algorithm"]} | {result["corpus"]} '
+            + ''.join(f'| {change:+.1%} ' for change in changes.values())
+            + f'| {", ".join(regressed)} |'
+        )
+    print()
+    print(f'{regressions} regressions')
+    return not regressions
+
+
+def frame_name(function: tuple[str, int, str]) -> str:
+    file_name, line_number, function_name = function
+    if file_name == '~':
+        return function_name.replace(';', ':')
+    file_path = Path(file_name)
+    return f'{file_path.parent.name}/{file_path.name}:{line_number}({function_name})'
+
+
+def collapsed_stacks(profile_stats: pstats.Stats, max_depth: int = 64) -> list[str]:
+    """
+    Converts the call graph of a profile into collapsed stacks that flame graph tools can read.
+    cProfile only records the callers of each function, so the time of a function is divided
+    between its callers in proportion to the time spent in the calls from each of them.
+    """
+    functions = profile_stats.stats
+    children: dict[tuple, list[tuple[tuple, float]]] = {}
+    for function, (_, _, _, _, callers) in functions.items():
+        for caller, (_, _, _, caller_cumulative) in callers.items():
+            children.setdefault(caller, []).append((function, caller_cumulative))
+    weights: dict[str, float] = {}
+
+    def walk(function: tuple, stack: tuple[str, ...], share: float):
+        _, _, own_time, cumulative_time, _ = functions[function]
+        stack += (frame_name(function),)
+        weights[';'.join(stack)] = weights.get(';'.join(stack), 0.0) + own_time * share
+        if len(stack) >= max_depth:
+            return
+        for child, edge_time in children.get(function, []):
+            child_cumulative = functions[child][3]
+            if child_cumulative and frame_name(child) not in stack:
+                walk(child, stack, share * edge_time / child_cumulative)
+
+    for function, (_, _, _, _, callers) in functions.items():
+        if not callers:
+            walk(function, (), 1.0)
+    return [
+        f'{stack} {round(weight * 1_000_000)}'
+        for stack, weight in weights.items()
+        if weight >= 0.0000005
+    ]
+
+
+def profile(
+        algorithm: Type[CompressionAlgorithm],
+        corpus: str,
+        input_bytes: bytes,
+        output_directory: str,
+        top: int
+):
+    """
+    Profiles the encoding and the decoding of a corpus,
+    and writes the profiles and their collapsed stacks.
+    """
+    encoded = b''
+    for operation in ('encode', 'decode'):
+        profiler = cProfile.Profile()
+        if operation == 'encode':
+            encoded = profiler.runcall(algorithm.get_encoder()().encode, input_bytes)
+        else:
+            profiler.runcall(algorithm.get_decoder()().decode, encoded)
+        name = re.sub(r'[^\w.-]+', '_', f'{algorithm.__name__}-{corpus}-{operation}').lower()
+        profile_path = os.path.join(output_directory, f'{name}.pstats')
+        profiler.dump_stats(profile_path)
+        profile_stats = pstats.Stats(profiler)
+        with open(os.path.join(output_directory, f'{name}.folded'), 'w') as file:
+            file.write('\n'.join(collapsed_stacks(profile_stats)) + '\n')
+        print(f'### {algorithm.__name__} {operation} {corpus} ({profile_path})')
+        profile_stats.strip_dirs().sort_stats(pstats.SortKey.TIME).print_stats(top)
+
+
+def run_profiles(arg_list: list[str]):
+    options, _ = getopt.getopt(arg_list, '', ['algorithm=', 'corpus=', 'size=', 'top=', 'output='])
+    options = dict(options)
+    algorithm_names = options.get('--algorithm')
+    corpus_names = options.get('--corpus')
+    n = int(options.get('--size', __BENCHMARK_SIZE))
+    top = int(options.get('--top', __PROFILE_TOP))
+    output_directory = options.get('--output', __PROFILE_OUTPUT)
+    algorithms = [
+        algorithm for algorithm in __BENCHMARK_ALGORITHMS
+        if algorithm_names is None
+        or algorithm.__name__.lower() in algorithm_names.lower().split(',')
+    ]
+    corpora = [
+        (name, input_bytes) for name, input_bytes in benchmark_corpora(n)
+        if corpus_names is None or name in corpus_names.split(',')
+    ]
+    if not algorithms or not corpora:
+        raise SystemExit('No algorithm or corpus matches the selection')
+    os.makedirs(output_directory, exist_ok=True)
+    for name, input_bytes in corpora:
+        for algorithm in algorithms:
+            profile(algorithm, name, input_bytes, output_directory, top)
 
 
 def measure(input_bytes: bytes, algorithm: Type[CompressionAlgorithm]):
@@ -112,4 +853,35 @@ def start_performance_tests():
 
 
 if __name__ == '__main__':
-    start_performance_tests()
+    if 'code-lengths' in sys.argv[1:]:
+        measure_code_length_limits()
+    elif 'lz-configurations' in sys.argv[1:]:
+        measure_lz_configurations()
+    elif 'bit-io' in sys.argv[1:]:
+        measure_bit_io()
+    elif 'parallel' in sys.argv[1:]:
+        measure_parallel_scaling()
+    elif 'random-access' in sys.argv[1:]:
+        measure_random_access()
+    elif 'dictionary' in sys.argv[1:]:
+        measure_dictionary()
+    elif 'static-tables' in sys.argv[1:]:
+        measure_static_tables()
+    elif 'batch' in sys.argv[1:]:
+        measure_batches()
+    elif 'batch-reuse' in sys.argv[1:]:
+        measure_batch_reuse()
+    elif 'aio' in sys.argv[1:]:
+        measure_event_loop_latency()
+    elif 'vectorized' in sys.argv[1:]:
+        measure_vectorized_huffman()
+    elif 'parallel-huffman' in sys.argv[1:]:
+        measure_parallel_huffman()
+    elif sys.argv[1:2] == ['benchmark']:
+        run_benchmarks(sys.argv[2:])
+    elif sys.argv[1:2] == ['profile']:
+        run_profiles(sys.argv[2:])
+    elif sys.argv[1:2] == ['compare']:
+        sys.exit(0 if compare_benchmarks(sys.argv[2:]) else 1)
+    else:
+        start_performance_tests()
@@ -0,0 +1,94 @@
+"""
+This module is used to encode and decode data in asyncio programs without blocking the event loop.
+The work is offloaded to an executor,
+which is the default thread pool of the event loop unless another one is given.
+A process pool keeps the event loop responsive even while the encoding holds the GIL,
+but the encoders, decoders and data have to be pickled to reach it.
+"""
+import asyncio
+from concurrent.futures import Executor
+from typing import Callable, Optional, TypeVar
+
+from compress.common import Decoder, Encoder
+from compress.common.stream import DEFAULT_BLOCK_SIZE, READ_SIZE, StreamDecoder, StreamEncoder
+
+_Result = TypeVar('_Result')
+
+
+async def encode(encoder: Encoder, data: bytes, *, executor: Optional[Executor] = None) -> bytes:
+    """
+    Encodes the data in the executor.
+    """
+    return await _run(executor, encoder.encode, data)
+
+
+async def decode(decoder: Decoder, data: bytes, *, executor: Optional[Executor] = None) -> bytes:
+    """
+    Decodes the data in the executor.
+    """
+    return await _run(executor, decoder.decode, data)
+
+
+async def compress_stream(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        encoder: Encoder,
+        *,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        executor: Optional[Executor] = None
+) -> int:
+    """
+    Compresses everything read from the reader into the writer block by block,
+    and returns the amount of bytes written.
+    The blocks are encoded in the executor, and the writer is drained after every block,
+    so a slow writer stops the reading instead of letting the output pile up in memory.
+    The writer is not closed.
+    """
+    stream_encoder = StreamEncoder(encoder, block_size)
+    written = 0
+    while True:
+        chunk = await reader.read(READ_SIZE)
+        blocks = stream_encoder.split(chunk) if chunk else stream_encoder.split_remaining()
+        for block in blocks:
+            encoded = await _run(executor, encoder.encode_block, block, stream_encoder.history)
+            written += await _write(writer, stream_encoder.write_block(block, encoded))
+        if not chunk:
+            return written + await _write(writer, stream_encoder.end())
+
+
+async def decompress_stream(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        decoder: Decoder,
+        *,
+        executor: Optional[Executor] = None
+) -> int:
+    """
+    Decompresses a stream read from the reader into the writer block by block,
+    and returns the amount of bytes written.
+    The blocks are decoded in the executor, and the writer is drained after every block.
+    Raises ValueError if the reader ends before the end of the compressed stream.
+    """
+    stream_decoder = StreamDecoder(decoder)
+    written = 0
+    while not stream_decoder.eof:
+        chunk = await reader.read(READ_SIZE)
+        if not chunk:
+            stream_decoder.flush()
+        for block in stream_decoder.split(chunk):
+            decoded = await _run(executor, decoder.decode_block, block, stream_decoder.history)
+            written += await _write(writer, stream_decoder.write_block(decoded))
+    return written
+
+
+async def _run(executor: Optional[Executor], function: Callable[..., _Result], *args) -> _Result:
+    return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+
+
+async def _write(writer: asyncio.StreamWriter, data: bytes) -> int:
+    """
+    Writes the data and waits until the writer is ready for more.
+    """
+    writer.write(data)
+    await writer.drain()
+    return len(data)
@@ -1,32 +1,157 @@
 """
 This module contains the base classes for the encoding algorithms.
 """
-from typing import Type
+from typing import BinaryIO, Iterable, Iterator, Optional, Type, Union
 
+from compress.common import batch, buffers, stats
+from compress.common.buffers import Buffer
+from compress.common.stats import Stats, StatsCallback
+from compress.common.stream import CompressedFile, StreamDecoder, StreamEncoder
 
-class Encoder:
+
+class _Instrumented:
+    """
+    Provides the opt-in stats of the encoders and decoders.
+    While the stats are disabled, the runs are given a shared stats object that does nothing.
+    """
+    last_stats: Optional[Stats] = None
+    _stats_callback: Optional[StatsCallback] = None
+    _collect_stats = False
+
+    def enable_stats(self, callback: Optional[StatsCallback] = None):
+        """
+        Starts collecting the stats of every run.
+        The stats of the latest run are kept in last_stats and passed to the callback.
+        """
+        self._collect_stats = True
+        self._stats_callback = callback
+
+    def disable_stats(self):
+        """
+        Stops collecting the stats.
+        """
+        self._collect_stats = False
+        self._stats_callback = None
+
+    def start_stats(self) -> Stats:
+        """
+        Returns the stats of a new run.
+        """
+        if not self._collect_stats:
+            return stats.DISABLED
+        return Stats(type(self).__name__)
+
+    def finish_stats(self, run_stats: Stats, bytes_in: int, bytes_out: int):
+        """
+        Records the sizes of a finished run and hands its stats over.
+        """
+        if not run_stats.enabled:
+            return
+        run_stats.count('bytes_in', bytes_in)
+        run_stats.count('bytes_out', bytes_out)
+        self.last_stats = run_stats
+        if self._stats_callback is not None:
+            self._stats_callback(run_stats)
+
+
+class Encoder(_Instrumented):
     """
     Class from which to inherit to implement an encoder.
     """
 
-    def encode(self, data: bytes) -> bytes:
+    def encode(self, data: Buffer) -> bytes:
         """
         Override this method to encode data.
+        The data may be any object supporting the buffer protocol.
         """
         raise NotImplementedError
 
+    def encode_buffer(self, data: Buffer) -> Buffer:
+        """
+        Encodes the data and returns the output in the buffer it was written into,
+        without copying it into bytes.
+        Override this method together with encode if the output is produced in a bytearray.
+        """
+        return self.encode(data)
+
+    def encode_into(self, data: Buffer, output: Buffer) -> int:
+        """
+        Encodes the data into the start of the writable output buffer
+        and returns the amount of bytes written.
+        Raises ValueError if the output buffer is too small.
+        By default the output is allocated as usual and then copied into the buffer,
+        override this method to write into the buffer directly.
+        """
+        return buffers.copy_into(self.encode_buffer(data), output)
 
-class Decoder:
+    def encode_many(self, items: Iterable[Buffer]) -> Iterator[bytes]:
+        """
+        Encodes every input and yields the results in order.
+        Override this method to reuse the buffers and tables of one input for the next.
+        """
+        return map(self.encode, items)
+
+    @property
+    def history_size(self) -> int:
+        """
+        The amount of earlier input a block of a stream may refer to.
+        """
+        return 0
+
+    def encode_block(self, data: bytes, _history: bytes) -> bytes:
+        """
+        Encodes a single block of a stream, the history holds the input preceding the block.
+        Override this method if the encoding can make use of the history,
+        by default the history is ignored and the block is encoded on its own.
+        """
+        return self.encode(data)
+
+
+class Decoder(_Instrumented):
     """
     Class from which to inherit to implement a decoder.
     """
 
-    def decode(self, data: bytes) -> bytes:
+    def decode(self, data: Buffer) -> bytes:
         """
         Override this method to decode data.
+        The data may be any object supporting the buffer protocol.
         """
         raise NotImplementedError
 
+    def decode_buffer(self, data: Buffer) -> Buffer:
+        """
+        Decodes the data and returns the output in the buffer it was written into,
+        without copying it into bytes.
+        Override this method together with decode if the output is produced in a bytearray.
+        """
+        return self.decode(data)
+
+    def decode_into(self, data: Buffer, output: Buffer) -> int:
+        """
+        Decodes the data into the start of the writable output buffer
+        and returns the amount of bytes written.
+        Raises ValueError if the output buffer is too small.
+        By default the output is allocated as usual and then copied into the buffer,
+        override this method to write into the buffer directly.
+        """
+        return buffers.copy_into(self.decode_buffer(data), output)
+
+    def decode_many(self, items: Iterable[Buffer]) -> Iterator[bytes]:
+        """
+        Decodes every input and yields the results in order.
+        Override this method to reuse the buffers and tables of one input for the next.
+        """
+        return map(self.decode, items)
+
+    def decode_block(self, data: bytes, _history: bytes) -> bytes:
+        """
+        Decodes a single block of a stream, the history holds the output preceding the block.
+        Override this method together with Encoder.encode_block,
+        by default the history is ignored and the block is decoded on its own.
+        """
+        return self.decode(data)
+
 
 class CompressionAlgorithm:
     """
@@ -46,3 +171,78 @@ class CompressionAlgorithm:
         Returns the decoder as a type
         """
         raise NotImplementedError
+
+    @classmethod
+    def compressobj(cls, **options) -> StreamEncoder:
+        """
+        Returns an object compressing the data fed to it in chunks.
+        The options are passed on to the encoder.
+        """
+        return StreamEncoder(cls.get_encoder()(**options))
+
+    @classmethod
+    def decompressobj(cls, **options) -> StreamDecoder:
+        """
+        Returns an object decompressing the data fed to it in chunks.
+        The options are passed on to the decoder.
+        """
+        return StreamDecoder(cls.get_decoder()(**options))
+
+    @classmethod
+    def open(cls, file: Union[str, BinaryIO], mode: str = 'rb', **options) -> CompressedFile:
+        """
+        Opens a compressed file for reading or writing as a file object.
+        The options are passed on to the encoder when writing and to the decoder when reading.
+        """
+        stream = cls.compressobj(**options) if 'w' in mode else cls.decompressobj(**options)
+        return CompressedFile(file, mode, stream)
+
+    @classmethod
+    def train(cls, _samples: Iterable[bytes]) -> dict:
+        """
+        Builds a model shared by many small inputs out of the samples.
+        Returns the options passing the model to both the encoder and the decoder,
+        or no options if the algorithm has no shared model, in which case the samples are ignored.
+        """
+        return {}
+
+    @classmethod
+    def encode_many(
+            cls,
+            items: Iterable[bytes],
+            *,
+            workers: int = 1,
+            chunk_size: int = batch.DEFAULT_CHUNK_SIZE,
+            **options
+    ) -> Iterator[bytes]:
+        """
+        Encodes many inputs with a single encoder and yields the results in order.
+        The options are passed on to the encoder, for example the options returned by train.
+        """
+        return batch.encode_many(
+            cls.get_encoder()(**options),
+            items,
+            workers=workers,
+            chunk_size=chunk_size
+        )
+
+    @classmethod
+    def decode_many(
+            cls,
+            items: Iterable[bytes],
+            *,
+            workers: int = 1,
+            chunk_size: int = batch.DEFAULT_CHUNK_SIZE,
+            **options
+    ) -> Iterator[bytes]:
+        """
+        Decodes many inputs with a single decoder and yields the results in order.
+        The options are passed on to the decoder,
+        they have to hold the same model as the options of the encoder.
+        """
+        return batch.decode_many(
+            cls.get_decoder()(**options),
+            items,
+            workers=workers,
+            chunk_size=chunk_size
+        )
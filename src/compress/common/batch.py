@@ -0,0 +1,89 @@
+"""
+This module is used to encode and decode many small inputs in a single call.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from compress.common import pool
+
+if TYPE_CHECKING:
+    from compress.common import Decoder, Encoder
+
+DEFAULT_CHUNK_SIZE = 1024
+"""
+The amount of inputs handed to a worker process at a time.
+"""
+
+
+def encode_many(
+        encoder: 'Encoder',
+        items: Iterable[bytes],
+        *,
+        workers: int = 1,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Encodes every input with the same encoder and yields the results in order.
+    With several workers the inputs are encoded in chunks in a pool of worker processes.
+    """
+    return _map(encoder, 'encode_many', items, workers, chunk_size)
+
+
+def decode_many(
+        decoder: 'Decoder',
+        items: Iterable[bytes],
+        *,
+        workers: int = 1,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Decodes every input with the same decoder and yields the results in order.
+    With several workers the inputs are decoded in chunks in a pool of worker processes.
+    """
+    return _map(decoder, 'decode_many', items, workers, chunk_size)
+
+
+def _map(
+        coder: object,
+        method: str,
+        items: Iterable[bytes],
+        workers: int,
+        chunk_size: int
+) -> Iterator[bytes]:
+    """
+    Validates the arguments right away, the inputs are only consumed as the results are iterated.
+    The inputs are handed to the batch method of the coder, which reuses its buffers and tables.
+    """
+    if workers < 1:
+        raise ValueError('There must be at least one worker')
+    if chunk_size < 1:
+        raise ValueError('Chunk size must be at least one')
+    if workers == 1:
+        return getattr(coder, method)(items)
+    return _map_parallel(coder, method, items, workers, chunk_size)
+
+
+def _map_parallel(
+        coder: object,
+        method: str,
+        items: Iterable[bytes],
+        workers: int,
+        chunk_size: int
+) -> Iterator[bytes]:
+    """
+    Hands the chunks to the pool, at most two chunks per worker are in flight at the same time.
+    """
+    iterator = iter(items)
+    chunks = iter(lambda: list(islice(iterator, chunk_size)), [])
+    arguments = ((coder, method, chunk) for chunk in chunks)
+    with ProcessPoolExecutor(workers) as executor:
+        for results in pool.ordered_map(executor, _run_chunk, arguments, 2 * workers):
+            yield from results
+
+
+def _run_chunk(coder: object, method: str, chunk: list[bytes]) -> list[bytes]:
+    """
+    Encodes or decodes a chunk of inputs in a worker process.
+    """
+    return list(getattr(coder, method)(chunk))
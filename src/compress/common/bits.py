@@ -0,0 +1,187 @@
+"""
+This module is used to write and read fields of any bit width.
+Bits are packed most significant bit first.
+"""
+from typing import Sequence
+
+_FLUSH_BITS = 64
+_REFILL_BYTES = 8
+_CODE_CHUNK = 1 << 16
+
+
+class BitWriter:
+    """
+    Collects bit fields into bytes.
+    The fields are accumulated into an integer and flushed into the output as whole bytes.
+    """
+
+    def __init__(self):
+        self._output = bytearray()
+        self._bit_buffer = 0
+        self._bit_count = 0
+
+    def write_bits(self, value: int, bit_count: int):
+        """
+        Writes the lowest bits of the value.
+        """
+        self._bit_buffer = (self._bit_buffer << bit_count) | value
+        self._bit_count += bit_count
+        if self._bit_count >= _FLUSH_BITS:
+            self._flush()
+
+    def write_bytes(self, data: bytes):
+        """
+        Writes whole bytes.
+        """
+        if not self._bit_count:
+            self._output += data
+        elif data:
+            self.write_bits(int.from_bytes(data, 'big'), 8 * len(data))
+
+    def write_codes(self, symbols: bytes, codes: Sequence[str]):
+        """
+        Writes the code of each symbol,
+        the codes are given as strings of ones and zeros indexed by the symbol.
+        The codes are joined into long strings and converted in chunks,
+        instead of writing them one at a time.
+        """
+        lookup = codes.__getitem__
+        for start in range(0, len(symbols), _CODE_CHUNK):
+            bits = ''.join(map(lookup, symbols[start: start + _CODE_CHUNK]))
+            if bits:
+                self.write_bits(int(bits, 2), len(bits))
+
+    def clear(self):
+        """
+        Empties the writer so that it can be reused for another output.
+        The buffer returned by getbuffer is emptied as well.
+        """
+        self._output.clear()
+        self._bit_buffer = 0
+        self._bit_count = 0
+
+    def align(self):
+        """
+        Pads the output with zero bits up to the next byte boundary.
+        """
+        padding = -self._bit_count % 8
+        if padding:
+            self.write_bits(0, padding)
+        self._flush()
+
+    def getvalue(self) -> bytes:
+        """
+        Pads the output to the next byte boundary and returns the bytes written so far.
+        """
+        return bytes(self.getbuffer())
+
+    def getbuffer(self) -> bytearray:
+        """
+        Pads the output to the next byte boundary
+        and returns the buffer holding the bytes written so far.
+        The buffer is not copied, so it changes if more bits are written.
+        """
+        self.align()
+        return self._output
+
+    @property
+    def bit_length(self) -> int:
+        """
+        The amount of bits written so far.
+        """
+        return 8 * len(self._output) + self._bit_count
+
+    def _flush(self):
+        """
+        Moves the whole bytes from the bit buffer into the output.
+        """
+        remainder = self._bit_count % 8
+        byte_count = self._bit_count // 8
+        if byte_count:
+            self._output += (self._bit_buffer >> remainder).to_bytes(byte_count, 'big')
+            self._bit_buffer &= (1 << remainder) - 1
+            self._bit_count = remainder
+
+
+class BitReader:
+    """
+    Reads bit fields from bytes.
+    The input is loaded into an integer several bytes at a time,
+    reading past the end gives zero bits.
+    """
+
+    def __init__(self, data: bytes, offset: int = 0):
+        self._data = memoryview(data)
+        self._position = offset
+        self._bit_buffer = 0
+        self._bit_count = 0
+
+    def read_bits(self, bit_count: int) -> int:
+        """
+        Reads a field of the given width.
+        """
+        if self._bit_count < bit_count:
+            self._refill(bit_count)
+        self._bit_count -= bit_count
+        return (self._bit_buffer >> self._bit_count) & ((1 << bit_count) - 1)
+
+    def peek_bits(self, bit_count: int) -> int:
+        """
+        Returns the next field of the given width without consuming it.
+        Used by table decoders that only know the width of a code after looking it up.
+        """
+        if self._bit_count < bit_count:
+            self._refill(bit_count)
+        return (self._bit_buffer >> (self._bit_count - bit_count)) & ((1 << bit_count) - 1)
+
+    def consume(self, bit_count: int):
+        """
+        Skips bits that have already been peeked.
+        """
+        self._bit_count -= bit_count
+
+    def read_bytes(self, byte_count: int) -> bytes:
+        """
+        Reads whole bytes.
+        """
+        if not self._bit_count % 8:
+            self._position -= self._bit_count // 8
+            self._bit_buffer = 0
+            self._bit_count = 0
+            data = bytes(self._data[self._position: self._position + byte_count])
+            self._position += byte_count
+            return data
+        return self.read_bits(8 * byte_count).to_bytes(byte_count, 'big')
+
+    def align(self):
+        """
+        Skips the bits up to the next byte boundary.
+        """
+        self._bit_count -= self._bit_count % 8
+
+    @property
+    def bits_remaining(self) -> int:
+        """
+        The amount of bits left in the input.
+        """
+        return 8 * (len(self._data) - self._position) + self._bit_count
+
+    @property
+    def byte_position(self) -> int:
+        """
+        The offset of the byte holding the next bit to read.
+        """
+        return self._position - self._bit_count // 8
+
+    def _refill(self, bit_count: int):
+        """
+        Loads bytes from the input until the bit buffer holds at least the given amount of bits.
+        """
+        needed = max(_REFILL_BYTES, (bit_count - self._bit_count + 7) // 8)
+        chunk = self._data[self._position: self._position + needed]
+        self._bit_buffer = (
+            ((self._bit_buffer & ((1 << self._bit_count) - 1)) << 8 * needed)
+            | (int.from_bytes(chunk, 'big') << 8 * (needed - len(chunk)))
+        )
+        self._position += needed
+        self._bit_count += 8 * needed
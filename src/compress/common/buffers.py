@@ -0,0 +1,40 @@
+"""
+This module is used to accept any object supporting the buffer protocol as input
+and to write output into buffers.
+"""
+from typing import Union
+
+Buffer = Union[bytes, bytearray, memoryview]
+"""
+Any object supporting the buffer protocol, such as bytes, bytearray, memoryview, mmap or array.
+"""
+
+
+def byte_view(data: Buffer) -> Union[bytes, memoryview]:
+    """
+    Returns bytes as they are and other buffers as a memoryview of unsigned bytes,
+    without copying the data.
+    """
+    if isinstance(data, bytes):
+        return data
+    view = memoryview(data)
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    return view
+
+
+def copy_into(data: Buffer, output: Buffer) -> int:
+    """
+    Copies the data to the start of the writable output buffer
+    and returns the amount of bytes copied.
+    Raises ValueError if the output buffer is too small.
+    """
+    source = byte_view(data)
+    with memoryview(output) as view, view.cast('B') as output_view:
+        if len(source) > len(output_view):
+            raise ValueError(
+                f'The output buffer holds {len(output_view)} bytes, '
+                f'but {len(source)} bytes were produced'
+            )
+        output_view[:len(source)] = source
+    return len(source)
@@ -37,3 +37,32 @@ def bytes_to_char_int(char_bytes: bytes):
     Converts a byte code to a character code.
     """
     return int.from_bytes(char_bytes, byteorder='big', signed=False)
+
+
+def int_to_varint(num: int) -> bytes:
+    """
+    Converts a non-negative integer to a variable length byte sequence.
+    Each byte carries seven bits of the value, the highest bit tells whether more bytes follow.
+    """
+    output = bytearray()
+    while num > 0x7F:
+        output.append((num & 0x7F) | 0x80)
+        num >>= 7
+    output.append(num)
+    return bytes(output)
+
+
+def varint_to_int(data: bytes, offset: int = 0) -> tuple[int, int]:
+    """
+    Converts a variable length byte sequence starting at the offset to integer.
+    Returns the integer and the offset of the first byte after the sequence.
+    """
+    num = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        num |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return num, offset
+        shift += 7
@@ -1,8 +1,12 @@
 """
 This module is used to read and write files.
 """
+import io
+import mmap
 import os
-from typing import Optional
+import traceback
+from contextlib import contextmanager
+from typing import BinaryIO, ContextManager, Iterable, Iterator, Optional, Union
 
 
 def read_file(file_path: str) -> Optional[bytes]:
@@ -17,8 +21,135 @@ def write_file(file_path: str, data: bytes):
     """
     This function is used to write files.
     """
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    with open(file_path, 'xb') as file:
-        file.seek(0)
+    with create_file(file_path) as file:
         file.write(data)
     return file_path
+
+
+def create_file(file_path: str, mode: str = 'xb') -> BinaryIO:
+    """
+    Creates a new file and its directories, and opens it for writing.
+    Raises FileExistsError if the file already exists.
+    """
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return open(file_path, mode)
+
+
+def new_file(file_path: str, *, overwrite: bool = False) -> ContextManager[BinaryIO]:
+    """
+    Creates a new file for writing, to be used in a with statement.
+    The file is removed if an error is raised before it is closed.
+    """
+    return _removed_on_error(file_path, 'wb' if overwrite else 'xb')
+
+
+def write_chunks(file_path: str, chunks: Iterable[bytes], *, overwrite: bool = False) -> str:
+    """
+    Writes the chunks into a new file as they are produced,
+    so the whole output is never held in memory.
+    The file is removed if producing the chunks fails.
+    """
+    with new_file(file_path, overwrite=overwrite) as file:
+        for chunk in chunks:
+            file.write(chunk)
+    return file_path
+
+
+@contextmanager
+def mapped_file(file_path: str) -> Iterator[Union[mmap.mmap, bytes]]:
+    """
+    Memory-maps a file for reading without copying it into memory.
+    The map can be read like a file
+    or wrapped in a memoryview to pass it to the encoders and decoders,
+    the memoryview has to be released before the map is closed.
+    Empty files cannot be mapped, so they are given as empty bytes instead.
+    If an error is raised while the map is open,
+    the local variables of the frames in its traceback are cleared,
+    since memoryviews left in them would keep the map from closing.
+    """
+    with open(file_path, 'rb') as file:
+        if not os.fstat(file.fileno()).st_size:
+            yield b''
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            try:
+                yield mapped
+            except BaseException as error:
+                traceback.clear_frames(error.__traceback__)
+                raise
+
+
+@contextmanager
+def mapped_output(
+        file_path: str,
+        size: int,
+        *,
+        overwrite: bool = False
+) -> Iterator[Union[mmap.mmap, bytearray]]:
+    """
+    Creates a new file of the given size and memory-maps it for writing.
+    Used when the size of the output is known in advance, so the output is written in place.
+    The file is removed if an error is raised before the output is complete.
+    """
+    with _removed_on_error(file_path, 'w+b' if overwrite else 'x+b') as file:
+        if not size:
+            yield bytearray()
+            return
+        file.truncate(size)
+        with mmap.mmap(file.fileno(), size, access=mmap.ACCESS_WRITE) as mapped:
+            try:
+                yield mapped
+            except BaseException as error:
+                traceback.clear_frames(error.__traceback__)
+                raise
+
+
+@contextmanager
+def _removed_on_error(file_path: str, mode: str) -> Iterator[BinaryIO]:
+    """
+    Creates a file for writing and removes it if an error is raised before it is closed,
+    so that a failed run does not leave an incomplete file behind.
+    A file that already exists is not touched unless the mode overwrites it.
+    """
+    file = create_file(file_path, mode)
+    try:
+        with file:
+            yield file
+    except BaseException:
+        os.remove(file_path)
+        raise
+
+
+def peek_stream(stream: BinaryIO, size: int) -> tuple[bytes, BinaryIO]:
+    """
+    Reads the first bytes of a stream that cannot seek, such as the standard input.
+    Returns the bytes and a stream that still starts with them.
+    """
+    head = stream.read(size)
+    return head, io.BufferedReader(_PrefixedStream(head, stream))
+
+
+class _PrefixedStream(io.RawIOBase):
+    """
+    Reads the given prefix before the rest of the stream.
+    """
+
+    def __init__(self, prefix: bytes, stream: BinaryIO):
+        super().__init__()
+        self._prefix = prefix
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._prefix:
+            size = min(len(buffer), len(self._prefix))
+            buffer[:size] = self._prefix[:size]
+            self._prefix = self._prefix[size:]
+            return size
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
@@ -0,0 +1,60 @@
+"""
+This module is used to run calls in a pool of worker processes while keeping their results in order.
+"""
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Callable, Generic, Iterable, Iterator, Optional, TypeVar
+
+_Result = TypeVar('_Result')
+
+
+class OrderedCalls(Generic[_Result]):
+    """
+    Submits calls to an executor and hands back their results in the order of the calls.
+    At most the given amount of calls are in flight at the same time,
+    so only a bounded amount of inputs and results are held in memory.
+    """
+
+    def __init__(self, executor: Executor, in_flight: int):
+        self.executor = executor
+        self._in_flight = in_flight
+        self._pending: deque[Future] = deque()
+
+    def submit(self, function: Callable[..., _Result], *arguments) -> list[_Result]:
+        """
+        Submits a call and returns the results of the oldest calls
+        it had to wait for to stay within the limit.
+        """
+        self._pending.append(self.executor.submit(function, *arguments))
+        results = []
+        while len(self._pending) >= self._in_flight:
+            results.append(self._pending.popleft().result())
+        return results
+
+    def results(self) -> Iterator[_Result]:
+        """
+        Waits for the calls still in flight and yields their results.
+        """
+        while self._pending:
+            yield self._pending.popleft().result()
+
+
+def ordered_map(
+        executor: Optional[Executor],
+        function: Callable[..., _Result],
+        arguments: Iterable[tuple],
+        in_flight: int
+) -> Iterator[_Result]:
+    """
+    Calls the function with each tuple of arguments and yields the results in order.
+    With an executor at most the given amount of calls are in flight at the same time,
+    otherwise the function is called in this process.
+    """
+    if executor is None:
+        for argument_tuple in arguments:
+            yield function(*argument_tuple)
+        return
+    calls = OrderedCalls(executor, in_flight)
+    for argument_tuple in arguments:
+        yield from calls.submit(function, *argument_tuple)
+    yield from calls.results()
@@ -0,0 +1,68 @@
+"""
+This module is used to collect timings and counters from the encoding and decoding runs.
+"""
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Iterator
+
+
+class Stats:
+    """
+    Collects the time spent in each stage of a single run and the counters describing it.
+    """
+    enabled = True
+
+    def __init__(self, name: str):
+        self.name = name
+        self.timings: dict[str, float] = {}
+        self.counters: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, stage_name: str) -> Iterator[None]:
+        """
+        Measures the time spent inside the with-block, repeated stages are summed.
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start_time
+            self.timings[stage_name] = self.timings.get(stage_name, 0.0) + elapsed
+
+    def count(self, counter_name: str, amount: float = 1):
+        """
+        Adds to a counter.
+        """
+        self.counters[counter_name] = self.counters.get(counter_name, 0) + amount
+
+    def as_dict(self) -> dict:
+        """
+        Returns the stats in a form that can be serialised, for example into JSON.
+        """
+        return {
+            'name': self.name,
+            'timings': dict(self.timings),
+            'counters': dict(self.counters),
+        }
+
+
+class _DisabledStats(Stats):
+    """
+    Used when the stats are not collected, every operation does nothing.
+    """
+    enabled = False
+    _NO_STAGE = nullcontext()
+
+    def stage(self, stage_name: str) -> ContextManager[None]:
+        return self._NO_STAGE
+
+    def count(self, counter_name: str, amount: float = 1):
+        pass
+
+
+DISABLED = _DisabledStats('disabled')
+"""
+Shared by all the runs that do not collect stats.
+"""
+
+StatsCallback = Callable[[Stats], None]
@@ -0,0 +1,272 @@
+"""
+This module is used to compress and decompress data incrementally,
+without holding all of it in memory.
+The input is split into blocks that are encoded one at a time.
+A stream starts with the size of the history the blocks may refer to,
+every block is prefixed with its encoded size, and an empty block ends the stream.
+"""
+import builtins
+import io
+from typing import TYPE_CHECKING, BinaryIO, Optional, Union
+
+from compress.common import convert
+
+if TYPE_CHECKING:
+    from compress.common import Decoder, Encoder
+
+DEFAULT_BLOCK_SIZE = 1 << 20
+"""
+The amount of input bytes encoded together as a single block.
+"""
+READ_SIZE = 1 << 16
+_END_OF_STREAM = convert.int_to_varint(0)
+
+
+class StreamEncoder:
+    """
+    Compresses the data fed to it in chunks.
+    Only the current block and the history preceding it are kept in memory.
+    """
+
+    def __init__(self, encoder: 'Encoder', block_size: int = DEFAULT_BLOCK_SIZE):
+        if block_size <= 0:
+            raise ValueError('Block size must be positive')
+        self._encoder = encoder
+        self._block_size = block_size
+        self._history_size = encoder.history_size
+        self._history = b''
+        self._buffer = bytearray()
+        self._started = False
+        self._finished = False
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        Feeds a chunk of input to the encoder.
+        Returns the compressed bytes of the blocks completed so far.
+        """
+        output = bytearray()
+        for block in self.split(data):
+            output += self.write_block(block, self._encoder.encode_block(block, self.history))
+        return bytes(output)
+
+    def flush(self) -> bytes:
+        """
+        Encodes the remaining input and ends the stream.
+        """
+        if self._finished:
+            return b''
+        output = bytearray()
+        for block in self.split_remaining():
+            output += self.write_block(block, self._encoder.encode_block(block, self.history))
+        return bytes(output + self.end())
+
+    @property
+    def history(self) -> bytes:
+        """
+        The input preceding the next block.
+        """
+        return self._history
+
+    def split(self, data: bytes) -> list[bytes]:
+        """
+        Buffers a chunk of input and returns the blocks completed by it.
+        The blocks have to be encoded and written in order with write_block.
+        """
+        if self._finished:
+            raise ValueError('The stream has already been flushed')
+        self._buffer += data
+        blocks = []
+        block_size = self._block_size
+        while len(self._buffer) >= block_size:
+            blocks.append(bytes(self._buffer[:block_size]))
+            del self._buffer[:block_size]
+        return blocks
+
+    def split_remaining(self) -> list[bytes]:
+        """
+        Returns the last partial block, if there is one.
+        """
+        blocks = [bytes(self._buffer)] if self._buffer else []
+        self._buffer.clear()
+        return blocks
+
+    def write_block(self, block: bytes, encoded: bytes) -> bytes:
+        """
+        Returns the encoded block prefixed with its size,
+        and remembers the end of the block as the history of the next block.
+        The encoded block has to be encoded with the history preceding the block.
+        """
+        if self._history_size:
+            self._history = (self._history + block)[-self._history_size:]
+        return self._start() + convert.int_to_varint(len(encoded)) + encoded
+
+    def end(self) -> bytes:
+        """
+        Returns the end of the stream.
+        """
+        self._finished = True
+        return self._start() + _END_OF_STREAM
+
+    def _start(self) -> bytes:
+        """
+        Returns the stream header the first time it is called.
+        """
+        if self._started:
+            return b''
+        self._started = True
+        return convert.int_to_varint(self._history_size)
+
+
+class StreamDecoder:
+    """
+    Decompresses the data fed to it in chunks.
+    Only the current block and the history preceding it are kept in memory.
+    """
+
+    def __init__(self, decoder: 'Decoder'):
+        self._decoder = decoder
+        self._history_size: Optional[int] = None
+        self._history = b''
+        self._buffer = bytearray()
+        self.eof = False
+        self.unused_data = b''
+
+    def decompress(self, data: bytes) -> bytes:
+        """
+        Feeds a chunk of compressed input to the decoder.
+        Returns the decompressed bytes of the blocks completed so far.
+        """
+        output = bytearray()
+        for block in self.split(data):
+            output += self.write_block(self._decoder.decode_block(block, self.history))
+        return bytes(output)
+
+    def flush(self) -> bytes:
+        """
+        Checks that the whole stream has been decompressed.
+        """
+        if not self.eof:
+            raise ValueError('The compressed stream ended before its last block')
+        return b''
+
+    @property
+    def history(self) -> bytes:
+        """
+        The output preceding the next block.
+        """
+        return self._history
+
+    def split(self, data: bytes) -> list[bytes]:
+        """
+        Buffers a chunk of compressed input and returns the encoded blocks completed by it.
+        The blocks have to be decoded and written in order with write_block.
+        """
+        if self.eof:
+            self.unused_data += data
+            return []
+        self._buffer += data
+        blocks = []
+        if self._history_size is None:
+            header = _read_varint(self._buffer)
+            if header is None:
+                return blocks
+            self._history_size, header_end = header
+            del self._buffer[:header_end]
+        while True:
+            block_header = _read_varint(self._buffer)
+            if block_header is None:
+                break
+            block_length, block_start = block_header
+            if not block_length:
+                self.eof = True
+                self.unused_data = bytes(self._buffer[block_start:])
+                self._buffer.clear()
+                break
+            block_end = block_start + block_length
+            if len(self._buffer) < block_end:
+                break
+            blocks.append(bytes(self._buffer[block_start: block_end]))
+            del self._buffer[:block_end]
+        return blocks
+
+    def write_block(self, decoded: bytes) -> bytes:
+        """
+        Remembers the end of a decoded block as the history of the next block and returns the block.
+        """
+        if self._history_size:
+            self._history = (self._history + decoded)[-self._history_size:]
+        return decoded
+
+
+def _read_varint(buffer: bytearray) -> Optional[tuple[int, int]]:
+    """
+    Reads a variable length integer from the start of the buffer.
+    Returns None if the buffer does not hold the whole integer yet.
+    """
+    for index, byte in enumerate(buffer):
+        if byte < 0x80:
+            return convert.varint_to_int(buffer, 0)
+        if index > 9:
+            raise ValueError('Invalid block size in the input data')
+    return None
+
+
+class CompressedFile(io.BufferedIOBase):
+    """
+    File object writing the data through a stream encoder or reading it through a stream decoder.
+    """
+
+    def __init__(
+            self,
+            file: Union[str, BinaryIO],
+            mode: str,
+            stream: Union[StreamEncoder, StreamDecoder]
+    ):
+        super().__init__()
+        if mode not in ('r', 'rb', 'w', 'wb'):
+            raise ValueError(f'Invalid mode: {mode}')
+        self._mode = mode
+        self._stream = stream
+        self._owns_file = isinstance(file, str)
+        self._file = builtins.open(file, mode[0] + 'b') if self._owns_file else file
+        self._decoded = bytearray()
+
+    def readable(self) -> bool:
+        return 'r' in self._mode
+
+    def writable(self) -> bool:
+        return 'w' in self._mode
+
+    def write(self, data: bytes) -> int:
+        if not self.writable():
+            raise io.UnsupportedOperation('File not open for writing')
+        self._file.write(self._stream.compress(data))
+        return len(data)
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        if not self.readable():
+            raise io.UnsupportedOperation('File not open for reading')
+        while (size is None or size < 0 or len(self._decoded) < size) and not self._stream.eof:
+            chunk = self._file.read(READ_SIZE)
+            if not chunk:
+                self._stream.flush()
+            self._decoded += self._stream.decompress(chunk)
+        if size is None or size < 0:
+            size = len(self._decoded)
+        data = bytes(self._decoded[:size])
+        del self._decoded[:size]
+        return data
+
+    def read1(self, size: Optional[int] = -1) -> bytes:
+        return self.read(size)
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self.writable():
+                self._file.write(self._stream.flush())
+        finally:
+            if self._owns_file:
+                self._file.close()
+            super().close()
@@ -0,0 +1,457 @@
+"""
+This module is used to store the output of any of the algorithms in a self-describing container.
+The container starts with a magic number, the format version, the algorithm id,
+flags and the block size.
+The input is split into blocks that are encoded independently of each other,
+every block is stored with its original size, its encoded size
+and a CRC-32 checksum of the original data.
+Blocks that would not shrink are stored as they are,
+which is told by the encoded size being equal to the original size.
+A block with the original size of zero ends the container.
+It can be followed by an index holding the position of every block,
+which allows decoding only a part of the data.
+Since the blocks are independent,
+they can be encoded and decoded in parallel by a pool of worker processes.
+"""
+import bisect
+import io
+import math
+import mmap
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterator, Optional, Type
+
+from compress.common import CompressionAlgorithm, Decoder, Encoder, convert, pool
+from compress.common.buffers import Buffer
+from compress.hlz import HLZ
+from compress.huffman import Huffman
+from compress.lz import LZ
+from compress.lzh import LZH
+
+MAGIC = b'DCMP'
+DEFAULT_BLOCK_SIZE = 1 << 20
+MAX_BLOCK_SIZE = (1 << 32) - 1
+"""
+The Huffman encoder stores the block size in 32 bits,
+the container itself has no limit on the total size.
+"""
+FLAG_CHECKSUMS = 0x01
+FLAG_INDEX = 0x02
+INDEX_MAGIC = b'DIDX'
+
+_FORMAT_VERSION = 1
+_CHECKSUM_BYTES = 4
+_INDEX_OFFSET_BYTES = 8
+_INCOMPRESSIBLE_ENTROPY = 7.9
+"""
+The entropy in bits per byte above which a block is stored without trying to encode it.
+"""
+_ENTROPY_SAMPLES = 16
+_ENTROPY_SAMPLE_SIZE = 4096
+
+ALGORITHM_IDS: dict[int, Type[CompressionAlgorithm]] = {
+    1: LZ,
+    2: Huffman,
+    3: LZH,
+    4: HLZ,
+}
+
+
+def algorithm_id(algorithm: Type[CompressionAlgorithm]) -> int:
+    """
+    Returns the id the algorithm is stored with in the container.
+    """
+    for identifier, known_algorithm in ALGORITHM_IDS.items():
+        if known_algorithm is algorithm:
+            return identifier
+    raise ValueError(f'Algorithm {algorithm.__name__} cannot be stored in a container')
+
+
+def is_container(data: bytes) -> bool:
+    """
+    Tells whether the data starts with the magic number of the container.
+    """
+    return data[:len(MAGIC)] == MAGIC
+
+
+def compress(
+        data: bytes,
+        algorithm: Type[CompressionAlgorithm],
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        *,
+        workers: int = 1,
+        **options
+) -> bytes:
+    """
+    Compresses the data into a container with the given algorithm.
+    The blocks are encoded by the given amount of worker processes,
+    and the options are passed on to the encoder.
+    """
+    output = io.BytesIO()
+    with ContainerWriter(output, algorithm, block_size, workers=workers, **options) as writer:
+        writer.write(data)
+    return output.getvalue()
+
+
+def decompress(data: bytes, *, workers: int = 1, **options) -> bytes:
+    """
+    Decompresses a container, the algorithm is read from the container.
+    The blocks are decoded by the given amount of worker processes,
+    and the options are passed on to the decoder.
+    """
+    return ContainerReader(io.BytesIO(data), workers=workers, **options).read()
+
+
+def read_range(file_path: str, offset: int, length: int, **options) -> bytes:
+    """
+    Decompresses the given range of the original data from a container file.
+    The file is memory-mapped and only the blocks covering the range are read and decoded.
+    The options are passed on to the decoder.
+    """
+    with open(file_path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            return ContainerReader(mapped_file, **options).read_range(offset, length)
+
+
+class ContainerWriter:
+    """
+    Writes the data into a container block by block.
+    With a single worker only one block is held in memory,
+    otherwise at most two blocks per worker are being encoded at the same time.
+    """
+
+    def __init__(
+            self,
+            file: BinaryIO,
+            algorithm: Type[CompressionAlgorithm],
+            block_size: int = DEFAULT_BLOCK_SIZE,
+            *,
+            checksums: bool = True,
+            index: bool = True,
+            workers: int = 1,
+            **options
+    ):
+        if not 0 < block_size <= MAX_BLOCK_SIZE:
+            raise ValueError(f'Block size must be between 1 and {MAX_BLOCK_SIZE}')
+        if workers < 1:
+            raise ValueError('There must be at least one worker')
+        self._file = file
+        self._encoder = algorithm.get_encoder()(**options)
+        self._block_size = block_size
+        self._flags = (FLAG_CHECKSUMS if checksums else 0) | (FLAG_INDEX if index else 0)
+        self._index: list[tuple[int, int]] = []
+        self._position = 0
+        self._workers = workers
+        self._calls: Optional[pool.OrderedCalls] = None
+        self._buffer = bytearray()
+        self._closed = False
+        self.write_header(algorithm_id(algorithm))
+
+    def write_header(self, identifier: int):
+        """
+        Writes the magic number, the format version, the algorithm id, the flags and the block size.
+        """
+        self._write(
+            MAGIC
+            + bytes((_FORMAT_VERSION, identifier, self._flags))
+            + convert.int_to_varint(self._block_size)
+        )
+
+    def write(self, data: bytes) -> int:
+        """
+        Adds data to the container, every full block is encoded and written right away.
+        The blocks are sliced straight from the data,
+        only the last partial block is copied into the buffer.
+        """
+        if self._closed:
+            raise ValueError('The container has already been closed')
+        block_size = self._block_size
+        with memoryview(data) as view:
+            start = 0
+            if self._buffer:
+                start = block_size - len(self._buffer)
+                self._buffer += view[:start]
+                if len(self._buffer) < block_size:
+                    return len(view)
+                self.write_block(bytes(self._buffer))
+                self._buffer.clear()
+            while len(view) - start >= block_size:
+                self.write_block(bytes(view[start: start + block_size]))
+                start += block_size
+            self._buffer += view[start:]
+            return len(view)
+
+    def write_block(self, block: bytes):
+        """
+        Encodes a single block and writes it with its sizes and checksum.
+        With several workers the block is handed to the pool
+        and written once the blocks before it are written.
+        """
+        if self._workers == 1:
+            self._write_encoded(*_encode_block(self._encoder, block))
+            return
+        if self._calls is None:
+            self._calls = pool.OrderedCalls(ProcessPoolExecutor(self._workers), 2 * self._workers)
+        for encoded_block in self._calls.submit(_encode_block, self._encoder, block):
+            self._write_encoded(*encoded_block)
+
+    def _write_encoded(self, block_size: int, encoded: bytes, checksum: int):
+        """
+        Writes an encoded block with its sizes and checksum.
+        """
+        self._index.append((self._position, block_size))
+        self._write(convert.int_to_varint(block_size) + convert.int_to_varint(len(encoded)))
+        self._write(encoded)
+        if self._flags & FLAG_CHECKSUMS:
+            self._write(checksum.to_bytes(_CHECKSUM_BYTES, 'big'))
+
+    def write_index(self):
+        """
+        Writes the position and the original size of every block after the end of the container.
+        The index is followed by its own position and a magic number,
+        so it can be found from the end of the file.
+        """
+        index_position = self._position
+        output = bytearray(convert.int_to_varint(len(self._index)))
+        for position, block_size in self._index:
+            output += convert.int_to_varint(position) + convert.int_to_varint(block_size)
+        output += index_position.to_bytes(_INDEX_OFFSET_BYTES, 'big') + INDEX_MAGIC
+        self._write(bytes(output))
+
+    def _write(self, data: bytes):
+        """
+        Writes to the file and keeps track of the position in the container.
+        """
+        self._file.write(data)
+        self._position += len(data)
+
+    def close(self):
+        """
+        Writes the last partial block and the end of the container.
+        The underlying file is left open.
+        """
+        if self._closed:
+            return
+        try:
+            if self._buffer:
+                self.write_block(bytes(self._buffer))
+                self._buffer.clear()
+            if self._calls is not None:
+                for encoded_block in self._calls.results():
+                    self._write_encoded(*encoded_block)
+            self._write(convert.int_to_varint(0))
+            if self._flags & FLAG_INDEX:
+                self.write_index()
+        finally:
+            if self._calls is not None:
+                self._calls.executor.shutdown(cancel_futures=True)
+            self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ContainerReader:
+    """
+    Reads a container block by block.
+    With a single worker only one block is held in memory,
+    otherwise at most two blocks per worker are being decoded at the same time.
+    The options are passed on to the decoder, such as the model the container was written with.
+    """
+
+    def __init__(self, file: BinaryIO, *, workers: int = 1, **options):
+        if workers < 1:
+            raise ValueError('There must be at least one worker')
+        self._file = file
+        self._workers = workers
+        self.read_header()
+        self._decoder = self.algorithm.get_decoder()(**options)
+
+    def read_header(self):
+        """
+        Reads the fields at the start of the container.
+        """
+        header = self._file.read(len(MAGIC) + 3)
+        if not is_container(header) or len(header) < len(MAGIC) + 3:
+            raise ValueError('The input is not a compressed container')
+        format_version, identifier, self.flags = header[len(MAGIC):]
+        if format_version != _FORMAT_VERSION:
+            raise ValueError(f'Unsupported container format version: {format_version}')
+        if identifier not in ALGORITHM_IDS:
+            raise ValueError(f'Unknown algorithm id: {identifier}')
+        self.algorithm = ALGORITHM_IDS[identifier]
+        self.block_size = _read_varint(self._file)
+
+    def blocks(self) -> Iterator[Buffer]:
+        """
+        Decodes the blocks in order and verifies their checksums.
+        """
+        blocks = ((self._decoder, *encoded_block) for encoded_block in self.encoded_blocks())
+        if self._workers == 1:
+            yield from pool.ordered_map(None, _decode_block, blocks, 1)
+            return
+        with ProcessPoolExecutor(self._workers) as executor:
+            yield from pool.ordered_map(executor, _decode_block, blocks, 2 * self._workers)
+
+    def encoded_blocks(self) -> Iterator[tuple[bytes, int, Optional[int]]]:
+        """
+        Reads the blocks without decoding them.
+        Yields the encoded data, the original size and the checksum of every block.
+        """
+        while True:
+            encoded_block = self.read_encoded_block()
+            if encoded_block is None:
+                return
+            yield encoded_block
+
+    def read_encoded_block(self) -> Optional[tuple[bytes, int, Optional[int]]]:
+        """
+        Reads the block at the current position of the file without decoding it.
+        Returns None at the end of the container.
+        """
+        block_size = _read_varint(self._file)
+        if not block_size:
+            return None
+        encoded_size = _read_varint(self._file)
+        encoded = _read_exactly(self._file, encoded_size)
+        checksum = None
+        if self.flags & FLAG_CHECKSUMS:
+            checksum = int.from_bytes(_read_exactly(self._file, _CHECKSUM_BYTES), 'big')
+        return encoded, block_size, checksum
+
+    def read_index(self) -> list[tuple[int, int, int]]:
+        """
+        Reads the index from the end of the file, the file has to be seekable.
+        The position of the file is restored afterwards.
+        Returns the offset in the original data, the position in the container
+        and the original size of every block.
+        """
+        if not self.flags & FLAG_INDEX:
+            raise ValueError('The container has no block index')
+        footer_size = _INDEX_OFFSET_BYTES + len(INDEX_MAGIC)
+        position = self._file.tell()
+        self._file.seek(-footer_size, io.SEEK_END)
+        footer = _read_exactly(self._file, footer_size)
+        if footer[_INDEX_OFFSET_BYTES:] != INDEX_MAGIC:
+            raise ValueError('The block index of the container is missing')
+        self._file.seek(int.from_bytes(footer[:_INDEX_OFFSET_BYTES], 'big'))
+        index = []
+        offset = 0
+        for _ in range(_read_varint(self._file)):
+            block_position = _read_varint(self._file)
+            block_size = _read_varint(self._file)
+            index.append((offset, block_position, block_size))
+            offset += block_size
+        self._file.seek(position)
+        return index
+
+    def original_size(self) -> int:
+        """
+        Returns the size of the original data based on the index.
+        """
+        return sum(block_size for _, _, block_size in self.read_index())
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """
+        Decodes the given range of the original data,
+        only the blocks covering the range are decoded.
+        The range is cut short at the end of the data.
+        """
+        if offset < 0 or length < 0:
+            raise ValueError('Offset and length must not be negative')
+        index = self.read_index()
+        first_block = max(bisect.bisect_right([block[0] for block in index], offset) - 1, 0)
+        output = bytearray()
+        end = offset + length
+        for block_offset, position, _ in index[first_block:]:
+            if block_offset >= end:
+                break
+            self._file.seek(position)
+            block = _decode_block(self._decoder, *self.read_encoded_block())
+            output += block[max(offset - block_offset, 0): end - block_offset]
+        return bytes(output)
+
+    def read(self) -> bytes:
+        """
+        Decodes all the remaining blocks.
+        """
+        return b''.join(self.blocks())
+
+
+def _encode_block(encoder: Encoder, block: bytes) -> tuple[int, bytes, int]:
+    """
+    Encodes a single block, runs in the worker processes as well.
+    Returns the original size, the encoded data and the checksum of the block.
+    Blocks that look incompressible or do not shrink are returned as they are.
+    """
+    encoded = block
+    if _estimate_entropy(block) < _INCOMPRESSIBLE_ENTROPY:
+        encoded = encoder.encode(block)
+        if len(encoded) >= len(block):
+            encoded = block
+    return len(block), encoded, zlib.crc32(block)
+
+
+def _estimate_entropy(block: bytes) -> float:
+    """
+    Estimates the entropy of the bytes in bits per byte from samples spread evenly over the block.
+    """
+    sample_count = _ENTROPY_SAMPLES
+    if len(block) <= sample_count * _ENTROPY_SAMPLE_SIZE:
+        counts = Counter(block)
+    else:
+        step = len(block) // sample_count
+        counts = Counter()
+        for start in range(0, step * sample_count, step):
+            counts.update(block[start: start + _ENTROPY_SAMPLE_SIZE])
+    total = sum(counts.values())
+    return -sum(count / total * math.log2(count / total) for count in counts.values())
+
+
+def _decode_block(
+        decoder: Decoder,
+        encoded: bytes,
+        block_size: int,
+        checksum: Optional[int]
+) -> Buffer:
+    """
+    Decodes a single block and verifies it, runs in the worker processes as well.
+    The original size of the block is known, so the block is decoded into a buffer of that size.
+    """
+    if len(encoded) == block_size:
+        block = encoded
+    else:
+        block = bytearray(block_size)
+        if decoder.decode_into(encoded, block) != block_size:
+            raise ValueError('Block size does not match the decoded data')
+    if checksum is not None and checksum != zlib.crc32(block):
+        raise ValueError('Block checksum does not match the decoded data')
+    return block
+
+
+def _read_exactly(file: BinaryIO, size: int) -> bytes:
+    """
+    Reads the given amount of bytes from the file.
+    """
+    data = file.read(size)
+    if len(data) != size:
+        raise ValueError('The container ended unexpectedly')
+    return data
+
+
+def _read_varint(file: BinaryIO) -> int:
+    """
+    Reads a variable length integer from the file one byte at a time.
+    """
+    num = 0
+    shift = 0
+    while True:
+        byte = _read_exactly(file, 1)[0]
+        num |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return num
+        shift += 7
@@ -1,38 +1,94 @@
 """
-This module is used as an API for developers to encode and decode data with the Huffman-Lempel-Ziv algorithm.
+This module is used as an API for developers to encode and decode data
+with the Huffman-Lempel-Ziv algorithm.
 """
-from typing import Type
+from typing import Iterable, Iterator, Optional, Type
 
-from compress.common import CompressionAlgorithm, Decoder, Encoder
+from compress.common import CompressionAlgorithm, Decoder, Encoder, buffers
+from compress.common.buffers import Buffer
 from compress.huffman import HuffmanEncoder, HuffmanDecoder
 from compress.lz import LZEncoder, LZDecoder
+from compress.lz.dictionary import Dictionary
 
 
 class HLZEncoder(Encoder):
     """
     Functions as the API for compression process.
     Uses the Huffman-Lempel-Ziv encoding algorithm to compress data.
+    The options canonical and max_code_length are passed on to the Huffman encoder,
+    the other options, such as level, offset_bits, length_bits and dictionary,
+    are passed on to the Lempel-Ziv encoder.
     """
 
-    def encode(self, data: bytes) -> bytes:
+    def __init__(
+            self,
+            *,
+            canonical: bool = False,
+            max_code_length: Optional[int] = None,
+            **lz_options
+    ):
+        self._huffman_encoder = HuffmanEncoder(canonical=canonical, max_code_length=max_code_length)
+        self._lz_encoder = LZEncoder(**lz_options)
+
+    def encode(self, data: Buffer) -> bytes:
         """
         Function to call to provide input for the compressor to compress.
         Returns the compressed bytes.
         """
-        huffman_encoded = HuffmanEncoder().encode(data)
-        lz_encoded = LZEncoder().encode(huffman_encoded)
+        return bytes(self.encode_buffer(data))
+
+    def encode_buffer(self, data: Buffer) -> bytearray:
+        """
+        The output of the Huffman encoder is passed on to the Lempel-Ziv encoder without copying it,
+        the Lempel-Ziv encoder indexes it in place.
+        """
+        data = buffers.byte_view(data)
+        run_stats = self.start_stats()
+        with run_stats.stage('huffman'):
+            huffman_encoded = self._huffman_encoder.encode_buffer(data)
+        with run_stats.stage('lz'):
+            lz_encoded = self._lz_encoder.encode_buffer(huffman_encoded)
+        run_stats.count('huffman_bytes', len(huffman_encoded))
+        self.finish_stats(run_stats, len(data), len(lz_encoded))
         return lz_encoded
 
+    def encode_many(self, items: Iterable[Buffer]) -> Iterator[bytes]:
+        """
+        The Huffman encoder writes every input into the same reused buffer,
+        which the Lempel-Ziv encoder reads in place before the next input is written into it.
+        The stats are only collected by encoding the inputs one at a time.
+        """
+        if self._collect_stats:
+            return super().encode_many(items)
+        return self._lz_encoder.encode_many(self._huffman_encoder.encode_reusing(items))
+
 
 class HLZDecoder(Decoder):
     """
     Functions as the API for decompression process.
     Uses the Huffman-Lempel-Ziv encoding algorithm to decompress data.
+    Data encoded with a preset dictionary can only be decoded with the same dictionary.
     """
 
-    def decode(self, data: bytes) -> bytes:
-        huffman_encoded = LZDecoder().decode(data)
-        decoded = HuffmanDecoder().decode(huffman_encoded)
+    def __init__(self, *, dictionary: Optional[Dictionary] = None):
+        self._lz_decoder = LZDecoder(dictionary=dictionary)
+        self._huffman_decoder = HuffmanDecoder()
+
+    def decode(self, data: Buffer) -> bytes:
+        return bytes(self.decode_buffer(data))
+
+    def decode_buffer(self, data: Buffer) -> bytearray:
+        """
+        The output of the Lempel-Ziv decoder is passed on to the Huffman decoder without copying it.
+        """
+        data = buffers.byte_view(data)
+        run_stats = self.start_stats()
+        with run_stats.stage('lz'):
+            huffman_encoded = self._lz_decoder.decode_buffer(data)
+        with run_stats.stage('huffman'):
+            decoded = self._huffman_decoder.decode_buffer(huffman_encoded)
+        run_stats.count('huffman_bytes', len(huffman_encoded))
+        self.finish_stats(run_stats, len(data), len(decoded))
         return decoded
 
 
@@ -1,40 +1,149 @@
 """
 This module is used as an API for developers to encode and decode data with the Huffman algorithm.
 """
-import bisect
-from typing import Type
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+from typing import Iterable, Iterator, Optional, Type
 
-from bitarray import bitarray
-
-from compress.common import Encoder, Decoder, CompressionAlgorithm, convert
-from compress.huffman.node import Node
+from compress.common import Encoder, Decoder, CompressionAlgorithm, buffers, convert, pool, stats
+from compress.common.stats import Stats
+from compress.common.bits import BitReader, BitWriter
+from compress.common.buffers import Buffer
+from compress.huffman import parallel, vectorized as _vectorized
+from compress.huffman.canonical import canonical_codes, skip_code_lengths, write_code_lengths
+from compress.huffman.length_limit import limited_code_lengths
+from compress.huffman.parallel import SyncOptions
+from compress.huffman.static import HuffmanTable
+from compress.huffman.table import CACHE_SIZE, DecodingTable, canonical_table, codes_from_tree
+from compress.huffman.tree import HuffmanTree
 
+MIN_CODE_LENGTH = 8
+"""
+The smallest maximum code length, codes of fewer bits cannot tell all the 256 bytes apart.
+"""
 
-def sort_func_node(node: Node):
-    """
-    Used to sort nodes.
-    """
-    return -1 * node.probability
+_FORMAT_TREE = 0
+"""
+The original layout storing the whole Huffman tree.
+It has no explicit version field,
+but its first byte is always zero as it starts with the 4-byte header size.
+"""
+_FORMAT_CANONICAL = 1
+"""
+Layout storing only the code lengths of the symbols.
+"""
+_FORMAT_STATIC = 2
+"""
+Layout storing only the id of a static table.
+"""
+_FORMAT_SYNCHRONIZED = 3
+"""
+Layout storing the code lengths and the encoded size of each chunk,
+so that the chunks can be decoded in parallel.
+"""
 
 
 class HuffmanEncoder(Encoder):
     """
     Used to encode data with the Huffman algorithm.
+    In canonical mode only the code lengths are stored in the header instead of the whole tree.
+    Limiting the maximum code length always produces canonical codes.
+    With a static table the codes of the table are used, and only the id of the table is stored.
+    Large inputs are encoded with NumPy when it is installed,
+    which can be forced on or off with vectorized.
+    With sync options, the input is encoded in chunks sharing one canonical code by several workers,
+    and the encoded size of each chunk is stored,
+    so that the chunks can be decoded in parallel as well.
     """
 
-    def encode(self, data: bytes) -> bytes:
-        encoding_process = _HuffmanEncodingProcess(self, data)
-        return encoding_process.encode()
+    def __init__(
+            self,
+            *,
+            canonical: bool = False,
+            max_code_length: Optional[int] = None,
+            table: Optional[HuffmanTable] = None,
+            vectorized: Optional[bool] = None,
+            sync: Optional[SyncOptions] = None
+    ):
+        if max_code_length is not None and max_code_length < MIN_CODE_LENGTH:
+            raise ValueError(f'Max code length must be at least {MIN_CODE_LENGTH} bits')
+        if sync is not None and table is not None:
+            raise ValueError('Data encoded with a static table has no sync points')
+        self.canonical = canonical or max_code_length is not None
+        self.max_code_length = max_code_length
+        self.table = table
+        if vectorized:
+            _vectorized.require()
+        self.vectorized = vectorized
+        self.sync = sync
+
+    def encode(self, data: Buffer) -> bytes:
+        return bytes(self.encode_buffer(data))
+
+    def encode_buffer(self, data: Buffer) -> bytearray:
+        return self._encode(data)
+
+    def encode_many(self, items: Iterable[Buffer]) -> Iterator[bytes]:
+        """
+        The output buffer and the codes indexed by the byte are reused from one input to the next.
+        """
+        return map(bytes, self.encode_reusing(items))
+
+    def encode_reusing(self, items: Iterable[Buffer]) -> Iterator[bytearray]:
+        """
+        Encodes every input into the same reused buffer and yields the buffer after each input.
+        The buffer is overwritten by the next input, so it has to be used or copied before that.
+        """
+        batch = _EncodingBatch()
+        for data in items:
+            yield self._encode(data, batch)
+
+    def _encode(self, data: Buffer, batch: Optional['_EncodingBatch'] = None) -> bytearray:
+        data = buffers.byte_view(data)
+        run_stats = self.start_stats()
+        encoding_process = _HuffmanEncodingProcess(self, data, run_stats, batch)
+        result = encoding_process.encode()
+        self.finish_stats(run_stats, len(data), len(result))
+        return result
 
 
 class HuffmanDecoder(Decoder):
     """
     Used to decode data with the Huffman algorithm.
+    Data encoded with a static table can only be decoded with the same table.
+    Data encoded with sync points is decoded in parallel with several workers.
     """
 
-    def decode(self, data: bytes) -> bytes:
-        decoder = _HuffmanDecodingProcess(self, data)
-        return decoder.decode()
+    def __init__(self, *, table: Optional[HuffmanTable] = None, workers: int = 1):
+        if workers < 1:
+            raise ValueError('There must be at least one worker')
+        self.table = table
+        self.workers = workers
+
+    def decode(self, data: Buffer) -> bytes:
+        return bytes(self.decode_buffer(data))
+
+    def decode_buffer(self, data: Buffer) -> bytearray:
+        return self._decode(data)
+
+    def decode_many(self, items: Iterable[Buffer]) -> Iterator[bytes]:
+        """
+        The decoding tables built from the trees in the headers are reused
+        by the inputs with the same tree.
+        """
+        batch = _DecodingBatch()
+        for data in items:
+            yield bytes(self._decode(data, batch))
+
+    def _decode(self, data: Buffer, batch: Optional['_DecodingBatch'] = None) -> bytearray:
+        data = buffers.byte_view(data)
+        run_stats = self.start_stats()
+        with run_stats.stage('read_header'):
+            decoder = _HuffmanDecodingProcess(self, data, run_stats, batch)
+        result = decoder.decode()
+        self.finish_stats(run_stats, len(data), len(result))
+        return result
 
 
 class Huffman(CompressionAlgorithm):
@@ -50,20 +159,101 @@ class Huffman(CompressionAlgorithm):
     def get_decoder(cls) -> Type[Decoder]:
         return HuffmanDecoder
 
+    @classmethod
+    def train(cls, samples: Iterable[bytes]) -> dict:
+        """
+        Builds a static table out of the samples.
+        """
+        return {'table': HuffmanTable.from_samples(samples)}
+
+
+class _EncodingBatch:
+    """
+    The buffers reused by the inputs of a batch.
+    The codes are indexed by the byte, and only the codes of the bytes in an input are set in them.
+    """
+
+    def __init__(self):
+        self._output_buffer = BitWriter()
+        self._code_list = [''] * 256
+
+    def output_buffer(self) -> BitWriter:
+        """
+        Returns the output buffer emptied for the next input.
+        """
+        self._output_buffer.clear()
+        return self._output_buffer
+
+    def set_codes(self, codes: dict[int, str]) -> list[str]:
+        """
+        Sets the codes of an input into the list of codes and returns the list.
+        """
+        code_list = self._code_list
+        for symbol, code in codes.items():
+            code_list[symbol] = code
+        return code_list
+
+    def clear_codes(self, codes: dict[int, str]):
+        """
+        Clears the codes of an input from the list of codes.
+        """
+        code_list = self._code_list
+        for symbol in codes:
+            code_list[symbol] = ''
+
+
+class _DecodingBatch:
+    """
+    The decoding tables built for the inputs of a batch.
+    They are keyed by the tree in the header and the width of the table,
+    and the oldest table is dropped first.
+    """
+
+    def __init__(self):
+        self._tables: OrderedDict[tuple[bytes, int], DecodingTable] = OrderedDict()
+
+    def get(self, key: tuple[bytes, int]) -> Optional[DecodingTable]:
+        """
+        Returns the table stored with the key, or None if there is no such table.
+        """
+        return self._tables.get(key)
+
+    def put(self, key: tuple[bytes, int], decoding_table: DecodingTable):
+        """
+        Stores a table, dropping the oldest table when the cache is full.
+        """
+        if len(self._tables) >= CACHE_SIZE:
+            self._tables.popitem(last=False)
+        self._tables[key] = decoding_table
+
 
 class _HuffmanEncodingProcess:
     """
     Protected class to maintain the internal state of a single compression run.
     """
 
-    def __init__(self, encoder: HuffmanEncoder, data: bytes):
+    def __init__(
+            self,
+            encoder: HuffmanEncoder,
+            data: bytes,
+            run_stats: Stats = stats.DISABLED,
+            batch: Optional[_EncodingBatch] = None
+    ):
         self._encoder = encoder
         self._original_data = data
+        self._stats = run_stats
+        self._batch = batch
+        if encoder.vectorized is None:
+            self._vectorized = _vectorized.AVAILABLE and len(data) >= _vectorized.MIN_SIZE
+        else:
+            self._vectorized = encoder.vectorized
 
     def calculate_probabilities(self) -> dict[int, int]:
         """
         Iterates the input data to calculate the frequencies of bytes.
         """
+        if self._vectorized:
+            return _vectorized.byte_frequencies(self._original_data)
         probabilities = {}
         for char in self._original_data:
             if char in probabilities:
@@ -72,80 +262,306 @@ class _HuffmanEncodingProcess:
                 probabilities[char] = 1
         return probabilities
 
-    def construct_tree(self) -> Node:
+    def construct_tree(self, probabilities: Optional[dict[int, int]] = None) -> HuffmanTree:
         """
         Constructs the Huffman tree out of input bytes.
+        The frequencies of the bytes are calculated unless they are given.
         """
-        probabilities = self.calculate_probabilities()
-        nodes: list[Node] = []
-        for symbol, probability in probabilities.items():
-            bisect.insort_right(a=nodes, x=Node(
-                probability=probability,
-                symbol=symbol
-            ), key=sort_func_node)
-        while len(nodes) > 1:
-            left = nodes.pop()
-            right = nodes.pop()
-            left.code.append(0)
-            right.code.append(1)
-            combined = Node(
-                probability=left.probability + right.probability,
-                left=left,
-                right=right
-            )
-            bisect.insort_right(a=nodes, x=combined, key=sort_func_node)
-        return nodes[0]
+        if probabilities is None:
+            probabilities = self.calculate_probabilities()
+        return HuffmanTree.from_probabilities(probabilities)
+
+    def update_codes(self, tree: HuffmanTree, codes: dict):
+        """
+        Sets the codes of the leaf nodes in the Huffman tree as strings of bits.
+        """
+        for symbol, (code, length) in codes_from_tree(tree).items():
+            codes[symbol] = format(code, f'0{length}b') if length else ''
 
-    def update_codes(self, node: Node, code: str, codes: dict):
+    def code_lengths(self, probabilities: Optional[dict[int, int]] = None) -> dict[int, int]:
         """
-        Sets the code values for leaf nodes in the Huffman tree.
+        Returns the code length of each byte in the input.
+        The frequencies of the bytes are calculated unless they are given.
+        A lone byte gets a code of one bit, so that every byte still takes space in the output.
         """
-        new_code = code + node.code.to01()
-        if node.left:
-            self.update_codes(node.left, new_code, codes)
-        if node.right:
-            self.update_codes(node.right, new_code, codes)
-        if node.left is node.right is None:
-            codes[node.symbol] = new_code
+        if not self._original_data:
+            return {}
+        if probabilities is None:
+            with self._stats.stage('calculate_probabilities'):
+                probabilities = self.calculate_probabilities()
+        with self._stats.stage('construct_tree'):
+            tree = self.construct_tree(probabilities)
+        codes = {}
+        with self._stats.stage('update_codes'):
+            self.update_codes(tree, codes)
+        lengths = {symbol: max(len(code), 1) for symbol, code in codes.items()}
+        max_code_length = self._encoder.max_code_length
+        if max_code_length is not None and max(lengths.values()) > max_code_length:
+            with self._stats.stage('limit_code_lengths'):
+                return limited_code_lengths(probabilities, max_code_length)
+        return lengths
 
-    def write_header_info(self, buffer: bitarray, node: Node):
+    def write_header_info(self, buffer: BitWriter, tree: HuffmanTree):
         """
-        Writes the Huffman tree into a buffer.
+        Writes the Huffman tree into a buffer in post-order.
         """
-        if node.left:
-            self.write_header_info(buffer, node.left)
-        if node.right:
-            self.write_header_info(buffer, node.right)
-        if node.left is node.right is None:
-            buffer.append(1)
-            buffer.frombytes(convert.char_int_to_bytes(node.symbol))
+        for node in tree.post_order():
+            if tree.is_leaf(node):
+                buffer.write_bits(0x100 | tree.symbols[node], 9)
+            else:
+                buffer.write_bits(0, 1)
+
+    def encode_data(self, codes: dict[int, str], output_buffer: BitWriter):
+        """
+        Replaces every byte of the input with its code in the output.
+        In a batch the list of codes is reused, and the codes of the input are cleared afterwards.
+        """
+        if self._batch is None:
+            self.write_codes([codes.get(char, '') for char in range(256)], output_buffer)
+            return
+        try:
+            self.write_codes(self._batch.set_codes(codes), output_buffer)
+        finally:
+            self._batch.clear_codes(codes)
+
+    def output_buffer(self) -> BitWriter:
+        """
+        Returns an empty buffer for the output, a batch reuses the same buffer for every input.
+        """
+        if self._batch is None:
+            return BitWriter()
+        return self._batch.output_buffer()
+
+    def write_codes(self, codes: list[str], output_buffer: BitWriter):
+        """
+        Writes the codes of the input bytes, the codes are indexed by the byte.
+        The output buffer is byte aligned after the header,
+        so the codes packed by NumPy can be written as bytes.
+        """
+        if self._vectorized:
+            output_buffer.write_bytes(_vectorized.encode_codes(self._original_data, codes))
         else:
-            buffer.append(0)
+            output_buffer.write_codes(self._original_data, codes)
 
-    def encode(self) -> bytes:
+    def encode(self) -> bytearray:
         """
         Encodes the input bytes and returns the encoded bytes.
+        The header and the codes are written into a single buffer,
+        which is returned without copying it.
         """
-        root_node = self.construct_tree()
+        if self._encoder.table is not None:
+            return self.encode_static()
+        if self._encoder.sync is not None:
+            return self.encode_synchronized()
+        if self._encoder.canonical:
+            return self.encode_canonical()
+        if not self._original_data:
+            return bytearray(convert.int_to_bytes(0) * 3)
+        run_stats = self._stats
+        with run_stats.stage('calculate_probabilities'):
+            probabilities = self.calculate_probabilities()
+        with run_stats.stage('construct_tree'):
+            tree = self.construct_tree(probabilities)
         codes = {}
-        self.update_codes(root_node, '', codes)
-        header_buffer = bitarray()
-        self.write_header_info(header_buffer, root_node)
-        header_buffer.fill()
-        output_buffer = bitarray()
-        for char in self._original_data:
-            sequence = codes[char]
-            output_buffer.extend(sequence)
-        output_buffer.fill()
-        header_buffer_bytes = bytes(header_buffer)
-        output_data_bytes = bytes(output_buffer)
-        return convert.int_to_bytes(
-            len(header_buffer_bytes)
-        ) + convert.int_to_bytes(
-            len(codes)
+        with run_stats.stage('update_codes'):
+            self.update_codes(tree, codes)
+        with run_stats.stage('write_header'):
+            output_buffer = self.output_buffer()
+            # Every leaf takes nine bits and every internal node one bit, padded to whole bytes.
+            output_buffer.write_bytes(convert.int_to_bytes(
+                (len(tree) + 8 * len(codes) + 7) // 8
+            ) + convert.int_to_bytes(
+                len(codes)
+            ) + convert.int_to_bytes(
+                len(self._original_data)
+            ))
+            self.write_header_info(output_buffer, tree)
+            output_buffer.align()
+        with run_stats.stage('encode_data'):
+            self.encode_data(codes, output_buffer)
+        run_stats.count('symbols', len(codes))
+        return output_buffer.getbuffer()
+
+    def encode_canonical(self) -> bytearray:
+        """
+        Encodes the input bytes with canonical codes and returns the encoded bytes.
+        """
+        lengths = self.code_lengths()
+        with self._stats.stage('write_header'):
+            codes = self.canonical_code_strings(lengths)
+            header = convert.char_int_to_bytes(
+                _FORMAT_CANONICAL
+            ) + convert.int_to_varint(
+                len(self._original_data)
+            ) + write_code_lengths(lengths)
+        output_buffer = self.output_buffer()
+        output_buffer.write_bytes(header)
+        with self._stats.stage('encode_data'):
+            self.encode_data(codes, output_buffer)
+        self._stats.count('symbols', len(codes))
+        return output_buffer.getbuffer()
+
+    def encode_synchronized(self) -> bytearray:
+        """
+        Encodes the input in chunks sharing one canonical code and returns the encoded bytes.
+        The bytes are counted per chunk,
+        and the counts tell the encoded size of every chunk before it is encoded.
+        Each chunk is encoded starting at its bit offset,
+        so the chunks are joined by combining a single byte.
+        The chunks are counted and encoded in a pool of worker processes
+        when there are several workers.
+        """
+        sync = self._encoder.sync
+        executor = ProcessPoolExecutor(sync.workers) if sync.workers > 1 else None
+        copy = executor is not None
+        try:
+            with self._stats.stage('calculate_probabilities'):
+                frequencies = list(pool.ordered_map(
+                    executor,
+                    parallel.chunk_frequencies,
+                    ((chunk, self._vectorized) for chunk in sync.chunks(self._original_data, copy)),
+                    sync.in_flight
+                ))
+            lengths = self.code_lengths(parallel.merge_frequencies(frequencies))
+            with self._stats.stage('write_header'):
+                codes = self.canonical_code_strings(lengths)
+                code_list = [codes.get(char, '') for char in range(256)]
+                chunk_bits = [
+                    sum(count * lengths[symbol] for symbol, count in chunk_counts.items())
+                    for chunk_counts in frequencies
+                ]
+                output = bytearray(convert.char_int_to_bytes(
+                    _FORMAT_SYNCHRONIZED
+                ) + convert.int_to_varint(
+                    len(self._original_data)
+                ) + write_code_lengths(
+                    lengths
+                ) + convert.int_to_varint(
+                    sync.sync_interval
+                ))
+                for bit_count in chunk_bits[:-1]:
+                    output += convert.int_to_varint(bit_count)
+            with self._stats.stage('encode_data'):
+                bit_offsets = list(accumulate(chunk_bits, initial=0))
+                encoded_chunks = pool.ordered_map(
+                    executor,
+                    parallel.encode_chunk,
+                    (
+                        (chunk, code_list, bit_offset % 8, self._vectorized)
+                        for chunk, bit_offset in zip(
+                            sync.chunks(self._original_data, copy), bit_offsets
+                        )
+                    ),
+                    sync.in_flight
+                )
+                for bit_offset, encoded in zip(bit_offsets, encoded_chunks):
+                    if bit_offset % 8 and encoded:
+                        output[-1] |= encoded[0]
+                        output += memoryview(encoded)[1:]
+                    else:
+                        output += encoded
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        self._stats.count('symbols', len(codes))
+        self._stats.count('chunks', len(frequencies))
+        return output
+
+    @staticmethod
+    def canonical_code_strings(lengths: dict[int, int]) -> dict[int, str]:
+        """
+        Returns the canonical code of each byte as a string of bits.
+        """
+        return {
+            symbol: format(code, f'0{length}b')
+            for symbol, (code, length) in canonical_codes(lengths).items()
+        }
+
+    def encode_static(self) -> bytearray:
+        """
+        Encodes the input bytes with the codes of the static table and returns the encoded bytes.
+        """
+        table = self._encoder.table
+        header = convert.char_int_to_bytes(
+            _FORMAT_STATIC
         ) + convert.int_to_bytes(
+            table.table_id
+        ) + convert.int_to_varint(
             len(self._original_data)
-        ) + header_buffer_bytes + output_data_bytes
+        )
+        output_buffer = self.output_buffer()
+        output_buffer.write_bytes(header)
+        with self._stats.stage('encode_data'):
+            self.write_codes(table.codes, output_buffer)
+        return output_buffer.getbuffer()
+
+
+class _Header:
+    """
+    The fields read from the header of an encoded input.
+    They tell how the input was coded and where its payload starts,
+    only the fields of its format are set.
+    """
+
+    def __init__(self, data: Buffer, decoder: HuffmanDecoder):
+        self.format_version = data[0] if data else _FORMAT_TREE
+        self.unique_byte_count = 0
+        self.code_lengths = b''
+        self.chunk_bits: list[int] = []
+        if self.format_version == _FORMAT_TREE:
+            self.unique_byte_count = convert.bytes_to_int(data[4:8])
+            self.original_byte_count = convert.bytes_to_int(data[8:12])
+            self.payload_offset = 12 + convert.bytes_to_int(data[0:4])
+        elif self.format_version == _FORMAT_CANONICAL:
+            self.original_byte_count, code_length_offset = convert.varint_to_int(data, 1)
+            self.payload_offset = skip_code_lengths(data, code_length_offset)
+            self.code_lengths = data[code_length_offset: self.payload_offset]
+        elif self.format_version == _FORMAT_SYNCHRONIZED:
+            self.original_byte_count, code_length_offset = convert.varint_to_int(data, 1)
+            code_length_end = skip_code_lengths(data, code_length_offset)
+            self.code_lengths = data[code_length_offset: code_length_end]
+            self.sync_interval, offset = convert.varint_to_int(data, code_length_end)
+            if not self.sync_interval:
+                raise ValueError('Sync interval must be at least one byte')
+            for _ in range(-(-self.original_byte_count // self.sync_interval) - 1):
+                bit_count, offset = convert.varint_to_int(data, offset)
+                self.chunk_bits.append(bit_count)
+            self.payload_offset = offset
+        elif self.format_version == _FORMAT_STATIC:
+            table_id = convert.bytes_to_int(data[1:5])
+            if decoder.table is None or decoder.table.table_id != table_id:
+                raise ValueError(
+                    f'The data was encoded with the static Huffman table {table_id:08x}'
+                )
+            self.original_byte_count, self.payload_offset = convert.varint_to_int(data, 5)
+        else:
+            raise ValueError(f'Unsupported Huffman format version: {self.format_version}')
+
+    def tree_key(self, data: Buffer) -> tuple[bytes, int]:
+        """
+        Returns the encoded tree together with the width of its decoding table,
+        which identifies the decoding table of the input.
+        """
+        tree_bytes = bytes(data[4:8]) + bytes(data[12:self.payload_offset])
+        return tree_bytes, self.original_byte_count.bit_length()
+
+    def chunks(self, data: Buffer) -> Iterator[tuple[bytes, bytes, int, int]]:
+        """
+        Returns the arguments of decoding each chunk between the sync points.
+        Each chunk gets the code lengths and the bytes covering it, the bit offset it starts at
+        and its decoded size.
+        """
+        code_lengths = bytes(self.code_lengths)
+        interval = self.sync_interval
+        bit_offsets = list(accumulate(self.chunk_bits, initial=8 * self.payload_offset))
+        end_offsets = [(bit_offset + 7) // 8 for bit_offset in bit_offsets[1:]] + [len(data)]
+        for index, (bit_offset, end_offset) in enumerate(zip(bit_offsets, end_offsets)):
+            yield (
+                code_lengths,
+                bytes(data[bit_offset // 8: end_offset]),
+                bit_offset % 8,
+                min(interval, self.original_byte_count - index * interval)
+            )
 
 
 class _HuffmanDecodingProcess:
@@ -153,68 +569,100 @@ class _HuffmanDecodingProcess:
     Protected class to maintain the internal state of a single decompression run.
     """
 
-    def __init__(self, decoder: HuffmanDecoder, data: bytes):
+    def __init__(
+            self,
+            decoder: HuffmanDecoder,
+            data: bytes,
+            run_stats: Stats = stats.DISABLED,
+            batch: Optional[_DecodingBatch] = None
+    ):
         self._decoder = decoder
         self._original_data = data
-        self._header_bytes = convert.bytes_to_int(data[0:4])
-        self._unique_byte_count = convert.bytes_to_int(data[4:8])
-        self._original_byte_count = convert.bytes_to_int(data[8:12])
+        self._stats = run_stats
+        self._batch = batch
+        self._header = _Header(data, decoder)
 
-    def decode_header(self, input_buffer: bitarray):
+    def decode_header(self, input_buffer: BitReader) -> HuffmanTree:
         """
         Decodes the encoded Huffman tree from the input.
         """
-        index = 0
+        tree = HuffmanTree()
         node_stack = []
         node_count = 0
+        unique_byte_count = self._header.unique_byte_count
 
         def merge():
             right = node_stack.pop()
             left = node_stack.pop()
-            node = Node(left=left, right=right)
-            node_stack.append(node)
+            node_stack.append(tree.add_node(left, right))
 
-        while index < len(input_buffer) and node_count < self._unique_byte_count:
-            bit = input_buffer[index]
+        while input_buffer.bits_remaining > 0 and node_count < unique_byte_count:
+            bit = input_buffer.read_bits(1)
             if bit == 0:
                 if len(node_stack) > 1:
                     merge()
-                index += 1
             elif bit == 1:
-                index += 1
-                character = input_buffer[index: index + 8]
-                node_stack.append(Node(symbol=convert.bytes_to_char_int(character.tobytes())))
-                index += 8
+                node_stack.append(tree.add_leaf(input_buffer.read_bits(8)))
                 node_count += 1
         while len(node_stack) > 1:
             merge()
-        index += (8 - index % 8) % 8
-        return node_stack.pop(), index
+        return tree
 
-    def find_char(self, node: Node, input_buffer: bitarray, index: int):
+    def tree_table(self) -> DecodingTable:
         """
-        Finds a bytes from the Huffman tree matching the series of bits in the input.
+        Returns the decoding table of the tree in the header.
+        In a batch the table is kept, so that the inputs with the same tree and width reuse it.
         """
-        if node.left is node.right is None:
-            return node.symbol, index
-        bit_found = input_buffer[index]
-        if bit_found == 0:
-            return self.find_char(node.left, input_buffer, index + 1)
-        if bit_found == 1:
-            return self.find_char(node.right, input_buffer, index + 1)
+        if self._batch is None:
+            return self.build_tree_table()
+        key = self._header.tree_key(self._original_data)
+        decoding_table = self._batch.get(key)
+        if decoding_table is None:
+            decoding_table = self.build_tree_table()
+            self._batch.put(key, decoding_table)
+        return decoding_table
 
-    def decode(self) -> bytes:
+    def build_tree_table(self) -> DecodingTable:
+        """
+        Decodes the tree in the header and builds its decoding table.
+        """
+        header = self._header
+        tree = self.decode_header(BitReader(self._original_data[:header.payload_offset], 12))
+        return DecodingTable(codes_from_tree(tree), header.original_byte_count)
+
+    def decode(self) -> bytearray:
         """
         Decodes the input bytes and returns the encoded bytes.
         """
-        input_buffer = bitarray()
-        input_buffer.frombytes(self._original_data[12:])
-        output_buffer = bitarray()
-        root_node, index = self.decode_header(input_buffer)
-        char_count = 0
-        index = self._header_bytes * 8
-        while index < len(input_buffer) and char_count < self._original_byte_count:
-            char_found, index = self.find_char(root_node, input_buffer, index)
-            char_count += 1
-            output_buffer.frombytes(convert.char_int_to_bytes(char_found))
-        return bytes(output_buffer)
+        header = self._header
+        if not header.original_byte_count:
+            return bytearray()
+        if header.format_version == _FORMAT_SYNCHRONIZED and self._decoder.workers > 1:
+            return self.decode_synchronized()
+        run_stats = self._stats
+        with run_stats.stage('build_table'):
+            if header.format_version == _FORMAT_STATIC:
+                decoding_table = self._decoder.table.decoding_table()
+            elif header.format_version in (_FORMAT_CANONICAL, _FORMAT_SYNCHRONIZED):
+                decoding_table = canonical_table(header.code_lengths, header.original_byte_count)
+            else:
+                decoding_table = self.tree_table()
+        with run_stats.stage('decode_data'):
+            input_buffer = BitReader(self._original_data, header.payload_offset)
+            output = decoding_table.decode(input_buffer, header.original_byte_count)
+        run_stats.count('table_bits', decoding_table.table_bits)
+        return output
+
+    def decode_synchronized(self) -> bytearray:
+        """
+        Decodes the chunks between the sync points in a pool of worker processes
+        and returns the decoded bytes.
+        """
+        workers = self._decoder.workers
+        chunks = self._header.chunks(self._original_data)
+        output = bytearray()
+        with self._stats.stage('decode_data'), ProcessPoolExecutor(workers) as executor:
+            for decoded in pool.ordered_map(executor, parallel.decode_chunk, chunks, 2 * workers):
+                output += decoded
+        self._stats.count('chunks', len(self._header.chunk_bits) + 1)
+        return output
@@ -0,0 +1,70 @@
+"""
+Contains the helpers to derive canonical Huffman codes from code lengths.
+"""
+from compress.common import convert
+
+
+def canonical_codes(lengths: dict[int, int]) -> dict[int, tuple[int, int]]:
+    """
+    Assigns the canonical code to each symbol based on the code lengths.
+    Symbols are sorted by code length and then by value, consecutive symbols get consecutive codes.
+    """
+    codes = {}
+    code = 0
+    previous_length = 0
+    for symbol, length in sorted(lengths.items(), key=lambda item: (item[1], item[0])):
+        code <<= length - previous_length
+        codes[symbol] = (code, length)
+        code += 1
+        previous_length = length
+    return codes
+
+
+def write_code_lengths(lengths: dict[int, int]) -> bytes:
+    """
+    Serialises the code lengths.
+    The maximum length is followed by the amount of codes of each length
+    and the symbols in canonical order.
+    """
+    max_length = max(lengths.values(), default=0)
+    counts = [0] * max_length
+    for length in lengths.values():
+        counts[length - 1] += 1
+    output = bytearray(convert.char_int_to_bytes(max_length))
+    for count in counts:
+        output += convert.int_to_varint(count)
+    output += bytes(sorted(lengths, key=lambda symbol: (lengths[symbol], symbol)))
+    return bytes(output)
+
+
+def read_code_lengths(data: bytes, offset: int = 0) -> tuple[dict[int, int], int]:
+    """
+    Deserialises the code lengths starting at the offset.
+    Returns the code lengths and the offset of the first byte after them.
+    """
+    max_length = data[offset]
+    offset += 1
+    counts = []
+    for _ in range(max_length):
+        count, offset = convert.varint_to_int(data, offset)
+        counts.append(count)
+    lengths = {}
+    for length, count in enumerate(counts, start=1):
+        for symbol in data[offset: offset + count]:
+            lengths[symbol] = length
+        offset += count
+    return lengths, offset
+
+
+def skip_code_lengths(data: bytes, offset: int = 0) -> int:
+    """
+    Returns the offset of the first byte after the code lengths starting at the offset,
+    without deserialising them.
+    """
+    max_length = data[offset]
+    offset += 1
+    symbol_count = 0
+    for _ in range(max_length):
+        count, offset = convert.varint_to_int(data, offset)
+        symbol_count += count
+    return offset + symbol_count
@@ -0,0 +1,52 @@
+"""
+Contains the package-merge algorithm used to build length-limited Huffman codes.
+"""
+
+
+def limited_code_lengths(probabilities: dict[int, int], max_code_length: int) -> dict[int, int]:
+    """
+    Returns the optimal code lengths for the symbols when no code may exceed the maximum length.
+    Uses the package-merge algorithm: the cheapest items of each level are paired into packages
+    that compete with the symbols on the level above, and the code length of a symbol is
+    the amount of selected items it takes part in.
+    """
+    symbol_count = len(probabilities)
+    if symbol_count <= 1:
+        return {symbol: 1 for symbol in probabilities}
+    if 1 << max_code_length < symbol_count:
+        raise ValueError(f'{symbol_count} symbols do not fit in codes of {max_code_length} bits')
+    leaves = sorted((probability, (symbol,)) for symbol, probability in probabilities.items())
+    items = leaves
+    for _ in range(max_code_length - 1):
+        packages = [
+            (first[0] + second[0], first[1] + second[1])
+            for first, second in zip(items[0::2], items[1::2])
+        ]
+        items = _merge(leaves, packages)
+    lengths = dict.fromkeys(probabilities, 0)
+    for _, symbols in items[:2 * symbol_count - 2]:
+        for symbol in symbols:
+            lengths[symbol] += 1
+    return lengths
+
+
+def _merge(
+        first: list[tuple[int, tuple[int, ...]]],
+        second: list[tuple[int, tuple[int, ...]]]
+) -> list[tuple[int, tuple[int, ...]]]:
+    """
+    Merges two lists sorted by weight into a single sorted list.
+    """
+    merged = []
+    first_index = 0
+    second_index = 0
+    while first_index < len(first) and second_index < len(second):
+        if first[first_index][0] <= second[second_index][0]:
+            merged.append(first[first_index])
+            first_index += 1
+        else:
+            merged.append(second[second_index])
+            second_index += 1
+    merged.extend(first[first_index:])
+    merged.extend(second[second_index:])
+    return merged
@@ -0,0 +1,101 @@
+"""
+Contains the work done on the chunks of a single input sharing one Huffman code,
+which is run in a pool of worker processes when there are several workers.
+"""
+from collections import Counter
+from typing import Iterable, Iterator, Sequence
+
+from compress.common.bits import BitReader, BitWriter
+from compress.common.buffers import Buffer
+from compress.huffman import vectorized as _vectorized
+from compress.huffman.table import canonical_table
+
+DEFAULT_SYNC_INTERVAL = 1 << 22
+"""
+The amount of input bytes between two sync points,
+which is also the amount of bytes handed to a worker at a time.
+"""
+
+
+class SyncOptions:
+    """
+    The options of encoding a single input in chunks sharing one canonical code.
+    The chunks are encoded by the given amount of worker processes,
+    and a sync point is stored every sync interval bytes.
+    """
+
+    def __init__(self, *, workers: int = 1, sync_interval: int = DEFAULT_SYNC_INTERVAL):
+        if workers < 1:
+            raise ValueError('There must be at least one worker')
+        if sync_interval < 1:
+            raise ValueError('Sync interval must be at least one byte')
+        self.workers = workers
+        self.sync_interval = sync_interval
+
+    def chunks(self, data: Buffer, copy: bool) -> Iterator[Buffer]:
+        """
+        Splits the input at the sync points.
+        The chunks are copied into bytes when they are sent to other processes.
+        """
+        interval = self.sync_interval
+        for start in range(0, len(data), interval):
+            chunk = data[start: start + interval]
+            yield bytes(chunk) if copy else chunk
+
+    @property
+    def in_flight(self) -> int:
+        """
+        The amount of chunks handed to the workers at the same time.
+        """
+        return 2 * self.workers
+
+
+def chunk_frequencies(chunk: bytes, vectorized: bool) -> dict[int, int]:
+    """
+    Counts the bytes of a chunk, the bytes are ordered by their first occurrence.
+    """
+    if vectorized:
+        return _vectorized.byte_frequencies(chunk)
+    return dict(Counter(chunk))
+
+
+def merge_frequencies(frequencies: Iterable[dict[int, int]]) -> dict[int, int]:
+    """
+    Sums the byte counts of the chunks.
+    Merged in the order of the chunks, the bytes stay ordered by their first occurrence
+    in the whole input, so the code is the same as if the input was counted at once.
+    """
+    merged: dict[int, int] = {}
+    for chunk_counts in frequencies:
+        for symbol, count in chunk_counts.items():
+            merged[symbol] = merged.get(symbol, 0) + count
+    return merged
+
+
+def encode_chunk(
+        chunk: bytes,
+        codes: Sequence[str],
+        bit_offset: int,
+        vectorized: bool
+) -> bytearray:
+    """
+    Encodes a chunk starting at the given bit offset within its first byte.
+    The bits before the offset are zero,
+    so the first byte can be combined with the last byte of the previous chunk.
+    """
+    if vectorized:
+        return _vectorized.encode_codes(chunk, codes, bit_offset)
+    output_buffer = BitWriter()
+    output_buffer.write_bits(0, bit_offset)
+    output_buffer.write_codes(chunk, codes)
+    return output_buffer.getbuffer()
+
+
+def decode_chunk(code_lengths: bytes, data: bytes, bit_offset: int, size: int) -> bytearray:
+    """
+    Decodes the given amount of bytes from the data starting at the bit offset.
+    The code lengths are serialized like in the canonical format.
+    """
+    input_buffer = BitReader(data)
+    input_buffer.read_bits(bit_offset)
+    return canonical_table(code_lengths, size).decode(input_buffer, size)
@@ -0,0 +1,78 @@
+"""
+Contains the static Huffman tables shared by many inputs,
+which are encoded without code lengths of their own.
+"""
+import zlib
+from collections import Counter
+from typing import Iterable
+
+from compress.huffman.canonical import canonical_codes, read_code_lengths, write_code_lengths
+from compress.huffman.length_limit import limited_code_lengths
+from compress.huffman.table import TABLE_BITS, DecodingTable, canonical_table
+
+_DECODING_SIZE_HINT = 1 << 20
+"""
+The tables are decoded many times, so they are always built as wide as possible.
+"""
+
+
+class HuffmanTable:
+    """
+    Canonical Huffman codes built once, for example from a sample corpus,
+    and used to encode many inputs.
+    Every byte has a code, so any input can be encoded with the table.
+    The table is identified by the CRC-32 of its serialised code lengths,
+    which is stored in the encoded data.
+    """
+
+    def __init__(self, code_lengths: dict[int, int]):
+        self.code_lengths = dict(code_lengths)
+        self._serialised = write_code_lengths(self.code_lengths)
+        self.table_id = zlib.crc32(self._serialised)
+        self.codes = [''] * 256
+        for symbol, (code, length) in canonical_codes(self.code_lengths).items():
+            self.codes[symbol] = format(code, f'0{length}b')
+
+    @classmethod
+    def from_samples(
+            cls,
+            samples: Iterable[bytes],
+            max_code_length: int = TABLE_BITS
+    ) -> 'HuffmanTable':
+        """
+        Builds the table out of the frequencies of the bytes in the samples.
+        Bytes missing from the samples are counted once, so that they still get a code.
+        The codes are at most 15 bits long by default,
+        so they fit in a single lookup of the decoding table.
+        """
+        counts: Counter[int] = Counter()
+        for sample in samples:
+            counts.update(bytes(sample))
+        frequencies = {symbol: counts[symbol] + 1 for symbol in range(256)}
+        return cls(limited_code_lengths(frequencies, max_code_length))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'HuffmanTable':
+        """
+        Deserialises a table written with to_bytes.
+        """
+        code_lengths, _ = read_code_lengths(data)
+        return cls(code_lengths)
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialises the table as its canonical code lengths.
+        """
+        return self._serialised
+
+    def decoding_table(self) -> DecodingTable:
+        """
+        Returns the lookup table used to decode the inputs encoded with the table.
+        """
+        return canonical_table(self._serialised, _DECODING_SIZE_HINT)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, HuffmanTable) and other.code_lengths == self.code_lengths
+
+    def __hash__(self) -> int:
+        return self.table_id
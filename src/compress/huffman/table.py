@@ -0,0 +1,153 @@
+"""
+Contains the lookup tables used to decode Huffman codes several bits at a time.
+"""
+from functools import lru_cache
+
+from compress.common.bits import BitReader
+from compress.huffman.canonical import canonical_codes, read_code_lengths
+from compress.huffman.tree import HuffmanTree
+
+TABLE_BITS = 15
+"""
+The maximum number of input bits resolved by a single table lookup.
+Codes longer than the table are resolved by the slower fallback path,
+so codes limited to this length always decode with a single lookup.
+"""
+PACKED_TABLE_BITS = 14
+"""
+The preferred width of a table holding several symbols per entry.
+"""
+CACHE_SIZE = 64
+"""
+The amount of decoding tables kept in the cache of canonical tables.
+"""
+
+
+def codes_from_tree(tree: HuffmanTree) -> dict[int, tuple[int, int]]:
+    """
+    Walks the Huffman tree and returns the code and the code length of each symbol.
+    """
+    return tree.codes()
+
+
+class DecodingTable:
+    """
+    Lookup table mapping the next bits of the input to the symbols they encode.
+    Each entry holds every symbol that can be fully resolved from the bits,
+    so a single lookup can output several symbols at once.
+    """
+
+    def __init__(self, codes: dict[int, tuple[int, int]], size_hint: int = 0):
+        """
+        The size hint is the amount of symbols expected to be decoded with the table.
+        """
+        self._codes = codes
+        self.max_length = max((length for _, length in codes.values()), default=0)
+        self.table_bits, self._packed = self._choose_width(size_hint)
+        self._long_codes: dict[int, int] = {}
+        self._entries: list[tuple[bytes, int, int]] = []
+        if self.max_length:
+            self._build()
+
+    def _choose_width(self, size_hint: int) -> tuple[int, bool]:
+        """
+        Returns the width of the table and whether its entries hold several symbols.
+        Small inputs get a narrower table, as building a wide table would cost more than it saves.
+        When the codes are too long for such a table, it is made wide enough for every code
+        but only holds a single symbol per entry.
+        """
+        packed_bits = min(PACKED_TABLE_BITS, size_hint.bit_length() - 4)
+        if self.max_length <= packed_bits:
+            return packed_bits, True
+        if self.max_length <= TABLE_BITS:
+            return self.max_length, packed_bits == PACKED_TABLE_BITS
+        if packed_bits < PACKED_TABLE_BITS:
+            return TABLE_BITS, False
+        return packed_bits, True
+
+    def _build(self):
+        """
+        Fills the lookup table and the fallback dictionary for long codes.
+        """
+        table_bits = self.table_bits
+        mask = (1 << table_bits) - 1
+        single: list[tuple[bytes, int, int]] = [(b'', 0, 0)] * (1 << table_bits)
+        for symbol, (code, length) in self._codes.items():
+            if length <= table_bits:
+                shift = table_bits - length
+                start = code << shift
+                single[start: start + (1 << shift)] = [(bytes((symbol,)), length, 1)] * (1 << shift)
+            else:
+                self._long_codes[(1 << length) | code] = symbol
+        if not self._packed:
+            self._entries = single
+            return
+        entries = []
+        for prefix in range(1 << table_bits):
+            symbols = bytearray()
+            consumed = 0
+            while consumed < table_bits:
+                symbol, length, _ = single[(prefix << consumed) & mask]
+                if not length or length > table_bits - consumed:
+                    break
+                symbols += symbol
+                consumed += length
+            entries.append((bytes(symbols), consumed, len(symbols)))
+        self._entries = entries
+
+    def decode(self, reader: BitReader, size: int) -> bytearray:
+        """
+        Decodes the given amount of symbols from the reader.
+        """
+        if size <= 0:
+            return bytearray()
+        if not self.max_length:
+            symbol = next(iter(self._codes))
+            return bytearray(bytes((symbol,)) * size)
+        table_bits = self.table_bits
+        entries = self._entries
+        peek_bits = reader.peek_bits
+        consume = reader.consume
+        output = bytearray(size + table_bits)
+        output_index = 0
+        while output_index < size:
+            symbols, consumed, symbol_count = entries[peek_bits(table_bits)]
+            if consumed:
+                output[output_index: output_index + symbol_count] = symbols
+                output_index += symbol_count
+                consume(consumed)
+            else:
+                output[output_index] = self._decode_long_code(reader)
+                output_index += 1
+        del output[size:]
+        return output
+
+    def _decode_long_code(self, reader: BitReader) -> int:
+        """
+        Resolves a code longer than the table width one bit at a time.
+        """
+        for length in range(self.table_bits + 1, self.max_length + 1):
+            symbol = self._long_codes.get((1 << length) | reader.peek_bits(length))
+            if symbol is not None:
+                reader.consume(length)
+                return symbol
+        raise ValueError('Invalid Huffman code in the input data')
+
+
+def canonical_table(code_lengths: bytes, size_hint: int = 0) -> DecodingTable:
+    """
+    Returns the decoding table of the serialised canonical code lengths.
+    The tables are kept in an LRU cache keyed by the code lengths, which identify the table,
+    so decoding many inputs with the same codes builds the table only once.
+    """
+    return _cached_canonical_table(bytes(code_lengths), size_hint.bit_length())
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _cached_canonical_table(code_lengths: bytes, size_bits: int) -> DecodingTable:
+    """
+    The width of a table only depends on the bit length of the size hint,
+    so it is a part of the key instead of the hint.
+    """
+    lengths, _ = read_code_lengths(code_lengths)
+    return DecodingTable(canonical_codes(lengths), (1 << size_bits) >> 1)
@@ -0,0 +1,130 @@
+"""
+Contains the Huffman tree stored in flat arrays instead of node objects.
+"""
+import heapq
+from array import array
+from typing import Iterator
+
+from compress.huffman.node import Node
+
+_NO_CHILD = 0xFFFF
+"""
+Marks the children of a leaf, a tree of 256 symbols has at most 511 nodes.
+"""
+
+
+class HuffmanTree:
+    """
+    Huffman tree stored in parallel arrays indexed by node.
+    A leaf has no children, and the symbol of an internal node is not used.
+    The children of a node always precede it, so the last node is the root.
+    """
+    __slots__ = ('left', 'right', 'symbols')
+
+    def __init__(self):
+        self.left = array('H')
+        self.right = array('H')
+        self.symbols = array('B')
+
+    @classmethod
+    def from_probabilities(cls, probabilities: dict[int, int]) -> 'HuffmanTree':
+        """
+        Builds the tree by repeatedly merging the two least probable nodes.
+        Ties are broken in favour of the most recently added node,
+        and the first node taken becomes the left child of the merged node.
+        """
+        tree = cls()
+        heap = [
+            (probability, -tree.add_leaf(symbol))
+            for symbol, probability in probabilities.items()
+        ]
+        heapq.heapify(heap)
+        while len(heap) > 1:
+            left_probability, left = heapq.heappop(heap)
+            right_probability, right = heapq.heappop(heap)
+            node = tree.add_node(-left, -right)
+            heapq.heappush(heap, (left_probability + right_probability, -node))
+        return tree
+
+    def add_leaf(self, symbol: int) -> int:
+        """
+        Adds a leaf and returns its index.
+        """
+        self.left.append(_NO_CHILD)
+        self.right.append(_NO_CHILD)
+        self.symbols.append(symbol)
+        return len(self.symbols) - 1
+
+    def add_node(self, left: int, right: int) -> int:
+        """
+        Adds an internal node with the given children and returns its index.
+        """
+        self.left.append(left)
+        self.right.append(right)
+        self.symbols.append(0)
+        return len(self.symbols) - 1
+
+    @property
+    def root(self) -> int:
+        """
+        The index of the root, which is the last node added.
+        """
+        return len(self.symbols) - 1
+
+    def is_leaf(self, node: int) -> bool:
+        """
+        Tells whether the node is a leaf, which has no children.
+        """
+        return self.left[node] == _NO_CHILD
+
+    def codes(self) -> dict[int, tuple[int, int]]:
+        """
+        Walks the tree and returns the code and the code length of each symbol.
+        """
+        codes = {}
+        if not self.symbols:
+            return codes
+        left, right, symbols = self.left, self.right, self.symbols
+        stack = [(self.root, 0, 0)]
+        while stack:
+            node, code, length = stack.pop()
+            if left[node] == _NO_CHILD:
+                codes[symbols[node]] = (code, length)
+                continue
+            stack.append((left[node], code << 1, length + 1))
+            stack.append((right[node], (code << 1) | 1, length + 1))
+        return codes
+
+    def post_order(self) -> Iterator[int]:
+        """
+        Yields the nodes in post-order, starting from the left.
+        """
+        if not self.symbols:
+            return
+        stack = [(self.root, False)]
+        while stack:
+            node, children_visited = stack.pop()
+            if children_visited or self.is_leaf(node):
+                yield node
+                continue
+            stack.append((node, True))
+            stack.append((self.right[node], False))
+            stack.append((self.left[node], False))
+
+    def to_node(self) -> Node:
+        """
+        Converts the tree into node objects, which print the tree for debugging.
+        """
+        nodes: list[Node] = []
+        for index, symbol in enumerate(self.symbols):
+            if self.is_leaf(index):
+                nodes.append(Node(symbol=symbol))
+                continue
+            left, right = nodes[self.left[index]], nodes[self.right[index]]
+            left.code.append(0)
+            right.code.append(1)
+            nodes.append(Node(left=left, right=right))
+        return nodes[-1]
+
+    def __len__(self) -> int:
+        return len(self.symbols)
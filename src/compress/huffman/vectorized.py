@@ -0,0 +1,157 @@
+"""
+Contains the NumPy implementation of the Huffman encoding,
+used for large inputs when NumPy is installed.
+The output is identical to the pure Python implementation.
+"""
+from typing import Sequence
+
+from compress.common.bits import BitWriter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+AVAILABLE = numpy is not None
+MIN_SIZE = 1 << 14
+"""
+The smallest input encoded with NumPy by default,
+smaller inputs are faster to encode in pure Python.
+"""
+_CHUNK_SIZE = 1 << 20
+"""
+The amount of input bytes encoded at a time.
+"""
+_WORD_BITS = 64
+_SCAN_CHUNK = 1 << 16
+
+
+def require():
+    """
+    Raises ImportError if NumPy is not installed.
+    """
+    if not AVAILABLE:
+        raise ImportError('The vectorized Huffman encoding requires NumPy')
+
+
+def byte_frequencies(data: bytes) -> dict[int, int]:
+    """
+    Counts the bytes of the input with a histogram.
+    The bytes are ordered by their first occurrence like in the pure Python implementation,
+    since the order breaks the ties between equally frequent bytes when the tree is built.
+    """
+    symbols = numpy.frombuffer(data, dtype=numpy.uint8)
+    counts = numpy.bincount(symbols, minlength=256)
+    present = int(numpy.count_nonzero(counts))
+    first_positions: dict[int, int] = {}
+    for start in range(0, len(symbols), _SCAN_CHUNK):
+        chunk_symbols, chunk_positions = numpy.unique(
+            symbols[start: start + _SCAN_CHUNK],
+            return_index=True
+        )
+        for symbol, position in zip(chunk_symbols.tolist(), chunk_positions.tolist()):
+            first_positions.setdefault(symbol, start + position)
+        if len(first_positions) == present:
+            break
+    return {
+        symbol: int(counts[symbol])
+        for symbol in sorted(first_positions, key=first_positions.get)
+    }
+
+
+def encode_codes(data: bytes, codes: Sequence[str], bit_offset: int = 0) -> bytearray:
+    """
+    Replaces every byte of the input with its code and returns the bits packed into bytes,
+    the last byte padded with zero bits.
+    The codes are given as strings of ones and zeros indexed by the symbol,
+    and they are preceded by the given amount of zero bits.
+    """
+    max_length = max(map(len, codes), default=0)
+    if not max_length:
+        return bytearray(1 if bit_offset else 0)
+    if max_length > _WORD_BITS:
+        output_buffer = BitWriter()
+        output_buffer.write_bits(0, bit_offset)
+        output_buffer.write_codes(data, codes)
+        return output_buffer.getbuffer()
+    code_values = numpy.array([int(code, 2) if code else 0 for code in codes], dtype=numpy.uint64)
+    code_lengths = numpy.array([len(code) for code in codes], dtype=numpy.uint64)
+    symbols = numpy.frombuffer(data, dtype=numpy.uint8)
+    packer = _BitPacker(bit_offset)
+    paired_size = 0
+    if 2 * max_length <= _WORD_BITS:
+        paired_size = _pack_pairs(packer, symbols, code_values, code_lengths)
+    for start in range(paired_size, len(symbols), _CHUNK_SIZE):
+        chunk_symbols = symbols[start: start + _CHUNK_SIZE]
+        packer.pack(code_values.take(chunk_symbols), code_lengths.take(chunk_symbols))
+    return packer.getbuffer()
+
+
+def _pack_pairs(packer: '_BitPacker', symbols, code_values, code_lengths) -> int:
+    """
+    Packs the codes of the input read as pairs of bytes, when two codes fit into a 64-bit word.
+    The pairs halve the amount of codes to pack.
+    Returns the amount of bytes packed,
+    the last byte of an odd input is left to be packed on its own.
+    """
+    pair_values = ((code_values[:, numpy.newaxis] << code_lengths) | code_values).ravel()
+    pair_lengths = (code_lengths[:, numpy.newaxis] + code_lengths).ravel()
+    paired_size = len(symbols) & ~1
+    pairs = symbols[:paired_size].view('>u2')
+    for start in range(0, len(pairs), _CHUNK_SIZE // 2):
+        chunk_pairs = pairs[start: start + _CHUNK_SIZE // 2]
+        packer.pack(pair_values.take(chunk_pairs), pair_lengths.take(chunk_pairs))
+    return paired_size
+
+
+class _BitPacker:
+    """
+    Packs codes of at most 64 bits into 64-bit words.
+    The bit offset of each code is the cumulative sum of the code lengths before it.
+    A code falls into at most two words, and the parts falling into the same word are combined
+    with a bitwise or over the consecutive codes sharing the word.
+    The incomplete last word is carried over to the next call.
+    """
+
+    def __init__(self, bit_offset: int = 0):
+        """
+        The codes start after the given amount of zero bits, which must be less than a word.
+        """
+        self._output = bytearray()
+        self._pending_word = numpy.uint64(0)
+        self._bit_offset = bit_offset
+
+    def pack(self, values, lengths):
+        """
+        Packs the codes given as their values and lengths.
+        """
+        ends = numpy.cumsum(lengths)
+        ends += numpy.uint64(self._bit_offset)
+        starts = ends - lengths
+        word_indexes = starts >> 6
+        spans = (starts & 63) + lengths
+        # Shifting by 64 bits or more gives zero,
+        # so each shift only applies on one side of the word boundary.
+        high_parts = (values << (_WORD_BITS - spans)) | (values >> (spans - _WORD_BITS))
+        low_parts = values << (2 * _WORD_BITS - spans)
+        groups = numpy.flatnonzero(word_indexes[1:] != word_indexes[:-1])
+        groups += 1
+        groups = numpy.concatenate(([0], groups))
+        group_words = word_indexes[groups]
+        bit_count = int(ends[-1])
+        words = numpy.zeros(bit_count // _WORD_BITS + 2, dtype=numpy.uint64)
+        words[0] = self._pending_word
+        words[group_words] |= numpy.bitwise_or.reduceat(high_parts, groups)
+        words[group_words + 1] |= numpy.bitwise_or.reduceat(low_parts, groups)
+        complete_words = bit_count // _WORD_BITS
+        self._output += words[:complete_words].astype('>u8').tobytes()
+        self._pending_word = words[complete_words]
+        self._bit_offset = bit_count % _WORD_BITS
+
+    def getbuffer(self) -> bytearray:
+        """
+        Returns the packed bytes, the last byte padded with zero bits.
+        """
+        last_word = numpy.array([self._pending_word], dtype='>u8').tobytes()
+        self._output += last_word[:(self._bit_offset + 7) // 8]
+        return self._output
@@ -1,37 +1,163 @@
 """
-This module is used as an API for developers to encode and decode data with the Lempel-Ziv algorithm.
+This module is used as an API for developers
+to encode and decode data with the Lempel-Ziv algorithm.
 """
-from typing import Optional, Type
+from typing import Iterable, Iterator, Optional, Type, Union
 
-from bitarray import bitarray
+from compress.common import CompressionAlgorithm, Decoder, Encoder, buffers, convert, stats
+from compress.common.bits import BitReader, BitWriter
+from compress.common.buffers import Buffer
+from compress.common.stats import Stats
+from compress.lz.dictionary import Dictionary, train_dictionary
+from compress.lz.hash_chain import HashChainMatchFinder, Level, PrefixIndex
 
-from compress.common import CompressionAlgorithm, Decoder, Encoder, convert
+
+DEFAULT_OFFSET_BITS = 12
+DEFAULT_LENGTH_BITS = 4
+MAX_OFFSET_BITS = 24
+MAX_LENGTH_BITS = 16
 
 
 class LZEncoder(Encoder):
     """
     Functions as the API for compression process.
     Uses the Lempel-Ziv encoding algorithm to compress data.
+    The compression level trades the time spent searching for matches against the compression ratio.
+    The search window holds 2 ** offset_bits - 1 bytes
+    and matches are at most 2 ** length_bits - 1 bytes long.
+    A preset dictionary fills the search window before the data, which helps with small messages.
     """
 
-    def encode(self, data: bytes) -> bytes:
+    def __init__(
+            self,
+            *,
+            level: str = Level.DEFAULT,
+            offset_bits: int = DEFAULT_OFFSET_BITS,
+            length_bits: int = DEFAULT_LENGTH_BITS,
+            dictionary: Optional[Dictionary] = None
+    ):
+        if not 1 <= offset_bits <= MAX_OFFSET_BITS:
+            raise ValueError(f'Offset bits must be between 1 and {MAX_OFFSET_BITS}')
+        if not 2 <= length_bits <= MAX_LENGTH_BITS:
+            raise ValueError(f'Length bits must be between 2 and {MAX_LENGTH_BITS}')
+        self.level = level
+        self.offset_bits = offset_bits
+        self.length_bits = length_bits
+        self.dictionary = dictionary
+
+    def encode(self, data: Buffer) -> bytes:
         """
         Function to call to provide input for the compressor to compress.
         Returns the compressed bytes.
         """
-        encoding_process = _LZEncodingProcess(self, data)
-        return encoding_process.encode()
+        return bytes(self.encode_buffer(data))
+
+    def encode_buffer(self, data: Buffer) -> bytearray:
+        return self._encode(data, b'')
+
+    def encode_many(self, items: Iterable[Buffer]) -> Iterator[bytes]:
+        """
+        The output buffer is reused from one input to the next.
+        """
+        output_buffer = BitWriter()
+        for data in items:
+            output_buffer.clear()
+            yield bytes(self._encode(data, b'', output_buffer))
+
+    @property
+    def history_size(self) -> int:
+        return 2 ** self.offset_bits - 1
+
+    def encode_block(self, data: Buffer, history: bytes) -> bytes:
+        """
+        Encodes a block of a stream, the matches may reach back into the history.
+        """
+        return bytes(self._encode(data, history))
+
+    def _encode(
+            self,
+            data: Buffer,
+            history: bytes,
+            output_buffer: Optional[BitWriter] = None
+    ) -> bytearray:
+        """
+        The match finder indexes the input in place, so buffers other than bytes are not copied.
+        With a history the history and the input are joined, since the matches reach across both.
+        """
+        data = buffers.byte_view(data)
+        prefix_index = None
+        if self.dictionary is not None:
+            if not history:
+                prefix_index = self.dictionary.prefix_index(self.history_size)
+            history = self.dictionary.history(history, self.history_size)
+        run_stats = self.start_stats()
+        encoding_process = _LZEncodingProcess(
+            self,
+            history + data if history else data,
+            start=len(history),
+            run_stats=run_stats,
+            prefix_index=prefix_index
+        )
+        result = encoding_process.encode(output_buffer or BitWriter())
+        self.finish_stats(run_stats, len(data), len(result))
+        return result
 
 
 class LZDecoder(Decoder):
     """
     Functions as the API for decompression process.
     Uses the Lempel-Ziv encoding algorithm to decompress data.
+    Data encoded with a preset dictionary can only be decoded with the same dictionary.
     """
 
-    def decode(self, data: bytes) -> bytes:
-        decoding_process = _LZDecodingProcess(self, data)
-        return decoding_process.decode()
+    def __init__(self, *, dictionary: Optional[Dictionary] = None):
+        self.dictionary = dictionary
+
+    def decode(self, data: Buffer) -> bytes:
+        return bytes(self.decode_buffer(data))
+
+    def decode_buffer(self, data: Buffer) -> Buffer:
+        return self._decode(data, b'')
+
+    def decode_into(self, data: Buffer, output: Buffer) -> int:
+        """
+        Decodes directly into the output buffer without allocating the output.
+        Data encoded with a preset dictionary is decoded after the dictionary
+        and then copied into the output buffer.
+        """
+        data = buffers.byte_view(data)
+        run_stats = self.start_stats()
+        with memoryview(output) as output_view, output_view.cast('B') as output_bytes:
+            with run_stats.stage('decode'):
+                decoding_process = _LZDecodingProcess(self, data, len(output_bytes))
+                output_size = decoding_process.decode_into(output_bytes)
+        self.finish_stats(run_stats, len(data), output_size)
+        return output_size
+
+    def decode_many(self, items: Iterable[Buffer]) -> Iterator[bytes]:
+        """
+        The inputs are decoded into a bytearray reused from one input to the next, which only grows.
+        """
+        output_buffer = bytearray()
+        for data in items:
+            data = buffers.byte_view(data)
+            run_stats = self.start_stats()
+            with run_stats.stage('decode'):
+                result = _LZDecodingProcess(self, data).decode_reusing(output_buffer)
+            self.finish_stats(run_stats, len(data), len(result))
+            yield result
+
+    def decode_block(self, data: Buffer, history: bytes) -> bytes:
+        return bytes(self._decode(data, history))
+
+    def _decode(self, data: Buffer, history: bytes, output_size: Optional[int] = None) -> Buffer:
+        data = buffers.byte_view(data)
+        run_stats = self.start_stats()
+        with run_stats.stage('decode'):
+            decoding_process = _LZDecodingProcess(self, data, output_size, history)
+            result = decoding_process.decode()
+        self.finish_stats(run_stats, len(data), len(result))
+        return result
 
 
 class LZ(CompressionAlgorithm):
@@ -47,9 +173,28 @@ class LZ(CompressionAlgorithm):
     def get_decoder(cls) -> Type[Decoder]:
         return LZDecoder
 
+    @classmethod
+    def train(cls, samples: Iterable[bytes]) -> dict:
+        """
+        Trains a preset dictionary out of the samples.
+        """
+        return {'dictionary': train_dictionary(samples)}
 
-_OFFSET_BITS = 12
-_LENGTH_BITS = 4
+
+_HEADER_FLAG = 0x80
+"""
+Set in the first byte of streams starting with a header.
+Streams without a header always start with a literal, whose flag bit is zero.
+"""
+_FORMAT_VERSION = 1
+_FORMAT_VERSION_DICTIONARY = 2
+"""
+The header is followed by the id of the preset dictionary as a 32-bit integer.
+"""
+_LITERAL_CODES = ['0' + format(byte, '08b') for byte in range(256)]
+"""
+The flag bit followed by the byte itself for every byte written as a literal.
+"""
 
 
 class _LZEncodingProcess:
@@ -57,85 +202,95 @@ class _LZEncodingProcess:
     Protected class to maintain the internal state of a single compression run.
     """
 
-    SEARCH_LIMIT = 2 ** _OFFSET_BITS - 1
-    LOOKAHEAD_LIMIT = 2 ** _LENGTH_BITS - 1
-
-    def __init__(self, compressor: LZEncoder, data: bytes):
+    def __init__(
+            self,
+            compressor: LZEncoder,
+            data: Union[bytes, memoryview],
+            start: int = 0,
+            run_stats: Stats = stats.DISABLED,
+            prefix_index: Optional[PrefixIndex] = None
+    ):
         self._encoder = compressor
         self._original_data = data
-        self._matches: dict[bytes, int] = {}
+        self._start = start
+        self._stats = run_stats
+        self._offset_bits = compressor.offset_bits
+        self._length_bits = compressor.length_bits
+        self._match_finder = HashChainMatchFinder(
+            data,
+            2 ** self._offset_bits - 1,
+            2 ** self._length_bits - 1,
+            min_length=-(-(self._length_bits + self._offset_bits + 8) // 8),
+            level=compressor.level,
+            prefix_index=prefix_index
+        )
 
-    def _find_longest_match(
-            self,
-            index: int,
-            data_bytes: bytes,
-            longest_match_length: int = 0,
-            longest_match_offset: int = 0
-    ) -> tuple[int, int]:
-        """
-        Finds the longest match in the search buffer.
-        """
-        match_index = self.get_match(data_bytes, index - longest_match_length)
-        self.set_match(data_bytes, index - longest_match_length)
-        if match_index is None:
-            return longest_match_length, longest_match_offset
-        longest_match_offset = index - match_index - longest_match_length
-        longest_match_length += 1
-        index += 1
-        if index < self.data_length and longest_match_length < self.LOOKAHEAD_LIMIT:
-            return self._find_longest_match(
-                index,
-                data_bytes + self.get_byte(index),
-                longest_match_length=longest_match_length,
-                longest_match_offset=longest_match_offset
-            )
-        return longest_match_length, longest_match_offset
-
-    def encode(self) -> bytes:
+    def write_header(self, buffer: BitWriter):
         """
-        Used to start the encoding process internally.
+        Writes the format version and the widths of the match fields into a buffer.
         """
-        encoded_buffer = bitarray(endian='big')
-        index = 0
-        while index < self.data_length:
-            found_byte = self.get_byte(index)
-            match_length, left_offset = self._find_longest_match(index, found_byte)
-            if _LENGTH_BITS + _OFFSET_BITS + 8 <= match_length * 8:
-                encoded_buffer.append(1)
-                output_tuple = (match_length << _OFFSET_BITS) | left_offset
-                encoded_buffer.frombytes(convert.tuple_int_to_bytes(output_tuple))
-                index += match_length
-                if index < self.data_length:
-                    byte_to_write = self.original_data[index: index + 1]
-                    encoded_buffer.frombytes(byte_to_write)
-            else:
-                encoded_buffer.append(0)
-                encoded_buffer.frombytes(found_byte)
-            index += 1
-        encoded_buffer.fill()
-        return bytes(encoded_buffer)
+        dictionary = self._encoder.dictionary
+        format_version = _FORMAT_VERSION if dictionary is None else _FORMAT_VERSION_DICTIONARY
+        buffer.write_bits(_HEADER_FLAG | format_version, 8)
+        buffer.write_bits(self._offset_bits, 8)
+        buffer.write_bits(self._length_bits, 8)
+        if dictionary is not None:
+            buffer.write_bits(dictionary.dictionary_id, 32)
 
-    def set_match(self, key, index: int):
+    def encode(self, encoded_buffer: BitWriter) -> bytearray:
         """
-        Saves a byte sequence to dictionary at specified index.
+        Used to start the encoding process internally.
+        The output is written into the given empty buffer.
+        The bytes between the matches are written as literals in bulk,
+        and every match is written together with the literal following it.
         """
-        self._matches[key] = index
+        self.write_header(encoded_buffer)
+        matches = self._match_finder.matches(self._start)
+        if self._stats.enabled:
+            with self._stats.stage('match_search'):
+                matches = list(matches)
+            self.count_matches(matches)
+        with self._stats.stage('bit_packing'):
+            self.write_tokens(encoded_buffer, matches)
+        return encoded_buffer.getbuffer()
 
-    def get_match(self, key, index: int) -> Optional[int]:
+    def write_tokens(self, encoded_buffer: BitWriter, matches: Iterable[tuple[int, int, int]]):
         """
-        Returns the index where key was last encountered in the original data.
+        Writes the matches and the literals between them into a buffer.
         """
-        found_index = self._matches.get(key, None)
-        if found_index is not None and (found_index < index - self.SEARCH_LIMIT or found_index >= index):
-            del self._matches[key]
-            return None
-        return found_index
+        original_data = self.original_data
+        data_length = self.data_length
+        offset_bits = self._offset_bits
+        tuple_bits = self._length_bits + offset_bits
+        match_flag = 1 << tuple_bits
+        index = self._start
+        for match_index, match_length, left_offset in matches:
+            encoded_buffer.write_codes(original_data[index: match_index], _LITERAL_CODES)
+            output_tuple = match_flag | (match_length << offset_bits) | left_offset
+            index = match_index + match_length
+            if index < data_length:
+                encoded_buffer.write_bits(
+                    (output_tuple << 8) | original_data[index],
+                    tuple_bits + 9
+                )
+            else:
+                encoded_buffer.write_bits(output_tuple, tuple_bits + 1)
+            index += 1
+        encoded_buffer.write_codes(original_data[index:], _LITERAL_CODES)
 
-    def get_byte(self, index: int) -> bytes:
+    def count_matches(self, matches: list[tuple[int, int, int]]):
         """
-        Returns a byte from the original data at specified index.
+        Records how many of the bytes were found in the search window and how long the matches were.
         """
-        return convert.char_int_to_bytes(self.original_data[index])
+        input_length = self.data_length - self._start
+        matched_bytes = sum(match_length for _, match_length, _ in matches)
+        run_stats = self._stats
+        run_stats.count('matches', len(matches))
+        run_stats.count('matched_bytes', matched_bytes)
+        run_stats.count('literals', input_length - matched_bytes)
+        run_stats.count('match_hit_rate', matched_bytes / input_length if input_length else 0.0)
+        run_stats.count('average_match_length', matched_bytes / len(matches) if matches else 0.0)
+        run_stats.count('hash_table_size', self._match_finder.table_size)
 
     @property
     def original_data(self):
@@ -154,35 +309,163 @@ class _LZEncodingProcess:
 
 class _LZDecodingProcess:
 
-    def __init__(self, decoder: LZDecoder, data: bytes):
+    def __init__(
+            self,
+            decoder: LZDecoder,
+            data: bytes,
+            output_size: Optional[int] = None,
+            history: bytes = b''
+    ):
         self._decoder = decoder
         self._original_data = data
+        self._output_size = output_size
+        self._history = history
+        self._offset_bits = DEFAULT_OFFSET_BITS
+        self._length_bits = DEFAULT_LENGTH_BITS
+        self._header_bytes = 0
+        if data and data[0] & _HEADER_FLAG:
+            self.read_header()
 
-    def decode(self) -> bytes:
+    def read_header(self):
+        """
+        Configures the decoder with the widths of the match fields stored in the header.
+        If the data was encoded with a preset dictionary,
+        the dictionary is placed before the history.
+        """
+        format_version = self._original_data[0] & ~_HEADER_FLAG
+        if format_version not in (_FORMAT_VERSION, _FORMAT_VERSION_DICTIONARY):
+            raise ValueError(f'Unsupported Lempel-Ziv format version: {format_version}')
+        self._offset_bits = self._original_data[1]
+        self._length_bits = self._original_data[2]
+        self._header_bytes = 3
+        if format_version == _FORMAT_VERSION_DICTIONARY:
+            dictionary_id = convert.bytes_to_int(self._original_data[3:7])
+            dictionary = self._decoder.dictionary
+            if dictionary is None or dictionary.dictionary_id != dictionary_id:
+                raise ValueError(
+                    f'The data was encoded with the preset dictionary {dictionary_id:08x}'
+                )
+            self._history = dictionary.history(self._history, 2 ** self._offset_bits - 1)
+            self._header_bytes = 7
+
+    def decode(self) -> Buffer:
         """
         Performs the decoding of the input data.
+        The history is left out of the returned output without copying the output.
         """
-        data_in_bits = bitarray(endian='big')
-        data_in_bits.frombytes(self._original_data)
-        output_buffer = bytearray()
-        index = 0
-        while index < len(data_in_bits):
-            bit_flag = data_in_bits[index]
-            index += 1
-            if bit_flag == 1:
-                match_length = convert.bytes_to_char_int(
-                    data_in_bits[index: index + _LENGTH_BITS].tobytes()) >> _LENGTH_BITS
-                index += _LENGTH_BITS
-                offset = convert.bytes_to_char_int(data_in_bits[index: index + _OFFSET_BITS].tobytes()) >> _LENGTH_BITS
-                index += _OFFSET_BITS
-                if match_length > 0:
-                    for _ in range(match_length):
-                        start = len(output_buffer) - offset
-                        end = start + 1
-                        bytes_to_write = bytes(output_buffer[start: end])
-                        output_buffer.extend(bytes_to_write)
-            if index + 8 <= len(data_in_bits):
-                final_byte = data_in_bits[index: index + 8].tobytes()
-                output_buffer.extend(final_byte)
-            index += 8
-        return bytes(output_buffer)
+        output_size = self._output_size
+        if output_size is None:
+            output_size = 2 * (len(self._original_data) - self._header_bytes)
+        output_buffer = bytearray(self._history)
+        output_buffer += bytes(output_size)
+        del output_buffer[self._decode_tokens(output_buffer, len(self._history)):]
+        if self._history:
+            return memoryview(output_buffer)[len(self._history):]
+        return output_buffer
+
+    def decode_into(self, output: memoryview) -> int:
+        """
+        Decodes into the start of the output buffer and returns the amount of bytes written.
+        The history has to precede the output,
+        so with a history the output is copied into the output buffer.
+        """
+        if self._history:
+            return buffers.copy_into(self.decode(), output)
+        return self._decode_tokens(output, 0)
+
+    def decode_reusing(self, output_buffer: bytearray) -> bytes:
+        """
+        Decodes into the start of the given bytearray and returns a copy of the output.
+        The bytearray grows when the output does not fit, and is left as it is for the next input.
+        The history has to precede the output, so with a history a new output is allocated instead.
+        """
+        if self._history:
+            return bytes(self.decode())
+        size_hint = 2 * (len(self._original_data) - self._header_bytes)
+        if len(output_buffer) < size_hint:
+            output_buffer.extend(bytes(size_hint - len(output_buffer)))
+        output_size = self._decode_tokens(output_buffer, 0)
+        with memoryview(output_buffer) as output_view:
+            return bytes(output_view[:output_size])
+
+    def _decode_tokens(self, output_buffer: Union[bytearray, memoryview], output_index: int) -> int:
+        """
+        Decodes the input into the output buffer from the given index
+        and returns the index after the output.
+        The flag bit and the byte after it are read as a single 9-bit token,
+        so a literal takes one read, and the matches are copied as whole slices of the output.
+        A bytearray grows when the output does not fit into it, any other buffer raises ValueError.
+        """
+        input_buffer = BitReader(self._original_data, self._header_bytes)
+        read_bits = input_buffer.read_bits
+        remaining_bits = input_buffer.bits_remaining
+        offset_bits = self._offset_bits
+        offset_mask = (1 << offset_bits) - 1
+        tuple_bits = self._length_bits + offset_bits
+        while remaining_bits > 0:
+            if remaining_bits >= 9:
+                token = read_bits(9)
+                remaining_bits -= 9
+                if token < 0x100:
+                    try:
+                        output_buffer[output_index] = token
+                    except IndexError:
+                        _grow(output_buffer)
+                        output_buffer[output_index] = token
+                    output_index += 1
+                    continue
+                combined = ((token & 0xFF) << tuple_bits) | read_bits(tuple_bits)
+                output_tuple = combined >> 8
+                literal = combined & 0xFF
+            else:
+                # The literal is missing after a match at the end of the input, the rest is padding.
+                remaining_bits -= 9
+                if not read_bits(1):
+                    break
+                output_tuple = read_bits(tuple_bits)
+                literal = 0
+            remaining_bits -= tuple_bits
+            match_length = output_tuple >> offset_bits
+            start = output_index - (output_tuple & offset_mask)
+            end = start + match_length
+            if 0 <= start and end <= output_index:
+                output_buffer[output_index: output_index + match_length] = output_buffer[start: end]
+            elif match_length:
+                if not 0 <= start < output_index:
+                    raise ValueError('Invalid match offset in the input data')
+                output_buffer[output_index: output_index + match_length] = _repeat(
+                    output_buffer[start: output_index], match_length
+                )
+            output_index += match_length
+            if remaining_bits >= 0:
+                try:
+                    output_buffer[output_index] = literal
+                except IndexError:
+                    _grow(output_buffer)
+                    output_buffer[output_index] = literal
+                output_index += 1
+        return output_index
+
+
+def _grow(output_buffer: Union[bytearray, memoryview]):
+    """
+    Doubles the size of a bytearray holding the output.
+    Raises ValueError for other buffers, which can not grow.
+    """
+    if not isinstance(output_buffer, bytearray):
+        raise ValueError(
+            f'The output buffer holds {len(output_buffer)} bytes, but more bytes were produced'
+        )
+    output_buffer.extend(bytes(len(output_buffer) + 1))
+
+
+def _repeat(pattern: Buffer, length: int) -> bytearray:
+    """
+    Repeats the pattern until it is as long as the given length.
+    Used for matches overlapping the bytes they copy,
+    the copied run is doubled instead of copying byte by byte.
+    """
+    repeated = bytearray(pattern)
+    repeated *= -(-length // len(repeated))
+    del repeated[length:]
+    return repeated
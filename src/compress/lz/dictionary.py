@@ -0,0 +1,110 @@
+"""
+Contains the preset dictionaries of the Lempel-Ziv algorithm
+and the trainer building them out of sample data.
+"""
+import heapq
+import zlib
+from collections import Counter
+from typing import Iterable
+
+from compress.lz.hash_chain import PrefixIndex
+
+DEFAULT_SIZE = 4095
+"""
+Fills the whole search window of the default configuration.
+"""
+_GRAM_SIZE = 6
+_SEGMENT_SIZE = 32
+
+
+class Dictionary:
+    """
+    Data that precedes every message in the search window,
+    so that even the first bytes of a message can be matched.
+    The dictionary is identified by the CRC-32 of its data, which is stored in the encoded data.
+    """
+
+    def __init__(self, data: bytes):
+        self.data = bytes(data)
+        self.dictionary_id = zlib.crc32(self.data)
+        self._prefix_indexes: dict[int, PrefixIndex] = {}
+
+    def history(self, history: bytes, size: int) -> bytes:
+        """
+        Returns the history preceded by the dictionary, limited to the size of the search window.
+        """
+        if len(history) >= size:
+            return history[len(history) - size:]
+        return (self.data + history)[-size:]
+
+    def prefix_index(self, size: int) -> PrefixIndex:
+        """
+        Returns the dictionary indexed for the search window of the given size.
+        The index is built once and shared by all the messages encoded with the dictionary.
+        """
+        if size not in self._prefix_indexes:
+            self._prefix_indexes[size] = PrefixIndex(self.history(b'', size))
+        return self._prefix_indexes[size]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Dictionary) and other.data == self.data
+
+    def __hash__(self) -> int:
+        return self.dictionary_id
+
+
+def train_dictionary(
+        samples: Iterable[bytes],
+        size: int = DEFAULT_SIZE,
+        *,
+        segment_size: int = _SEGMENT_SIZE
+) -> Dictionary:
+    """
+    Builds a dictionary out of the segments of the samples
+    covering the most byte sequences shared between the samples.
+    Every sequence is counted once per sample,
+    and a sequence only counts towards the first segment covering it.
+    The segments are picked greedily,
+    and the best ones are placed at the end of the dictionary, closest to the data.
+    """
+    samples = [bytes(sample) for sample in samples]
+    frequencies: Counter[bytes] = Counter()
+    for sample in samples:
+        frequencies.update(_grams(sample))
+    covered: set[bytes] = set()
+
+    def score(segment: bytes) -> int:
+        return sum(frequencies[gram] for gram in _grams(segment) - covered if frequencies[gram] > 1)
+
+    step = max(segment_size // 4, 1)
+    segments = {
+        sample[position: position + segment_size]: None
+        for sample in samples
+        for position in range(0, max(len(sample) - segment_size, 0) + 1, step)
+    }
+    candidates = [(-score(segment), segment) for segment in segments]
+    heapq.heapify(candidates)
+    chosen = []
+    total_size = 0
+    while candidates and total_size < size:
+        _, segment = heapq.heappop(candidates)
+        current_score = score(segment)
+        if not current_score:
+            continue
+        if candidates and current_score < -candidates[0][0]:
+            heapq.heappush(candidates, (-current_score, segment))
+            continue
+        covered.update(_grams(segment))
+        chosen.append(segment)
+        total_size += len(segment)
+    return Dictionary(b''.join(reversed(chosen))[-size:] if size else b'')
+
+
+def _grams(data: bytes) -> set[bytes]:
+    """
+    Returns the distinct byte sequences of the gram size found in the data.
+    """
+    return {data[index: index + _GRAM_SIZE] for index in range(len(data) - _GRAM_SIZE + 1)}
@@ -0,0 +1,185 @@
+"""
+Contains the hash chain match finder used by the Lempel-Ziv encoder.
+"""
+from typing import Iterator, Optional, Union
+
+MIN_MATCH = 3
+"""
+The amount of bytes packed into a hash key, which is also the shortest match that can be found.
+"""
+
+
+class Level:
+    """
+    Contains all the compression levels the user can choose from.
+    Higher levels follow the hash chains further to find longer matches.
+    """
+    FAST = 'fast'
+    DEFAULT = 'default'
+    MAX = 'max'
+
+
+_CHAIN_DEPTHS: dict[str, int] = {
+    Level.FAST: 4,
+    Level.DEFAULT: 32,
+    Level.MAX: 1024,
+}
+
+
+_NO_POSITION = -1 << 62
+"""
+Marks a missing position, it is always outside of the search window.
+"""
+
+
+class PrefixIndex:
+    """
+    The positions of a prefix indexed in advance,
+    so that the runs starting with the same prefix do not index it again.
+    """
+
+    def __init__(self, prefix: bytes):
+        self.prefix = prefix
+        self.head: dict[int, int] = {}
+        self.previous: list[int] = []
+        for index in range(len(prefix) - MIN_MATCH + 1):
+            key = (prefix[index] << 16) | (prefix[index + 1] << 8) | prefix[index + 2]
+            self.previous.append(self.head.get(key, _NO_POSITION))
+            self.head[key] = index
+
+    def chains(self, size: int) -> list[int]:
+        """
+        Returns a copy of the chains extended to the given size.
+        """
+        return self.previous + [_NO_POSITION] * (size - len(self.previous))
+
+
+class HashChainMatchFinder:
+    """
+    Finds the longest earlier occurrences of the bytes in the data within the search window.
+    Positions are indexed by their first bytes, and positions sharing the same bytes are
+    chained from newest to oldest, so only real candidates are compared.
+    The first bytes are packed into an integer key, so the data is indexed in place
+    whether it is bytes or a memoryview of any other buffer.
+    """
+
+    def __init__(
+            self,
+            data: Union[bytes, memoryview],
+            window_size: int,
+            max_length: int,
+            min_length: int = MIN_MATCH,
+            level: str = Level.DEFAULT,
+            prefix_index: Optional[PrefixIndex] = None
+    ):
+        """
+        The data may start with a prefix indexed in advance, which has to fit in the search window.
+        """
+        if level not in _CHAIN_DEPTHS:
+            raise ValueError(f'Unknown compression level: {level}')
+        self._data = data
+        self._window_size = window_size
+        self._max_length = max_length
+        self._min_length = max(min_length, MIN_MATCH)
+        self._chain_depth = _CHAIN_DEPTHS[level]
+        self._insert_matches = level != Level.FAST
+        self._chain_mask = (1 << min(window_size, len(data)).bit_length()) - 1
+        if prefix_index is None:
+            self._head: dict[int, int] = {}
+            self._previous: list[int] = [_NO_POSITION] * (self._chain_mask + 1)
+            self._indexed = 0
+        else:
+            self._head = dict(prefix_index.head)
+            self._previous = prefix_index.chains(self._chain_mask + 1)
+            self._indexed = len(prefix_index.previous)
+
+    @property
+    def table_size(self) -> int:
+        """
+        The amount of distinct byte sequences indexed in the hash table.
+        """
+        return len(self._head)
+
+    def matches(self, start: int = 0) -> Iterator[tuple[int, int, int]]:
+        """
+        Parses the data greedily from the start index
+        and yields the index, the length and the distance of every match.
+        The bytes before the start are only indexed, so that they can be matched.
+        Every match is followed by a single literal byte, so the search continues after that byte.
+        """
+        self.insert(self._indexed, start)
+        data = self._data
+        last_index = len(data) - MIN_MATCH
+        head = self._head
+        previous = self._previous
+        chain_mask = self._chain_mask
+        window_size = self._window_size
+        min_length = self._min_length
+        index = start
+        while index <= last_index:
+            key = (data[index] << 16) | (data[index + 1] << 8) | data[index + 2]
+            candidate = head.get(key, _NO_POSITION)
+            previous[index & chain_mask] = candidate
+            head[key] = index
+            if candidate < index - window_size:
+                index += 1
+                continue
+            length, distance = self._longest_match(index, candidate)
+            if length < min_length:
+                index += 1
+                continue
+            yield index, length, distance
+            end = index + length + 1
+            if self._insert_matches:
+                self.insert(index + 1, end)
+            index = end
+
+    def _longest_match(self, index: int, candidate: int) -> tuple[int, int]:
+        """
+        Follows the hash chain from the candidate and returns the length
+        and the distance of the longest match.
+        """
+        data = self._data
+        max_length = min(self._max_length, len(data) - index)
+        limit = index - self._window_size
+        previous = self._previous
+        chain_mask = self._chain_mask
+        depth = self._chain_depth
+        best_length = MIN_MATCH - 1
+        best_distance = 0
+        target = data[index: index + max_length]
+        while candidate >= limit and depth:
+            if data[candidate + best_length] == data[index + best_length]:
+                if data[candidate: candidate + max_length] == target:
+                    return max_length, index - candidate
+                length = MIN_MATCH
+                while (
+                    data[candidate + length: candidate + length + 16]
+                    == data[index + length: index + length + 16]
+                ):
+                    length += 16
+                while data[candidate + length] == data[index + length]:
+                    length += 1
+                if length > best_length:
+                    best_length = length
+                    best_distance = index - candidate
+            next_candidate = previous[candidate & chain_mask]
+            if next_candidate >= candidate:
+                break
+            candidate = next_candidate
+            depth -= 1
+        return best_length, best_distance
+
+    def insert(self, start: int, end: int):
+        """
+        Indexes the positions from start to end, so that later positions can match them.
+        """
+        data = self._data
+        end = min(end, len(data) - MIN_MATCH + 1)
+        head = self._head
+        previous = self._previous
+        chain_mask = self._chain_mask
+        for index in range(start, end):
+            key = (data[index] << 16) | (data[index + 1] << 8) | data[index + 2]
+            previous[index & chain_mask] = head.get(key, _NO_POSITION)
+            head[key] = index
@@ -1,26 +1,70 @@
 """
-This module is used as an API for developers to encode and decode data with the Lempel-Ziv-Huffman algorithm.
+This module is used as an API for developers to encode and decode data
+with the Lempel-Ziv-Huffman algorithm.
 """
-from typing import Type
+from typing import Optional, Type
 
-from compress.common import CompressionAlgorithm, Decoder, Encoder
+from compress.common import CompressionAlgorithm, Decoder, Encoder, buffers
+from compress.common.buffers import Buffer
 from compress.huffman import HuffmanEncoder, HuffmanDecoder
 from compress.lz import LZEncoder, LZDecoder
+from compress.lz.dictionary import Dictionary
 
 
 class LZHEncoder(Encoder):
     """
     Functions as the API for compression process.
     Uses the Lempel-Ziv-Huffman encoding algorithm to compress data.
+    The options canonical and max_code_length are passed on to the Huffman encoder,
+    the other options, such as level, offset_bits, length_bits and dictionary,
+    are passed on to the Lempel-Ziv encoder.
     """
 
-    def encode(self, data: bytes) -> bytes:
+    def __init__(
+            self,
+            *,
+            canonical: bool = False,
+            max_code_length: Optional[int] = None,
+            **lz_options
+    ):
+        self._lz_encoder = LZEncoder(**lz_options)
+        self._huffman_encoder = HuffmanEncoder(canonical=canonical, max_code_length=max_code_length)
+
+    def encode(self, data: Buffer) -> bytes:
         """
         Function to call to provide input for the compressor to compress.
         Returns the compressed bytes.
         """
-        lz_encoded = LZEncoder().encode(data)
-        huffman_encoded = HuffmanEncoder().encode(lz_encoded)
+        return bytes(self.encode_buffer(data))
+
+    def encode_buffer(self, data: Buffer) -> bytearray:
+        return self._encode(data, b'')
+
+    @property
+    def history_size(self) -> int:
+        return self._lz_encoder.history_size
+
+    def encode_block(self, data: Buffer, history: bytes) -> bytes:
+        """
+        Encodes a block of a stream, the Lempel-Ziv matches may reach back into the history.
+        """
+        return bytes(self._encode(data, history))
+
+    def _encode(self, data: Buffer, history: bytes) -> bytearray:
+        """
+        The output of the Lempel-Ziv encoder is passed on to the Huffman encoder without copying it.
+        """
+        data = buffers.byte_view(data)
+        run_stats = self.start_stats()
+        with run_stats.stage('lz'):
+            if history:
+                lz_encoded = self._lz_encoder.encode_block(data, history)
+            else:
+                lz_encoded = self._lz_encoder.encode_buffer(data)
+        with run_stats.stage('huffman'):
+            huffman_encoded = self._huffman_encoder.encode_buffer(lz_encoded)
+        run_stats.count('lz_bytes', len(lz_encoded))
+        self.finish_stats(run_stats, len(data), len(huffman_encoded))
         return huffman_encoded
 
 
@@ -28,11 +72,37 @@ class LZHDecoder(Decoder):
     """
     Functions as the API for decompression process.
     Uses the Lempel-Ziv-Huffman encoding algorithm to decompress data.
+    Data encoded with a preset dictionary can only be decoded with the same dictionary.
     """
 
-    def decode(self, data: bytes) -> bytes:
-        lz_encoded = HuffmanDecoder().decode(data)
-        decoded = LZDecoder().decode(lz_encoded)
+    def __init__(self, *, dictionary: Optional[Dictionary] = None):
+        self._huffman_decoder = HuffmanDecoder()
+        self._lz_decoder = LZDecoder(dictionary=dictionary)
+
+    def decode(self, data: Buffer) -> bytes:
+        return bytes(self.decode_buffer(data))
+
+    def decode_buffer(self, data: Buffer) -> Buffer:
+        return self._decode(data, b'')
+
+    def decode_block(self, data: Buffer, history: bytes) -> bytes:
+        return bytes(self._decode(data, history))
+
+    def _decode(self, data: Buffer, history: bytes) -> Buffer:
+        """
+        The output of the Huffman decoder is passed on to the Lempel-Ziv decoder without copying it.
+        """
+        data = buffers.byte_view(data)
+        run_stats = self.start_stats()
+        with run_stats.stage('huffman'):
+            lz_encoded = self._huffman_decoder.decode_buffer(data)
+        with run_stats.stage('lz'):
+            if history:
+                decoded = self._lz_decoder.decode_block(lz_encoded, history)
+            else:
+                decoded = self._lz_decoder.decode_buffer(lz_encoded)
+        run_stats.count('lz_bytes', len(lz_encoded))
+        self.finish_stats(run_stats, len(data), len(decoded))
         return decoded
 
 
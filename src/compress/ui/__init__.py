@@ -2,8 +2,14 @@
 This module is responsible for rendering the command line interface.
 """
 import getopt
+import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
+from typing import Iterable, Iterator, Optional
 
+from compress import container
 from compress.common import io, CompressionAlgorithm
 from compress.hlz import HLZ
 from compress.huffman import Huffman
@@ -20,6 +26,9 @@ class Commands:
     OUTPUT_FILE = 'output_file'
     FILE = 'file'
     METHOD = 'method'
+    BLOCK_SIZE = 'block_size'
+    JOBS = 'jobs'
+    OVERWRITE = 'overwrite'
 
 
 class Algorithm:
@@ -40,6 +49,12 @@ class Method:
     DECODE = 'decode'
 
 
+STANDARD_STREAM = '-'
+"""
+Given instead of a file path to read the standard input or to write the standard output.
+"""
+READ_SIZE = 1 << 16
+
 _ALGORITHMS: dict[str, CompressionAlgorithm] = {
     Algorithm.LZ77: LZ,
     Algorithm.HUFFMAN: Huffman,
@@ -69,6 +84,9 @@ _OPTIONS: dict[str, _CommandLineArgument] = {
     Commands.OUTPUT_FILE: _CommandLineArgument(short='o:', long='output_file=', hint='output_file'),
     Commands.FILE: _CommandLineArgument(short='f:', long='file=', hint='file'),
     Commands.METHOD: _CommandLineArgument(short='m:', long='method=', hint='method'),
+    Commands.BLOCK_SIZE: _CommandLineArgument(short='b:', long='block_size=', hint='block_size'),
+    Commands.JOBS: _CommandLineArgument(short='j:', long='jobs=', hint='jobs'),
+    Commands.OVERWRITE: _CommandLineArgument(short='w', long='overwrite'),
 }
 
 
@@ -76,16 +94,19 @@ class EncoderProgram:
     """
     Class used to initialize the command line interface.
     It will process command line arguments and interpret them as commands.
+    Positional arguments switch the program into batch mode,
+    where every file is processed concurrently.
     """
 
     def __init__(self, arg_list: list[str]):
         super().__init__()
-        options, _ = _parse_args(arg_list)
+        options, args = _parse_args(arg_list)
         self._options = compose_options_dict(options)
         self._program_path = arg_list[0]
         self._arg_list = arg_list[1:]
         self._input_file = self._options.get(Commands.FILE, None)
-        if not self._input_file:
+        self._batch_inputs = args
+        if not self._input_file and not self._batch_inputs:
             print(help_string(self._program_path))
             sys.exit(-1)
 
@@ -95,31 +116,85 @@ class EncoderProgram:
         """
         if Commands.HELP in self._options:
             print(help_string(self._program_path))
-        data = self._get_data()
-        compression_algorithm = self._get_compression_algorithm()
-        method = self._get_method()
-        if method == Method.DECODE:
-            result = compression_algorithm.get_decoder()().decode(data)
+        if self._batch_inputs:
+            self._start_batch()
+            return
+        if self._input_file == STANDARD_STREAM:
+            default_output_file = STANDARD_STREAM
         else:
-            result = compression_algorithm.get_encoder()().encode(data)
-        output_file_path = self._options.get(Commands.OUTPUT_FILE, f'{self._input_file}.output')
+            default_output_file = f'{self._input_file}.output'
+        output_file_path = self._options.get(Commands.OUTPUT_FILE, default_output_file)
         try:
-            io.write_file(output_file_path, result)
+            process_file(
+                self._input_file,
+                output_file_path,
+                self._get_compression_algorithm(),
+                self._get_method(),
+                block_size=self._get_block_size(),
+                jobs=self._get_jobs(),
+                overwrite=Commands.OVERWRITE in self._options
+            )
         except FileExistsError:
-            print(f'File {output_file_path} already exists')
-            sys.exit(-1)
+            _exit_with_error(f'File {output_file_path} already exists')
+        except FileNotFoundError:
+            _exit_with_error(f'Could not read file {self._input_file}')
         except IOError:
-            print(f'Could not write to file {output_file_path}')
-            sys.exit(-1)
+            _exit_with_error(f'Could not write to file {output_file_path}')
+        except ValueError as error:
+            _exit_with_error(f'Could not process file {self._input_file}: {error}')
 
-    def _get_data(self) -> bytes:
+    def _start_batch(self):
         """
-        Read the entire file the user provided as an input.
+        Processes all the files given as positional arguments,
+        directories are processed recursively.
+        The files are divided between the worker processes, one per core unless chosen otherwise,
+        and the total throughput is reported at the end.
         """
+        input_files = [self._input_file] if self._input_file else []
+        input_files += self._batch_inputs
+        output_directory = self._options.get(Commands.OUTPUT_FILE, None)
         try:
-            return io.read_file(self._input_file)
-        except IOError:
-            print(f'Could not read file {self._input_file}')
+            file_pairs = list(_batch_files(input_files, output_directory))
+        except ValueError as error:
+            _exit_with_error(str(error))
+        compression_algorithm = self._get_compression_algorithm()
+        method = self._get_method()
+        block_size = self._get_block_size()
+        overwrite = Commands.OVERWRITE in self._options
+        start_time = time.perf_counter()
+        input_size = 0
+        output_size = 0
+        failures = 0
+        with ProcessPoolExecutor(self._get_jobs(os.cpu_count() or 1)) as executor:
+            futures = {
+                executor.submit(
+                    process_file,
+                    input_file,
+                    output_file,
+                    compression_algorithm,
+                    method,
+                    block_size=block_size,
+                    overwrite=overwrite
+                ): (input_file, output_file)
+                for input_file, output_file in file_pairs
+            }
+            for future in as_completed(futures):
+                input_file, output_file = futures[future]
+                try:
+                    future.result()
+                except (IOError, ValueError) as error:
+                    failures += 1
+                    print(f'Could not process file {input_file}: {error}', file=sys.stderr)
+                    continue
+                input_size += os.path.getsize(input_file)
+                output_size += os.path.getsize(output_file)
+        total_time = time.perf_counter() - start_time
+        size_mb = input_size / 1024 / 1024
+        output_mb = output_size / 1024 / 1024
+        speed = size_mb / total_time if total_time else 0
+        print(f'{len(file_pairs) - failures} files, {size_mb:.3f} MB in, {output_mb:.3f} MB out')
+        print(f'{total_time:.4f} seconds, {speed:.3f} MB/s')
+        if failures:
             sys.exit(-1)
 
     def _get_compression_algorithm(self) -> CompressionAlgorithm:
@@ -132,6 +207,29 @@ class EncoderProgram:
             compression_algorithm = _ALGORITHMS.get(Algorithm.LZ77)
         return compression_algorithm
 
+    def _get_block_size(self) -> int:
+        """
+        Returns the block size the user chose for the container.
+        """
+        block_size_option = self._options.get(Commands.BLOCK_SIZE, None)
+        if not block_size_option:
+            return container.DEFAULT_BLOCK_SIZE
+        block_size = int(block_size_option) if block_size_option.isdigit() else 0
+        if not 0 < block_size <= container.MAX_BLOCK_SIZE:
+            _exit_with_error(f'Invalid block size {block_size_option}')
+        return block_size
+
+    def _get_jobs(self, default: int = 1) -> int:
+        """
+        Returns the amount of worker processes the user chose.
+        """
+        jobs_option = self._options.get(Commands.JOBS, None)
+        if not jobs_option:
+            return default
+        if not jobs_option.isdigit() or int(jobs_option) < 1:
+            _exit_with_error(f'Invalid amount of jobs {jobs_option}')
+        return int(jobs_option)
+
     def _get_method(self):
         """
         Returns the method the user chose for processsing the input.
@@ -142,6 +240,132 @@ class EncoderProgram:
         return method
 
 
+def process_file(
+        input_file: str,
+        output_file: str,
+        compression_algorithm: CompressionAlgorithm,
+        method: str,
+        *,
+        block_size: int = container.DEFAULT_BLOCK_SIZE,
+        jobs: int = 1,
+        overwrite: bool = False
+):
+    """
+    Encodes or decodes a single file, "-" stands for the standard input or output.
+    Files are memory-mapped and the standard streams are read in chunks,
+    the output is written as the blocks are produced,
+    so the memory use does not depend on the size of the data.
+    An output file is removed if the run fails, so no incomplete file is left behind.
+    """
+    with ExitStack() as stack:
+        if input_file == STANDARD_STREAM:
+            data = None
+            input_stream = sys.stdin.buffer
+        else:
+            data = stack.enter_context(io.mapped_file(input_file))
+            input_stream = None
+        if method == Method.ENCODE:
+            if output_file == STANDARD_STREAM:
+                output_stream = sys.stdout.buffer
+            else:
+                output_stream = stack.enter_context(io.new_file(output_file, overwrite=overwrite))
+            with container.ContainerWriter(
+                    output_stream,
+                    compression_algorithm,
+                    block_size,
+                    workers=jobs
+            ) as writer:
+                if data is not None:
+                    with memoryview(data) as data_view:
+                        writer.write(data_view)
+                else:
+                    for chunk in iter(lambda: input_stream.read(READ_SIZE), b''):
+                        writer.write(chunk)
+            output_stream.flush()
+            return
+        if data is None:
+            header, input_stream = io.peek_stream(input_stream, len(container.MAGIC))
+            if container.is_container(header):
+                reader = container.ContainerReader(input_stream, workers=jobs)
+                _write_output(output_file, reader.blocks(), overwrite)
+            else:
+                result = compression_algorithm.get_decoder()().decode(input_stream.read())
+                _write_output(output_file, [result], overwrite)
+        elif container.is_container(data):
+            reader = container.ContainerReader(data, workers=jobs)
+            if output_file == STANDARD_STREAM or not reader.flags & container.FLAG_INDEX:
+                _write_output(output_file, reader.blocks(), overwrite)
+                return
+            with io.mapped_output(
+                    output_file,
+                    reader.original_size(),
+                    overwrite=overwrite
+            ) as output:
+                position = 0
+                for block in reader.blocks():
+                    output[position: position + len(block)] = block
+                    position += len(block)
+        else:
+            with memoryview(data) as data_view:
+                result = compression_algorithm.get_decoder()().decode(data_view)
+            _write_output(output_file, [result], overwrite)
+
+
+def _write_output(output_file: str, chunks: Iterable[bytes], overwrite: bool):
+    """
+    Writes the chunks into the output file or the standard output as they are produced.
+    """
+    if output_file != STANDARD_STREAM:
+        io.write_chunks(output_file, chunks, overwrite=overwrite)
+        return
+    for chunk in chunks:
+        sys.stdout.buffer.write(chunk)
+    sys.stdout.buffer.flush()
+
+
+def _batch_files(
+        input_files: list[str],
+        output_directory: Optional[str]
+) -> Iterator[tuple[str, str]]:
+    """
+    Lists the files to process in batch mode and the output file of each of them.
+    The directories are walked recursively, and their structure is mirrored in the output directory.
+    Directories require an output directory,
+    otherwise the outputs would be written into the directories being walked
+    and picked up as inputs by the next run.
+    """
+    for input_file in input_files:
+        if os.path.isdir(input_file):
+            if output_directory is None:
+                raise ValueError(
+                    f'An output directory is required to process the directory {input_file}'
+                )
+            base_directory = input_file
+            file_paths = sorted(
+                os.path.join(directory, file_name)
+                for directory, _, file_names in os.walk(input_file)
+                for file_name in file_names
+            )
+        else:
+            base_directory = os.path.dirname(input_file)
+            file_paths = [input_file]
+        for file_path in file_paths:
+            if output_directory is None:
+                yield file_path, f'{file_path}.output'
+            else:
+                relative_path = os.path.relpath(file_path, base_directory)
+                yield file_path, os.path.join(output_directory, f'{relative_path}.output')
+
+
+def _exit_with_error(message: str):
+    """
+    Prints the error into the standard error,
+    so that it does not mix with data written into the standard output.
+    """
+    print(message, file=sys.stderr)
+    sys.exit(-1)
+
+
 def _parse_args(arg_list: list[str]) -> tuple[list[tuple[str, str]], list[str]]:
     """
     Parses the command line argument while conforming to the GNU CLI standards.
@@ -191,5 +415,5 @@ def help_string(program_path: str):
         output_string += f' --{command_line_arg.long.rstrip("=")}'
         if '=' in command_line_arg.long:
             output_string += f'=<{command_line_arg.hint}>'
-    output_string += ' <input>'
+    output_string += ' <input>...'
     return output_string
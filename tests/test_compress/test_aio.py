@@ -0,0 +1,96 @@
+import asyncio
+import random
+import string
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from compress import aio
+from compress.huffman import HuffmanDecoder, HuffmanEncoder
+from compress.lz import LZ, LZDecoder, LZEncoder
+
+
+def _text(n):
+    return ''.join(random.choice(string.ascii_lowercase[:6] + ' ') for _ in range(n)).encode()
+
+
+class _Writer:
+    def __init__(self):
+        self.data = bytearray()
+        self.drains = 0
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        self.drains += 1
+
+
+def _reader(data, chunk_size=1000):
+    reader = asyncio.StreamReader()
+    for index in range(0, len(data), chunk_size):
+        reader.feed_data(data[index: index + chunk_size])
+    reader.feed_eof()
+    return reader
+
+
+def test_encode_decode():
+    data = _text(10_000)
+
+    async def run():
+        encoded = await aio.encode(HuffmanEncoder(), data)
+        return await aio.decode(HuffmanDecoder(), encoded)
+
+    assert asyncio.run(run()) == data
+
+
+def test_encode_in_process_pool():
+    data = _text(10_000)
+
+    async def run():
+        with ProcessPoolExecutor(1) as executor:
+            encoded = await aio.encode(LZEncoder(), data, executor=executor)
+            return encoded, await aio.decode(LZDecoder(), encoded, executor=executor)
+
+    encoded, decoded = asyncio.run(run())
+    assert encoded == LZEncoder().encode(data)
+    assert decoded == data
+
+
+def test_streams_back():
+    data = _text(20_000)
+
+    async def run():
+        compressed = _Writer()
+        written = await aio.compress_stream(_reader(data), compressed, LZEncoder(), block_size=3000)
+        assert written == len(compressed.data)
+        assert compressed.drains == 8
+        decompressed = _Writer()
+        await aio.decompress_stream(_reader(bytes(compressed.data), 700), decompressed, LZDecoder())
+        return bytes(compressed.data), bytes(decompressed.data)
+
+    compressed, decompressed = asyncio.run(run())
+    assert decompressed == data
+    decoder = LZ.decompressobj()
+    assert decoder.decompress(compressed) == data
+
+
+def test_stream_empty():
+    async def run():
+        compressed = _Writer()
+        await aio.compress_stream(_reader(b''), compressed, LZEncoder())
+        decompressed = _Writer()
+        await aio.decompress_stream(_reader(bytes(compressed.data)), decompressed, LZDecoder())
+        return bytes(decompressed.data)
+
+    assert asyncio.run(run()) == b''
+
+
+def test_stream_truncated():
+    async def run():
+        compressed = _Writer()
+        await aio.compress_stream(_reader(_text(5000)), compressed, LZEncoder(), block_size=1000)
+        await aio.decompress_stream(_reader(bytes(compressed.data[:-10])), _Writer(), LZDecoder())
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
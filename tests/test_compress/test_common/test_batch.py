@@ -0,0 +1,87 @@
+import random
+import string
+
+import pytest
+
+from compress.common import batch
+from compress.hlz import HLZ
+from compress.huffman import Huffman
+from compress.lz import LZ
+from compress.lzh import LZH
+
+
+def _messages(n, seed=0):
+    generator = random.Random(seed)
+    alphabet = string.ascii_lowercase[:8] + ' '
+    return [
+        ''.join(generator.choices(alphabet, k=generator.randint(0, 300))).encode()
+        for _ in range(n)
+    ]
+
+
+@pytest.mark.parametrize('algorithm', [LZ, Huffman, LZH, HLZ])
+def test_many_back(algorithm):
+    messages = _messages(50)
+    encoded = list(algorithm.encode_many(messages))
+    assert encoded == [algorithm.get_encoder()().encode(message) for message in messages]
+    assert list(algorithm.decode_many(encoded)) == messages
+
+
+@pytest.mark.parametrize('algorithm', [LZ, Huffman])
+def test_many_shared_model(algorithm):
+    options = algorithm.train(_messages(100, seed=1))
+    messages = _messages(50)
+    encoded = list(algorithm.encode_many(messages, **options))
+    assert sum(map(len, encoded)) < sum(map(len, algorithm.encode_many(messages)))
+    assert list(algorithm.decode_many(encoded, **options)) == messages
+
+
+def test_train_without_model():
+    assert LZH.train(_messages(10)) == {}
+
+
+def test_many_parallel():
+    messages = _messages(100)
+    options = Huffman.train(messages)
+    encoded = list(Huffman.encode_many(iter(messages), workers=2, chunk_size=16, **options))
+    assert encoded == list(Huffman.encode_many(messages, **options))
+    assert list(Huffman.decode_many(encoded, workers=2, chunk_size=16, **options)) == messages
+
+
+def test_many_is_lazy():
+    results = LZ.encode_many(message for message in [b'abc', b''])
+    assert next(results) == LZ.get_encoder()().encode(b'abc')
+
+
+def test_many_invalid_arguments():
+    with pytest.raises(ValueError):
+        batch.encode_many(LZ.get_encoder()(), [], workers=0)
+    with pytest.raises(ValueError):
+        LZ.decode_many([], chunk_size=0)
+
+
+@pytest.mark.parametrize('options', [{}, {'canonical': True}, {'max_code_length': 9}])
+def test_huffman_many_reuses_buffers(options):
+    messages = _messages(30) + [b'', b'aaaa', bytes(range(256))]
+    messages += messages
+    encoder = Huffman.get_encoder()(**options)
+    encoded = list(encoder.encode_many(messages))
+    assert encoded == [encoder.encode(message) for message in messages]
+    assert list(Huffman.get_decoder()().decode_many(encoded)) == messages
+
+
+def test_lz_many_reuses_output_buffer():
+    messages = [b'a' * 1000, b'abc', b'', b'xyz' * 50, b'abc']
+    encoded = list(LZ.encode_many(messages))
+    assert list(LZ.decode_many(encoded)) == messages
+    options = LZ.train(_messages(100, seed=1))
+    encoded = list(LZ.encode_many(messages, **options))
+    assert list(LZ.decode_many(encoded, **options)) == messages
+
+
+def test_hlz_many_reuses_huffman_buffer():
+    messages = _messages(30) + [b'', b'a']
+    encoder = HLZ.get_encoder()(canonical=True)
+    encoded = list(encoder.encode_many(messages))
+    assert encoded == [encoder.encode(message) for message in messages]
+    assert list(HLZ.decode_many(encoded)) == messages
@@ -0,0 +1,73 @@
+import random
+
+from compress.common.bits import BitReader, BitWriter
+
+
+def test_write_bits():
+    buffer = BitWriter()
+    buffer.write_bits(1, 1)
+    buffer.write_bits(0b0110, 4)
+    buffer.write_bits(0b101, 3)
+    assert buffer.getvalue() == bytes([0b10110101])
+
+
+def test_write_pads_last_byte():
+    buffer = BitWriter()
+    buffer.write_bits(0b101, 3)
+    assert buffer.bit_length == 3
+    assert buffer.getvalue() == bytes([0b10100000])
+
+
+def test_write_codes():
+    codes = [''] * 256
+    codes[ord('a')] = '0'
+    codes[ord('b')] = '10'
+    codes[ord('c')] = '11'
+    buffer = BitWriter()
+    buffer.write_codes(b'abcab', codes)
+    assert buffer.getvalue() == bytes([0b01011010])
+
+
+def test_write_bytes_after_bits():
+    buffer = BitWriter()
+    buffer.write_bits(1, 1)
+    buffer.write_bytes(b'\xff')
+    assert buffer.getvalue() == bytes([0b11111111, 0b10000000])
+
+
+def test_read_bits():
+    buffer = BitReader(bytes([0b10110101]))
+    assert buffer.read_bits(1) == 1
+    assert buffer.read_bits(4) == 0b0110
+    assert buffer.read_bits(3) == 0b101
+    assert buffer.bits_remaining == 0
+
+
+def test_read_past_end_gives_zeros():
+    buffer = BitReader(b'\xff')
+    assert buffer.read_bits(12) == 0xFF0
+
+
+def test_peek_and_consume():
+    buffer = BitReader(bytes([0b11000000]))
+    assert buffer.peek_bits(2) == 0b11
+    assert buffer.peek_bits(3) == 0b110
+    buffer.consume(2)
+    assert buffer.read_bits(2) == 0
+
+
+def test_read_with_offset_and_align():
+    buffer = BitReader(b'\x00\xa0\x55\x66', 1)
+    assert buffer.read_bits(3) == 0b101
+    buffer.align()
+    assert buffer.byte_position == 2
+    assert buffer.read_bytes(2) == b'\x55\x66'
+
+
+def test_fields_back():
+    fields = [(random.getrandbits(width), width) for width in random.choices(range(1, 40), k=1000)]
+    buffer = BitWriter()
+    for value, width in fields:
+        buffer.write_bits(value, width)
+    reader = BitReader(buffer.getvalue())
+    assert [reader.read_bits(width) for _, width in fields] == [value for value, _ in fields]
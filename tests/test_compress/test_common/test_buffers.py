@@ -0,0 +1,70 @@
+import array
+import mmap
+import random
+import string
+
+import pytest
+
+from compress.common import buffers
+from compress.hlz import HLZ
+from compress.huffman import Huffman
+from compress.lz import LZ
+from compress.lzh import LZH
+
+_DATA = ''.join(random.Random(0).choices(string.ascii_lowercase[:6] + ' ', k=3000)).encode()
+
+
+def _buffers(data):
+    mapped = mmap.mmap(-1, len(data))
+    mapped.write(data)
+    return [
+        bytearray(data),
+        memoryview(data),
+        memoryview(bytearray(data))[:],
+        array.array('B', data),
+        mapped,
+    ]
+
+
+@pytest.mark.parametrize('algorithm', [LZ, Huffman, LZH, HLZ])
+def test_buffer_inputs(algorithm):
+    encoded = algorithm.get_encoder()().encode(_DATA)
+    for buffer in _buffers(_DATA):
+        assert algorithm.get_encoder()().encode(buffer) == encoded
+    for buffer in _buffers(encoded):
+        assert algorithm.get_decoder()().decode(buffer) == _DATA
+
+
+@pytest.mark.parametrize('algorithm', [LZ, Huffman, LZH, HLZ])
+def test_encode_into_decode_into(algorithm):
+    encoded = algorithm.get_encoder()().encode(_DATA)
+    output = bytearray(len(encoded) + 10)
+    assert algorithm.get_encoder()().encode_into(memoryview(_DATA), output) == len(encoded)
+    assert output[:len(encoded)] == encoded
+    decoded = bytearray(len(_DATA))
+    decoder = algorithm.get_decoder()()
+    assert decoder.decode_into(memoryview(output)[:len(encoded)], memoryview(decoded)) == len(_DATA)
+    assert decoded == _DATA
+
+
+@pytest.mark.parametrize('algorithm', [LZ, Huffman])
+def test_into_too_small(algorithm):
+    with pytest.raises(ValueError):
+        algorithm.get_encoder()().encode_into(_DATA, bytearray(1))
+    encoded = algorithm.get_encoder()().encode(_DATA)
+    with pytest.raises(ValueError):
+        algorithm.get_decoder()().decode_into(encoded, bytearray(len(_DATA) - 1))
+
+
+def test_byte_view_wide_items():
+    data = array.array('H', [1, 2, 3])
+    assert buffers.byte_view(data).tobytes() == data.tobytes()
+    assert buffers.byte_view(b'abc') == b'abc'
+    assert Huffman.get_decoder()().decode(Huffman.get_encoder()().encode(data)) == data.tobytes()
+
+
+def test_lz_decode_into_larger_buffer():
+    encoded = LZ.get_encoder()().encode(_DATA)
+    output = array.array('H', bytes(2 * len(_DATA)))
+    assert LZ.get_decoder()().decode_into(encoded, output) == len(_DATA)
+    assert output.tobytes() == _DATA + bytes(len(_DATA))
@@ -42,3 +42,15 @@ def test_char_int_to_bytes_back():
 def test_bytes_to_char_int_back():
     byte_data = str(uuid.uuid4()).encode()[0:1]
     assert convert.char_int_to_bytes(convert.bytes_to_char_int(byte_data)) == byte_data
+
+
+def test_int_to_varint():
+    assert convert.int_to_varint(0) == b'\x00'
+    assert convert.int_to_varint(127) == b'\x7f'
+    assert convert.int_to_varint(128) == b'\x80\x01'
+
+
+def test_varint_to_int_back():
+    num = random.randint(0, 2 ** 40)
+    data = b'\x00' + convert.int_to_varint(num)
+    assert convert.varint_to_int(data, 1) == (num, len(data))
@@ -32,3 +32,77 @@ def test_write_file_exists():
     with pytest.raises(FileExistsError):
         io.write_file(file_path, data_written)
     os.remove(file_path)
+
+
+def test_write_chunks():
+    file_path = f'temp/{str(uuid.uuid4())}'
+    result = io.write_chunks(file_path, (bytes([index]) * 10 for index in range(5)))
+    assert result == file_path
+    assert io.read_file(file_path) == b''.join(bytes([index]) * 10 for index in range(5))
+    os.remove(file_path)
+
+
+def test_mapped_file():
+    file_path = f'temp/{str(uuid.uuid4())}'
+    data_written = str(uuid.uuid4()).encode()
+    io.write_file(file_path, data_written)
+    with io.mapped_file(file_path) as mapped:
+        assert mapped[:] == data_written
+        with memoryview(mapped) as view:
+            assert view.tobytes() == data_written
+    os.remove(file_path)
+
+
+def test_mapped_empty_file():
+    file_path = f'temp/{str(uuid.uuid4())}'
+    io.write_file(file_path, b'')
+    with io.mapped_file(file_path) as mapped:
+        assert len(mapped) == 0
+    os.remove(file_path)
+
+
+def test_mapped_output():
+    file_path = f'temp/{str(uuid.uuid4())}'
+    with io.mapped_output(file_path, 8) as output:
+        output[0:4] = b'abcd'
+        output[4:8] = b'efgh'
+    assert io.read_file(file_path) == b'abcdefgh'
+    with pytest.raises(FileExistsError):
+        with io.mapped_output(file_path, 8):
+            pass
+    os.remove(file_path)
+
+
+def test_mapped_output_removed_on_error():
+    file_path = f'temp/{str(uuid.uuid4())}'
+    with pytest.raises(ValueError):
+        with io.mapped_output(file_path, 100) as output:
+            output[:3] = b'abc'
+            raise ValueError()
+    assert not os.path.exists(file_path)
+
+
+def test_write_chunks_removed_on_error():
+    file_path = f'temp/{str(uuid.uuid4())}'
+
+    def chunks():
+        yield b'abc'
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        io.write_chunks(file_path, chunks())
+    assert not os.path.exists(file_path)
+
+
+def test_mapped_file_error_with_views():
+    file_path = f'temp/{str(uuid.uuid4())}'
+    io.write_file(file_path, b'abcdef')
+
+    def fail(view):
+        part = view[1:]
+        raise ValueError(len(part))
+
+    with pytest.raises(ValueError):
+        with io.mapped_file(file_path) as mapped:
+            fail(memoryview(mapped))
+    os.remove(file_path)
@@ -0,0 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from compress.common import pool
+
+
+def test_ordered_map_without_executor():
+    assert list(pool.ordered_map(None, divmod, [(7, 2), (9, 4)], 1)) == [(3, 1), (2, 1)]
+
+
+def test_ordered_map_keeps_order():
+    arguments = [(number,) for number in range(100)]
+    with ThreadPoolExecutor(4) as executor:
+        results = list(pool.ordered_map(executor, str, arguments, 8))
+    assert results == [str(number) for number in range(100)]
+
+
+def test_ordered_calls_bounded():
+    with ThreadPoolExecutor(2) as executor:
+        calls = pool.OrderedCalls(executor, 3)
+        assert calls.submit(str, 1) == []
+        assert calls.submit(str, 2) == []
+        assert calls.submit(str, 3) == ['1']
+        assert list(calls.results()) == ['2', '3']
@@ -0,0 +1,83 @@
+import pytest
+
+from compress.common import stats
+from compress.hlz import HLZEncoder
+from compress.huffman import HuffmanDecoder, HuffmanEncoder
+from compress.lz import LZDecoder, LZEncoder
+from compress.lzh import LZHDecoder, LZHEncoder
+
+_DATA = b'abracadabra abracadabra ' * 50
+
+
+def test_stats_disabled_by_default():
+    encoder = LZEncoder()
+    encoder.encode(_DATA)
+    assert encoder.last_stats is None
+    assert encoder.start_stats() is stats.DISABLED
+
+
+def test_disabled_stats_do_nothing():
+    with stats.DISABLED.stage('stage'):
+        stats.DISABLED.count('counter')
+    assert stats.DISABLED.timings == {}
+    assert stats.DISABLED.counters == {}
+
+
+def test_lz_stats():
+    encoder = LZEncoder()
+    encoder.enable_stats()
+    encoded = encoder.encode(_DATA)
+    run_stats = encoder.last_stats
+    assert set(run_stats.timings) == {'match_search', 'bit_packing'}
+    assert run_stats.counters['bytes_in'] == len(_DATA)
+    assert run_stats.counters['bytes_out'] == len(encoded)
+    assert run_stats.counters['matched_bytes'] + run_stats.counters['literals'] == len(_DATA)
+    assert 0 < run_stats.counters['match_hit_rate'] <= 1
+    assert run_stats.counters['average_match_length'] > 3
+    assert run_stats.counters['hash_table_size'] > 0
+
+
+@pytest.mark.parametrize('canonical', [False, True])
+def test_huffman_stats(canonical):
+    encoder = HuffmanEncoder(canonical=canonical)
+    encoder.enable_stats()
+    encoder.encode(_DATA)
+    stages = {'calculate_probabilities', 'construct_tree', 'encode_data'}
+    assert stages <= set(encoder.last_stats.timings)
+    assert encoder.last_stats.counters['symbols'] == len(set(_DATA))
+
+
+def test_decoder_stats():
+    decoder = HuffmanDecoder()
+    decoder.enable_stats()
+    decoder.decode(HuffmanEncoder().encode(_DATA))
+    assert {'read_header', 'build_table', 'decode_data'} <= set(decoder.last_stats.timings)
+    assert decoder.last_stats.counters['bytes_out'] == len(_DATA)
+
+
+def test_stats_callback():
+    collected = []
+    decoder = LZDecoder()
+    decoder.enable_stats(collected.append)
+    decoder.decode(LZEncoder().encode(_DATA))
+    decoder.decode(LZEncoder().encode(b'abc'))
+    assert [run_stats.counters['bytes_out'] for run_stats in collected] == [len(_DATA), 3]
+    decoder.disable_stats()
+    decoder.decode(LZEncoder().encode(_DATA))
+    assert len(collected) == 2
+
+
+@pytest.mark.parametrize('encoder_class', [LZHEncoder, HLZEncoder])
+def test_combined_stats(encoder_class):
+    encoder = encoder_class()
+    encoder.enable_stats()
+    encoder.encode(_DATA)
+    assert set(encoder.last_stats.timings) == {'lz', 'huffman'}
+    assert encoder.last_stats.as_dict()['name'] == encoder_class.__name__
+
+
+def test_combined_decoder_stats():
+    decoder = LZHDecoder()
+    decoder.enable_stats()
+    assert decoder.decode(LZHEncoder().encode(_DATA)) == _DATA
+    assert decoder.last_stats.counters['lz_bytes'] > 0
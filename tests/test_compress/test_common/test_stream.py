@@ -0,0 +1,118 @@
+import io
+import random
+import string
+
+import pytest
+
+from compress.common.stream import StreamDecoder, StreamEncoder
+from compress.hlz import HLZ
+from compress.huffman import Huffman, HuffmanDecoder, HuffmanEncoder
+from compress.lz import LZ, LZDecoder, LZEncoder
+from compress.lzh import LZH
+
+
+def _text(n):
+    return ''.join(random.choice(string.ascii_lowercase[:6] + ' ') for _ in range(n)).encode()
+
+
+def _stream_back(algorithm, data, chunk_size, block_size, read_size):
+    encoder = StreamEncoder(algorithm.get_encoder()(), block_size)
+    compressed = b''.join(
+        encoder.compress(data[index: index + chunk_size])
+        for index in range(0, len(data), chunk_size)
+    ) + encoder.flush()
+    decoder = algorithm.decompressobj()
+    decompressed = b''.join(
+        decoder.decompress(compressed[index: index + read_size])
+        for index in range(0, len(compressed), read_size)
+    )
+    decoder.flush()
+    assert decoder.eof
+    return decompressed
+
+
+@pytest.mark.parametrize('algorithm', [LZ, Huffman, LZH, HLZ])
+def test_stream_back(algorithm):
+    data = _text(20_000)
+    assert _stream_back(algorithm, data, 777, 3000, 101) == data
+
+
+def test_stream_empty():
+    encoder = LZ.compressobj()
+    compressed = encoder.compress(b'') + encoder.flush()
+    decoder = LZ.decompressobj()
+    assert decoder.decompress(compressed) == b''
+    assert decoder.eof
+
+
+def test_lz_blocks_match_history():
+    data = _text(1000) * 8
+    encoder = StreamEncoder(LZEncoder(), 1000)
+    compressed = encoder.compress(data) + encoder.flush()
+    assert len(compressed) < 4 * len(LZEncoder().encode(data[:1000]))
+    assert StreamDecoder(LZDecoder()).decompress(compressed) == data
+
+
+def test_stream_truncated():
+    encoder = Huffman.compressobj()
+    compressed = encoder.compress(_text(1000)) + encoder.flush()
+    decoder = StreamDecoder(HuffmanDecoder())
+    decoder.decompress(compressed[:-5])
+    with pytest.raises(ValueError):
+        decoder.flush()
+
+
+def test_stream_unused_data():
+    encoder = StreamEncoder(HuffmanEncoder())
+    compressed = encoder.compress(b'abc') + encoder.flush()
+    decoder = Huffman.decompressobj()
+    assert decoder.decompress(compressed + b'rest') == b'abc'
+    assert decoder.unused_data == b'rest'
+
+
+def test_compress_after_flush():
+    encoder = LZ.compressobj()
+    encoder.flush()
+    with pytest.raises(ValueError):
+        encoder.compress(b'abc')
+
+
+def test_open_back(tmp_path):
+    data = _text(5000)
+    file_path = str(tmp_path / 'data.lz')
+    with LZ.open(file_path, 'wb', level='fast') as file:
+        for index in range(0, len(data), 1000):
+            file.write(data[index: index + 1000])
+    with LZ.open(file_path) as file:
+        assert file.read(10) == data[:10]
+        assert file.read() == data[10:]
+
+
+def test_open_file_object():
+    output = io.BytesIO()
+    with Huffman.open(output, 'wb') as file:
+        file.write(b'hello world')
+    assert not output.closed
+    with Huffman.open(io.BytesIO(output.getvalue())) as file:
+        assert file.read() == b'hello world'
+
+
+@pytest.mark.parametrize('algorithm', [LZ, Huffman])
+def test_stream_trained_model(algorithm):
+    options = algorithm.train([_text(300) for _ in range(50)])
+    data = _text(5000)
+    encoder = algorithm.compressobj(**options)
+    compressed = encoder.compress(data) + encoder.flush()
+    decoder = algorithm.decompressobj(**options)
+    assert decoder.decompress(compressed) + decoder.flush() == data
+
+
+@pytest.mark.parametrize('algorithm', [LZ, Huffman])
+def test_open_trained_model(tmp_path, algorithm):
+    options = algorithm.train([_text(300) for _ in range(50)])
+    data = _text(5000)
+    file_path = str(tmp_path / 'data.bin')
+    with algorithm.open(file_path, 'wb', **options) as file:
+        file.write(data)
+    with algorithm.open(file_path, 'rb', **options) as file:
+        assert file.read() == data
@@ -0,0 +1,165 @@
+import io
+import random
+import string
+
+import pytest
+
+from compress import container, ui
+from compress.common import convert
+from compress.hlz import HLZ
+from compress.huffman import Huffman
+from compress.lz import LZ
+from compress.lzh import LZH
+
+
+def _text(n):
+    return ''.join(random.choice(string.ascii_letters + ' ') for _ in range(n)).encode()
+
+
+@pytest.mark.parametrize('algorithm', [LZ, Huffman, LZH, HLZ])
+def test_container_back(algorithm):
+    data = _text(10_000)
+    compressed = container.compress(data, algorithm, block_size=3000)
+    assert container.is_container(compressed)
+    assert container.decompress(compressed) == data
+
+
+def test_container_header():
+    compressed = container.compress(b'abc', Huffman, block_size=1000)
+    reader = container.ContainerReader(io.BytesIO(compressed))
+    assert reader.algorithm is Huffman
+    assert reader.block_size == 1000
+    assert reader.flags & container.FLAG_CHECKSUMS
+
+
+def test_container_empty():
+    compressed = container.compress(b'', LZ, index=False)
+    assert compressed.endswith(convert.int_to_varint(0))
+    assert container.decompress(compressed) == b''
+
+
+def test_container_blocks_independent():
+    data = _text(2500)
+    reader = container.ContainerReader(io.BytesIO(container.compress(data, LZ, block_size=1000)))
+    assert [len(block) for block in reader.blocks()] == [1000, 1000, 500]
+
+
+def test_container_without_checksums():
+    output = io.BytesIO()
+    with container.ContainerWriter(output, LZ, checksums=False) as writer:
+        writer.write(b'abcabcabc')
+    assert container.decompress(output.getvalue()) == b'abcabcabc'
+
+
+def test_container_checksum_mismatch():
+    compressed = bytearray(container.compress(b'abcdefgh' * 10, LZ, index=False))
+    compressed[-2] ^= 0xFF
+    with pytest.raises(ValueError):
+        container.decompress(bytes(compressed))
+
+
+def test_container_truncated():
+    compressed = container.compress(_text(1000), Huffman, index=False)
+    with pytest.raises(ValueError):
+        container.decompress(compressed[:-10])
+
+
+def test_not_container():
+    assert not container.is_container(b'abc')
+    with pytest.raises(ValueError):
+        container.decompress(b'abcdefgh')
+
+
+def test_ui_decodes_container_without_algorithm(tmp_path):
+    input_path = str(tmp_path / 'input.txt')
+    encoded_path = str(tmp_path / 'input.encoded')
+    decoded_path = str(tmp_path / 'input.decoded')
+    data = _text(5000)
+    with open(input_path, 'wb') as file:
+        file.write(data)
+    ui.EncoderProgram(
+        ['program.py', '-a', 'huffman', '-b', '1024', '-f', input_path, '-o', encoded_path]
+    ).start()
+    ui.EncoderProgram(
+        ['program.py', '-m', 'decode', '-f', encoded_path, '-o', decoded_path]
+    ).start()
+    with open(decoded_path, 'rb') as file:
+        assert file.read() == data
+
+
+@pytest.mark.parametrize('algorithm', [LZ, Huffman])
+def test_container_parallel_back(algorithm):
+    data = _text(20_000)
+    compressed = container.compress(data, algorithm, block_size=2000, workers=2)
+    assert compressed == container.compress(data, algorithm, block_size=2000)
+    assert container.decompress(compressed, workers=2) == data
+
+
+def test_container_parallel_checksum_mismatch():
+    compressed = bytearray(container.compress(_text(5000), LZ, block_size=1000, index=False))
+    compressed[-2] ^= 0xFF
+    with pytest.raises(ValueError):
+        container.decompress(bytes(compressed), workers=2)
+
+
+def test_container_invalid_workers():
+    with pytest.raises(ValueError):
+        container.compress(b'abc', LZ, workers=0)
+
+
+def test_container_index():
+    data = _text(2500)
+    reader = container.ContainerReader(io.BytesIO(container.compress(data, LZ, block_size=1000)))
+    index = reader.read_index()
+    blocks = [(offset, block_size) for offset, _, block_size in index]
+    assert blocks == [(0, 1000), (1000, 1000), (2000, 500)]
+
+
+def test_container_without_index():
+    reader = container.ContainerReader(io.BytesIO(container.compress(b'abc', LZ, index=False)))
+    with pytest.raises(ValueError):
+        reader.read_index()
+
+
+@pytest.mark.parametrize(
+    'offset, length',
+    [(0, 10), (995, 10), (1000, 1000), (2400, 500), (3000, 10), (0, 2500)]
+)
+def test_read_range(tmp_path, offset, length):
+    data = _text(2500)
+    file_path = str(tmp_path / 'data.dcmp')
+    with open(file_path, 'wb') as file:
+        file.write(container.compress(data, Huffman, block_size=1000))
+    assert container.read_range(file_path, offset, length) == data[offset: offset + length]
+
+
+@pytest.mark.parametrize('algorithm', [LZ, Huffman, LZH, HLZ])
+def test_container_stores_incompressible_blocks(algorithm):
+    data = random.randbytes(10_000)
+    compressed = container.compress(data, algorithm, block_size=4000, index=False)
+    assert len(compressed) <= len(data) + 3 * 10 + 12
+    assert container.decompress(compressed) == data
+
+
+def test_container_mixed_blocks():
+    data = random.randbytes(3000) + b'a' * 3000 + bytes([7])
+    compressed = container.compress(data, Huffman, block_size=3000)
+    reader = container.ContainerReader(io.BytesIO(compressed))
+    encoded_sizes = [len(encoded) for encoded, _, _ in reader.encoded_blocks()]
+    assert encoded_sizes[0] == 3000
+    assert encoded_sizes[1] < 3000
+    assert encoded_sizes[2] == 1
+    assert container.decompress(container.compress(data, Huffman, block_size=3000)) == data
+
+
+@pytest.mark.parametrize('algorithm', [LZ, Huffman])
+def test_container_trained_model(tmp_path, algorithm):
+    options = algorithm.train([_text(300) for _ in range(50)])
+    data = _text(2500)
+    compressed = container.compress(data, algorithm, block_size=1000, **options)
+    assert container.decompress(compressed, **options) == data
+    assert container.decompress(compressed, workers=2, **options) == data
+    file_path = str(tmp_path / 'data.dcmp')
+    with open(file_path, 'wb') as file:
+        file.write(compressed)
+    assert container.read_range(file_path, 900, 200, **options) == data[900:1100]
@@ -0,0 +1,56 @@
+import random
+import string
+
+from compress.huffman import HuffmanDecoder, HuffmanEncoder
+from compress.huffman.canonical import canonical_codes, read_code_lengths, write_code_lengths
+
+
+def _random_bytes(n):
+    return ''.join(random.choice(string.printable) for _ in range(n)).encode()
+
+
+def test_canonical_codes():
+    codes = canonical_codes({ord('a'): 2, ord('b'): 1, ord('c'): 3, ord('d'): 3})
+    assert codes == {
+        ord('b'): (0b0, 1),
+        ord('a'): (0b10, 2),
+        ord('c'): (0b110, 3),
+        ord('d'): (0b111, 3),
+    }
+
+
+def test_code_lengths_back():
+    lengths = {symbol: random.randint(1, 20) for symbol in random.sample(range(256), 100)}
+    serialised = b'\xff' + write_code_lengths(lengths)
+    assert read_code_lengths(serialised, 1) == (lengths, len(serialised))
+
+
+def test_code_lengths_all_symbols():
+    lengths = {symbol: 8 for symbol in range(256)}
+    serialised = write_code_lengths(lengths)
+    assert read_code_lengths(serialised) == (lengths, len(serialised))
+
+
+def test_decode_canonical():
+    input_bytes = _random_bytes(10_000)
+    encoded = HuffmanEncoder(canonical=True).encode(input_bytes)
+    assert HuffmanDecoder().decode(encoded) == input_bytes
+
+
+def test_decode_canonical_edge_cases():
+    for input_bytes in (b'', b'a', b'aaaa', b'ab'):
+        encoded = HuffmanEncoder(canonical=True).encode(input_bytes)
+        assert HuffmanDecoder().decode(encoded) == input_bytes
+
+
+def test_canonical_header_smaller():
+    input_bytes = b'hello world'
+    canonical_size = len(HuffmanEncoder(canonical=True).encode(input_bytes))
+    assert canonical_size < len(HuffmanEncoder().encode(input_bytes))
+
+
+def test_decode_tree_format():
+    input_bytes = _random_bytes(1_000)
+    encoded = HuffmanEncoder().encode(input_bytes)
+    assert encoded[0] == 0
+    assert HuffmanDecoder().decode(encoded) == input_bytes
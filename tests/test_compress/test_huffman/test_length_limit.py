@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from compress.huffman import HuffmanDecoder, HuffmanEncoder, _HuffmanEncodingProcess
+from compress.huffman.length_limit import limited_code_lengths
+from compress.hlz import HLZDecoder, HLZEncoder
+from compress.lzh import LZHDecoder, LZHEncoder
+
+
+def _fibonacci_bytes(symbol_count: int) -> bytes:
+    data = bytearray()
+    previous, current = 1, 1
+    for symbol in range(symbol_count):
+        data.extend(bytes((symbol,)) * current)
+        previous, current = current, previous + current
+    random.shuffle(data)
+    return bytes(data)
+
+
+def _cost(probabilities, lengths):
+    return sum(probabilities[symbol] * lengths[symbol] for symbol in probabilities)
+
+
+def test_limited_code_lengths():
+    probabilities = {0: 1, 1: 1, 2: 2, 3: 4, 4: 8}
+    lengths = limited_code_lengths(probabilities, 3)
+    assert max(lengths.values()) == 3
+    assert sum(2 ** -length for length in lengths.values()) == 1
+    assert _cost(probabilities, lengths) == 32
+
+
+def test_limited_code_lengths_optimal_without_limit():
+    data = _fibonacci_bytes(10)
+    process = _HuffmanEncodingProcess(HuffmanEncoder(), data)
+    probabilities = process.calculate_probabilities()
+    limited_lengths = limited_code_lengths(probabilities, 64)
+    assert _cost(probabilities, limited_lengths) == _cost(probabilities, process.code_lengths())
+
+
+def test_limited_code_lengths_too_short():
+    with pytest.raises(ValueError):
+        limited_code_lengths({symbol: 1 for symbol in range(5)}, 2)
+
+
+@pytest.mark.parametrize("max_code_length", [-1, 0, 1, 7])
+def test_invalid_max_code_length(max_code_length):
+    with pytest.raises(ValueError):
+        HuffmanEncoder(max_code_length=max_code_length)
+    with pytest.raises(ValueError):
+        HLZEncoder(max_code_length=max_code_length)
+
+
+@pytest.mark.parametrize("max_code_length", [8, 12, 15])
+def test_decode_limited(max_code_length):
+    data = _fibonacci_bytes(24)
+    encoder = HuffmanEncoder(max_code_length=max_code_length)
+    lengths = _HuffmanEncodingProcess(encoder, data).code_lengths()
+    assert max(lengths.values()) == max_code_length
+    assert HuffmanDecoder().decode(encoder.encode(data)) == data
+
+
+def test_decode_limited_combined():
+    data = _fibonacci_bytes(20)
+    assert LZHDecoder().decode(LZHEncoder(max_code_length=12).encode(data)) == data
+    assert HLZDecoder().decode(HLZEncoder(max_code_length=12).encode(data)) == data
@@ -0,0 +1,62 @@
+import random
+import string
+
+import pytest
+
+from compress.common import convert
+from compress.huffman import HuffmanDecoder, HuffmanEncoder, HuffmanTable, SyncOptions
+from compress.huffman.canonical import skip_code_lengths
+from compress.huffman.parallel import merge_frequencies
+
+
+def _text(n, seed=0):
+    generator = random.Random(seed)
+    return ''.join(generator.choices(string.ascii_letters + ' \n', k=n)).encode()
+
+
+@pytest.mark.parametrize('data', [b'', b'a', b'aaaaaaaaa', bytes(range(256)) * 4, _text(10_001)])
+@pytest.mark.parametrize('sync_interval', [1, 7, 1000])
+def test_synchronized_back(data, sync_interval):
+    encoded = HuffmanEncoder(sync=SyncOptions(sync_interval=sync_interval)).encode(data)
+    assert HuffmanDecoder().decode(encoded) == data
+
+
+def test_synchronized_payload_matches_canonical():
+    data = _text(20_000)
+    canonical = HuffmanEncoder(canonical=True).encode(data)
+    _, code_length_offset = convert.varint_to_int(canonical, 1)
+    payload = canonical[skip_code_lengths(canonical, code_length_offset):]
+    synchronized = HuffmanEncoder(sync=SyncOptions(sync_interval=999)).encode(data)
+    assert synchronized[0] == 3
+    assert synchronized.endswith(payload)
+
+
+def test_parallel_encode_decode():
+    data = _text(50_000)
+    sync = SyncOptions(workers=2, sync_interval=4096)
+    encoded = HuffmanEncoder(sync=sync).encode(memoryview(data))
+    assert encoded == HuffmanEncoder(sync=SyncOptions(sync_interval=4096)).encode(data)
+    assert HuffmanDecoder(workers=2).decode(encoded) == data
+
+
+def test_parallel_max_code_length():
+    weights = [2 ** -i for i in range(64)]
+    data = bytes(random.Random(1).choices(range(64), weights=weights, k=20_000))
+    sync = SyncOptions(workers=2, sync_interval=3000)
+    encoded = HuffmanEncoder(sync=sync, max_code_length=10).encode(data)
+    assert HuffmanDecoder(workers=2).decode(encoded) == data
+
+
+def test_merge_frequencies_keeps_first_occurrence():
+    assert list(merge_frequencies([{2: 1, 1: 1}, {3: 1, 1: 2}])) == [2, 1, 3]
+
+
+def test_synchronized_invalid_options():
+    with pytest.raises(ValueError):
+        SyncOptions(workers=0)
+    with pytest.raises(ValueError):
+        SyncOptions(sync_interval=0)
+    with pytest.raises(ValueError):
+        HuffmanEncoder(sync=SyncOptions(workers=2), table=HuffmanTable.from_samples([b'abc']))
+    with pytest.raises(ValueError):
+        HuffmanDecoder(workers=0)
@@ -0,0 +1,65 @@
+import random
+import string
+
+import pytest
+
+from compress.huffman import HuffmanDecoder, HuffmanEncoder, HuffmanTable
+from compress.huffman.table import canonical_table
+
+
+def _messages(n, seed=0):
+    generator = random.Random(seed)
+    alphabet = string.ascii_lowercase + ' '
+    return [
+        ''.join(generator.choices(alphabet, k=generator.randint(0, 200))).encode()
+        for _ in range(n)
+    ]
+
+
+@pytest.fixture(scope='module')
+def table():
+    return HuffmanTable.from_samples(_messages(100))
+
+
+def test_static_back(table):
+    encoder = HuffmanEncoder(table=table)
+    decoder = HuffmanDecoder(table=table)
+    for message in _messages(50, seed=1) + [b'', bytes(range(256))]:
+        assert decoder.decode(encoder.encode(message)) == message
+
+
+def test_static_header(table):
+    encoded = HuffmanEncoder(table=table).encode(b'abc')
+    assert encoded[0] == 2
+    assert int.from_bytes(encoded[1:5], 'big') == table.table_id
+    assert encoded[5] == 3
+    assert len(encoded) < len(HuffmanEncoder(canonical=True).encode(b'abc'))
+
+
+def test_table_codes_every_byte(table):
+    assert len(table.code_lengths) == 256
+    assert max(table.code_lengths.values()) <= 15
+    assert table.code_lengths[ord('a')] < table.code_lengths[0]
+
+
+def test_table_serialisation(table):
+    restored = HuffmanTable.from_bytes(table.to_bytes())
+    assert restored == table
+    assert restored.table_id == table.table_id
+    message = _messages(1, seed=2)[0]
+    encoded = HuffmanEncoder(table=table).encode(message)
+    assert HuffmanDecoder(table=restored).decode(encoded) == message
+
+
+def test_decode_with_wrong_table(table):
+    encoded = HuffmanEncoder(table=table).encode(b'abc')
+    with pytest.raises(ValueError):
+        HuffmanDecoder().decode(encoded)
+    with pytest.raises(ValueError):
+        HuffmanDecoder(table=HuffmanTable.from_samples([b'xyz'])).decode(encoded)
+
+
+def test_decoding_tables_cached(table):
+    assert table.decoding_table() is HuffmanTable.from_bytes(table.to_bytes()).decoding_table()
+    assert canonical_table(table.to_bytes(), 100) is canonical_table(table.to_bytes(), 120)
+    assert canonical_table(table.to_bytes(), 100) is not canonical_table(table.to_bytes(), 100_000)
@@ -0,0 +1,50 @@
+import random
+import string
+
+from compress.common.bits import BitReader
+from compress.huffman import HuffmanDecoder, HuffmanEncoder
+from compress.huffman.table import DecodingTable, TABLE_BITS, codes_from_tree
+from compress.huffman.tree import HuffmanTree
+
+
+def _fibonacci_bytes(symbol_count: int) -> bytes:
+    data = bytearray()
+    previous, current = 1, 1
+    for symbol in range(symbol_count):
+        data.extend(bytes((symbol,)) * current)
+        previous, current = current, previous + current
+    return bytes(data)
+
+
+def test_codes_from_tree():
+    tree = HuffmanTree()
+    leaf = tree.add_leaf(1)
+    tree.add_node(leaf, tree.add_node(tree.add_leaf(2), tree.add_leaf(3)))
+    assert codes_from_tree(tree) == {1: (0, 1), 2: (2, 2), 3: (3, 2)}
+
+
+def test_decode_multiple_symbols_per_lookup():
+    table = DecodingTable({1: (0, 1), 2: (2, 2), 3: (3, 2)})
+    assert table.decode(BitReader(bytes([0b01011000])), 4) == bytearray([1, 2, 3, 1])
+
+
+def test_decode_single_symbol():
+    table = DecodingTable({ord('a'): (0, 0)})
+    assert table.decode(BitReader(b''), 4) == bytearray(b'aaaa')
+
+
+def test_decode_single_symbol_stream():
+    data = b'a' * 100
+    assert HuffmanDecoder().decode(HuffmanEncoder().encode(data)) == data
+
+
+def test_decode_codes_longer_than_table():
+    data = bytearray(_fibonacci_bytes(TABLE_BITS + 6))
+    random.shuffle(data)
+    data = bytes(data)
+    assert HuffmanDecoder().decode(HuffmanEncoder().encode(data)) == data
+
+
+def test_decode_small_table():
+    data = ''.join(random.choice(string.printable) for _ in range(50)).encode()
+    assert HuffmanDecoder().decode(HuffmanEncoder().encode(data)) == data
@@ -0,0 +1,46 @@
+from compress.common import convert
+from compress.common.bits import BitReader, BitWriter
+from compress.huffman import (
+    HuffmanDecoder,
+    HuffmanEncoder,
+    _HuffmanDecodingProcess,
+    _HuffmanEncodingProcess,
+)
+from compress.huffman.tree import HuffmanTree
+
+
+def test_tree_from_probabilities():
+    tree = HuffmanTree.from_probabilities({1: 3, 2: 1, 3: 1})
+    assert len(tree) == 5
+    assert tree.codes() == {1: (1, 1), 3: (0, 2), 2: (1, 2)}
+    assert [tree.symbols[node] for node in tree.post_order() if tree.is_leaf(node)] == [3, 2, 1]
+
+
+def test_tree_single_symbol():
+    tree = HuffmanTree.from_probabilities({7: 10})
+    assert tree.codes() == {7: (0, 0)}
+    assert list(tree.post_order()) == [tree.root]
+
+
+def test_degenerate_tree_header_back():
+    tree = HuffmanTree.from_probabilities({symbol: 2 ** symbol for symbol in range(256)})
+    assert max(length for _, length in tree.codes().values()) == 255
+    header_buffer = BitWriter()
+    _HuffmanEncodingProcess(HuffmanEncoder(), b'').write_header_info(header_buffer, tree)
+    header = header_buffer.getvalue()
+    data = (
+        convert.int_to_bytes(len(header))
+        + convert.int_to_bytes(256)
+        + convert.int_to_bytes(1)
+        + header
+    )
+    process = _HuffmanDecodingProcess(HuffmanDecoder(), data)
+    decoded_tree = process.decode_header(BitReader(data, 12))
+    assert decoded_tree.codes() == tree.codes()
+
+
+def test_tree_to_node():
+    node = HuffmanTree.from_probabilities({1: 2, 2: 1}).to_node()
+    assert (node.left.symbol, node.right.symbol) == (2, 1)
+    assert node.left.code.to01() == '0'
+    assert '"char"' in repr(node)
@@ -0,0 +1,60 @@
+import random
+import string
+
+import pytest
+
+from compress.huffman import HuffmanDecoder, HuffmanEncoder, HuffmanTable, vectorized
+
+
+def _inputs():
+    generator = random.Random(0)
+    return [
+        b'',
+        b'a',
+        b'aaab',
+        bytes(range(256)) * 3,
+        generator.randbytes(5000),
+        ''.join(generator.choices(string.ascii_letters + ' ', k=20001)).encode(),
+    ]
+
+
+def test_vectorized_requires_numpy(monkeypatch):
+    monkeypatch.setattr(vectorized, 'AVAILABLE', False)
+    with pytest.raises(ImportError):
+        HuffmanEncoder(vectorized=True)
+    data = b'abc' * vectorized.MIN_SIZE
+    assert HuffmanDecoder().decode(HuffmanEncoder().encode(data)) == data
+
+
+@pytest.mark.parametrize('options', [{}, {'canonical': True}, {'max_code_length': 9}])
+def test_vectorized_identical(options):
+    pytest.importorskip('numpy')
+    for data in _inputs():
+        encoded = HuffmanEncoder(vectorized=True, **options).encode(memoryview(data))
+        assert encoded == HuffmanEncoder(vectorized=False, **options).encode(data)
+        assert HuffmanDecoder().decode(encoded) == data
+
+
+def test_vectorized_static_table():
+    pytest.importorskip('numpy')
+    table = HuffmanTable.from_samples([b'hello world'])
+    for data in _inputs():
+        expected = HuffmanEncoder(table=table).encode(data)
+        assert HuffmanEncoder(table=table, vectorized=True).encode(data) == expected
+
+
+def test_vectorized_chunks(monkeypatch):
+    pytest.importorskip('numpy')
+    monkeypatch.setattr(vectorized, '_CHUNK_SIZE', 6)
+    monkeypatch.setattr(vectorized, '_SCAN_CHUNK', 3)
+    for data in _inputs():
+        expected = HuffmanEncoder(vectorized=False).encode(data)
+        assert HuffmanEncoder(vectorized=True).encode(data) == expected
+
+
+def test_encode_codes_long_codes():
+    pytest.importorskip('numpy')
+    codes = [''] * 256
+    codes[1], codes[2], codes[3] = '1' * 40, '0' * 70, '01'
+    bits = '1' * 40 + '01' + '0' * 70 + '01' + '0' * 6
+    assert vectorized.encode_codes(bytes([1, 3, 2, 3]), codes) == int(bits, 2).to_bytes(15, 'big')
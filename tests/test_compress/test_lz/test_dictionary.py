@@ -0,0 +1,96 @@
+import json
+import random
+
+import pytest
+
+from compress.common.stream import StreamDecoder, StreamEncoder
+from compress.lz import Dictionary, LZDecoder, LZEncoder, train_dictionary
+from compress.lzh import LZHDecoder, LZHEncoder
+
+
+def _messages(n, seed=0):
+    generator = random.Random(seed)
+    return [
+        json.dumps({
+            'id': generator.randrange(1_000_000),
+            'user': generator.choice(['alice', 'bob', 'carol']),
+            'event': generator.choice(['login', 'logout', 'purchase']),
+            'amount': round(generator.random() * 100, 2),
+        }).encode()
+        for _ in range(n)
+    ]
+
+
+@pytest.fixture(scope='module')
+def dictionary():
+    return train_dictionary(_messages(200), size=1024)
+
+
+def test_train_dictionary(dictionary):
+    assert 0 < len(dictionary) <= 1024
+    assert b'"event": "' in dictionary.data
+
+
+def test_train_dictionary_without_shared_data():
+    assert len(train_dictionary([b'abcdefgh', b'ijklmnop'])) == 0
+
+
+def test_dictionary_back(dictionary):
+    encoder = LZEncoder(dictionary=dictionary)
+    decoder = LZDecoder(dictionary=dictionary)
+    for message in _messages(20, seed=1) + [b'', b'a']:
+        assert decoder.decode(encoder.encode(message)) == message
+
+
+def test_dictionary_lzh(dictionary):
+    encoder = LZHEncoder(dictionary=dictionary, canonical=True)
+    decoder = LZHDecoder(dictionary=dictionary)
+    for message in _messages(20, seed=1) + [b'', b'a']:
+        assert decoder.decode(encoder.encode(message)) == message
+    with pytest.raises(ValueError):
+        LZHDecoder().decode(encoder.encode(_messages(1, seed=1)[0]))
+
+
+def test_dictionary_improves_ratio(dictionary):
+    messages = _messages(50, seed=1)
+    encoder = LZEncoder(dictionary=dictionary)
+    with_dictionary = sum(len(encoder.encode(message)) for message in messages)
+    without_dictionary = sum(len(LZEncoder().encode(message)) for message in messages)
+    assert with_dictionary < 0.7 * without_dictionary
+
+
+def test_dictionary_id_in_header(dictionary):
+    encoded = LZEncoder(dictionary=dictionary).encode(b'abc')
+    assert encoded[:3] == b'\x82\x0c\x04'
+    assert int.from_bytes(encoded[3:7], 'big') == dictionary.dictionary_id
+
+
+def test_decode_with_wrong_dictionary(dictionary):
+    encoded = LZEncoder(dictionary=dictionary).encode(_messages(1)[0])
+    with pytest.raises(ValueError):
+        LZDecoder().decode(encoded)
+    with pytest.raises(ValueError):
+        LZDecoder(dictionary=Dictionary(b'other')).decode(encoded)
+
+
+def test_dictionary_not_needed_without_id(dictionary):
+    message = _messages(1)[0]
+    assert LZDecoder(dictionary=dictionary).decode(LZEncoder().encode(message)) == message
+
+
+def test_dictionary_stream(dictionary):
+    data = b''.join(_messages(100, seed=2))
+    encoder = StreamEncoder(LZEncoder(dictionary=dictionary), 500)
+    encoded = encoder.compress(data) + encoder.flush()
+    decoder = StreamDecoder(LZDecoder(dictionary=dictionary))
+    assert decoder.decompress(encoded) + decoder.flush() == data
+
+
+def test_dictionary_decode_into(dictionary):
+    message = _messages(1, seed=3)[0]
+    output = bytearray(len(message) + 5)
+    encoded = LZEncoder(dictionary=dictionary).encode(message)
+    assert LZDecoder(dictionary=dictionary).decode_into(encoded, output) == len(message)
+    assert output == message + bytes(5)
+    with pytest.raises(ValueError):
+        LZDecoder(dictionary=dictionary).decode_into(encoded, bytearray(len(message) - 1))
@@ -0,0 +1,61 @@
+import os
+import random
+import string
+
+import pytest
+
+from compress.lz import LZDecoder, LZEncoder
+from compress.lz.hash_chain import HashChainMatchFinder, Level, MIN_MATCH
+from test_compress import ROOT_PATH
+
+__LEVELS = [Level.FAST, Level.DEFAULT, Level.MAX]
+
+
+def _random_bytes(n):
+    return ''.join(random.choice(string.ascii_lowercase[:4]) for _ in range(n)).encode()
+
+
+def _lorem_bytes():
+    with open(os.path.join(ROOT_PATH, 'sample/lorem.txt'), 'rb') as file:
+        return file.read()
+
+
+@pytest.mark.parametrize("level", __LEVELS)
+def test_matches_valid(level):
+    data = _random_bytes(20_000)
+    position = 0
+    for index, length, distance in HashChainMatchFinder(data, 4095, 15, level=level).matches():
+        assert index >= position
+        assert MIN_MATCH <= length <= 15
+        assert 0 < distance <= 4095
+        assert data[index - distance: index - distance + length] == data[index: index + length]
+        position = index + length + 1
+
+
+def test_matches_overlapping():
+    data = b'x' + b'a' * 20
+    assert list(HashChainMatchFinder(data, 4095, 15).matches()) == [(2, 15, 1), (18, 3, 1)]
+
+
+def test_unknown_level():
+    with pytest.raises(ValueError):
+        LZEncoder(level='unknown').encode(b'data')
+
+
+@pytest.mark.parametrize("level", __LEVELS)
+def test_decode_level(level):
+    data = _lorem_bytes()
+    assert LZDecoder().decode(LZEncoder(level=level).encode(data)) == data
+
+
+def test_higher_level_compresses_more():
+    data = _lorem_bytes()
+    max_size = len(LZEncoder(level=Level.MAX).encode(data))
+    assert max_size <= len(LZEncoder(level=Level.FAST).encode(data))
+
+
+def test_matches_in_writable_buffer():
+    data = _random_bytes(5_000)
+    view = memoryview(bytearray(data))
+    expected = list(HashChainMatchFinder(data, 4095, 15).matches())
+    assert list(HashChainMatchFinder(view, 4095, 15).matches()) == expected
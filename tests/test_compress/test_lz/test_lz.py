@@ -0,0 +1,78 @@
+import random
+import string
+
+import pytest
+
+from compress.hlz import HLZDecoder, HLZEncoder
+from compress.lz import LZDecoder, LZEncoder, _LZDecodingProcess, _repeat
+from compress.lz.hash_chain import Level
+from compress.lzh import LZHDecoder, LZHEncoder
+
+__CONFIGURATIONS = [
+    (12, 4),
+    (8, 3),
+    (16, 8),
+    (20, 9),
+]
+
+
+def _random_bytes(n):
+    return ''.join(random.choice(string.ascii_lowercase[:4]) for _ in range(n)).encode()
+
+
+def test_header():
+    encoded = LZEncoder(offset_bits=20, length_bits=9).encode(b'')
+    assert encoded == b'\x81\x14\x09'
+    assert LZDecoder().decode(encoded) == b''
+
+
+@pytest.mark.parametrize("offset_bits, length_bits", __CONFIGURATIONS)
+def test_decode_configuration(offset_bits, length_bits):
+    input_bytes = _random_bytes(50_000) * 3
+    encoded = LZEncoder(offset_bits=offset_bits, length_bits=length_bits).encode(input_bytes)
+    assert LZDecoder().decode(encoded) == input_bytes
+
+
+def test_longer_matches_compress_more():
+    input_bytes = _random_bytes(1_000) * 20
+    assert len(LZEncoder(length_bits=9).encode(input_bytes)) < len(LZEncoder().encode(input_bytes))
+
+
+def test_decode_without_header():
+    input_bytes = _random_bytes(10_000)
+    encoded = LZEncoder().encode(input_bytes)
+    assert LZDecoder().decode(encoded[3:]) == input_bytes
+
+
+@pytest.mark.parametrize("offset_bits, length_bits", [(0, 4), (25, 4), (12, 1), (12, 17)])
+def test_invalid_configuration(offset_bits, length_bits):
+    with pytest.raises(ValueError):
+        LZEncoder(offset_bits=offset_bits, length_bits=length_bits)
+
+
+@pytest.mark.parametrize(
+    "encoder_type, decoder_type",
+    [(LZHEncoder, LZHDecoder), (HLZEncoder, HLZDecoder)]
+)
+def test_two_stage_lz_options(encoder_type, decoder_type):
+    input_bytes = _random_bytes(20_000) * 2
+    encoder = encoder_type(level=Level.MAX, offset_bits=16, length_bits=8, max_code_length=12)
+    assert decoder_type().decode(encoder.encode(input_bytes)) == input_bytes
+    with pytest.raises(ValueError):
+        encoder_type(offset_bits=25)
+
+
+def test_decode_overlapping_matches():
+    input_bytes = b'ab' * 1_000 + b'c' * 1_000
+    assert LZDecoder().decode(LZEncoder(length_bits=9).encode(input_bytes)) == input_bytes
+
+
+def test_decode_preallocated_output():
+    input_bytes = _random_bytes(10_000)
+    encoded = LZEncoder().encode(input_bytes)
+    for output_size in (len(input_bytes), 0):
+        assert _LZDecodingProcess(LZDecoder(), encoded, output_size).decode() == input_bytes
+
+
+def test_repeat():
+    assert _repeat(bytearray(b'abc'), 7) == bytearray(b'abcabca')
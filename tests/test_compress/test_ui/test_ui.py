@@ -1,3 +1,7 @@
+import io
+import os
+import sys
+
 import pytest
 
 from compress import ui
@@ -59,3 +63,113 @@ def test_too_few_cli_args():
 def test_no_input_file():
     with pytest.raises(SystemExit):
         ui.EncoderProgram(['python.py, -h'])
+
+
+def _standard_streams(monkeypatch, input_data):
+    output = io.BytesIO()
+    monkeypatch.setattr(sys, 'stdin', io.TextIOWrapper(io.BytesIO(input_data)))
+    monkeypatch.setattr(sys, 'stdout', io.TextIOWrapper(output))
+    return output
+
+
+def test_standard_streams_back(monkeypatch):
+    data = b'hello world ' * 1000
+    output = _standard_streams(monkeypatch, data)
+    ui.EncoderProgram(['program.py', '-a', ui.Algorithm.HUFFMAN, '-f', '-']).start()
+    encoded = output.getvalue()
+    output = _standard_streams(monkeypatch, encoded)
+    ui.EncoderProgram(['program.py', '-m', ui.Method.DECODE, '-f', '-', '-o', '-']).start()
+    assert output.getvalue() == data
+
+
+def test_overwrite(tmp_path):
+    input_path = str(tmp_path / 'input.txt')
+    output_path = str(tmp_path / 'output')
+    with open(input_path, 'wb') as file:
+        file.write(b'abc')
+    with open(output_path, 'wb') as file:
+        file.write(b'old')
+    with pytest.raises(SystemExit):
+        ui.EncoderProgram(['program.py', '-f', input_path, '-o', output_path]).start()
+    ui.EncoderProgram(['program.py', '-w', '-f', input_path, '-o', output_path]).start()
+    with open(output_path, 'rb') as file:
+        assert file.read() != b'old'
+
+
+def test_batch_directory(tmp_path):
+    input_directory = tmp_path / 'input'
+    os.makedirs(input_directory / 'nested')
+    files = {
+        'first.txt': b'first file ' * 100,
+        os.path.join('nested', 'second.txt'): b'second file ' * 100,
+    }
+    for name, data in files.items():
+        with open(input_directory / name, 'wb') as file:
+            file.write(data)
+    encoded_directory = str(tmp_path / 'encoded')
+    decoded_directory = str(tmp_path / 'decoded')
+    ui.EncoderProgram(
+        ['program.py', '-j', '2', '-o', encoded_directory, str(input_directory)]
+    ).start()
+    ui.EncoderProgram(
+        ['program.py', '-m', ui.Method.DECODE, '-o', decoded_directory, encoded_directory]
+    ).start()
+    for name, data in files.items():
+        with open(os.path.join(decoded_directory, f'{name}.output.output'), 'rb') as file:
+            assert file.read() == data
+
+
+def test_decode_error_removes_output(tmp_path, capsys):
+    input_path = str(tmp_path / 'input.txt')
+    encoded_path = str(tmp_path / 'input.encoded')
+    decoded_path = str(tmp_path / 'input.decoded')
+    with open(input_path, 'wb') as file:
+        file.write(b'hello world ' * 1000)
+    ui.EncoderProgram(['program.py', '-f', input_path, '-o', encoded_path]).start()
+    with open(encoded_path, 'r+b') as file:
+        file.seek(20)
+        byte = file.read(1)
+        file.seek(20)
+        file.write(bytes([byte[0] ^ 0xFF]))
+    with pytest.raises(SystemExit):
+        ui.EncoderProgram(
+            ['program.py', '-m', ui.Method.DECODE, '-f', encoded_path, '-o', decoded_path]
+        ).start()
+    assert 'Could not process file' in capsys.readouterr().err
+    assert not os.path.exists(decoded_path)
+
+
+def test_encode_error_removes_output(tmp_path, monkeypatch):
+    input_path = str(tmp_path / 'input.txt')
+    encoded_path = str(tmp_path / 'input.encoded')
+    with open(input_path, 'wb') as file:
+        file.write(b'hello world ' * 1000)
+
+    def failing_write(*_):
+        raise ValueError('Encoding failed')
+
+    monkeypatch.setattr(ui.container.ContainerWriter, 'write', failing_write)
+    with pytest.raises(ValueError):
+        ui.process_file(input_path, encoded_path, ui.LZ, ui.Method.ENCODE)
+    assert not os.path.exists(encoded_path)
+
+
+def test_decode_invalid_raw_input(tmp_path, capsys):
+    input_path = str(tmp_path / 'input.bad')
+    with open(input_path, 'wb') as file:
+        file.write(b'\x81\x04\x0c' + b'\xff' * 40)
+    with pytest.raises(SystemExit):
+        ui.EncoderProgram(['program.py', '-m', ui.Method.DECODE, '-f', input_path]).start()
+    assert 'Invalid match offset' in capsys.readouterr().err
+    assert not os.path.exists(f'{input_path}.output')
+
+
+def test_batch_directory_requires_output(tmp_path, capsys):
+    input_directory = tmp_path / 'input'
+    os.makedirs(input_directory)
+    with open(input_directory / 'first.txt', 'wb') as file:
+        file.write(b'first file')
+    with pytest.raises(SystemExit):
+        ui.EncoderProgram(['program.py', str(input_directory)]).start()
+    assert 'output directory is required' in capsys.readouterr().err
+    assert os.listdir(input_directory) == ['first.txt']